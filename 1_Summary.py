@@ -1,7 +1,24 @@
+import atexit
+from dataclasses import asdict
+from typing import Optional
+
 from pydantic import BaseModel, field_validator, ValidationError
 import streamlit as st
 from utilities import pageelements
-from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+from utilities.instrumentation import metrics, profile_capture, stage_timer
+from services.apierrors import ApiRequestError
+from services.matchhistorystore import get_match_store
+from services.playersnapshots import PlayerSnapshot, get_snapshot_store, take_snapshot
+from services.prewarmworker import PrewarmWorker, get_watchlist
+from services.responsecache import DEFAULT_CACHE_POLICY, CachePolicy, get_response_cache
+from utilities.lazyloading import lazy_callable
+
+# Imported on first use, so starting the page doesn't import numpy
+get_population_index = lazy_callable("utilities.percentileindex", "get_population_index")
+save_population_index = lazy_callable("utilities.percentileindex", "save_population_index")
+
+# Fewer players at a level than this aren't worth ranking against
+MIN_RANKED_POPULATION = 20
 
 class PlayerInput(BaseModel):
     player_name: str
@@ -9,34 +26,170 @@ class PlayerInput(BaseModel):
     @field_validator('player_name')
     def validate_player_name(cls, faceit_name: str):
         if len(faceit_name) < 3:
-            st.error('Player name must be at least 3 characters long.')
+            raise ValueError('Player name must be at least 3 characters long.')
         if len(faceit_name) > 12:
-            st.error('Player name must be no more than 12 characters long.')
+            raise ValueError('Player name must be no more than 12 characters long.')
         if not all(char.isalnum() or char in {'_', '-'} for char in faceit_name):
-            st.error("Player name can only contain letters, numbers, '_' and '-'.")
+            raise ValueError("Player name can only contain letters, numbers, '_' and '-'.")
         return faceit_name
 
+def format_age(seconds: float) -> str:
+    """A snapshot's age as shown to users, e.g. "4 minutes" """
+    for unit, unit_seconds in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= unit_seconds:
+            amount = int(seconds // unit_seconds)
+            return f"{amount} {unit}{'s' if amount != 1 else ''}"
+    return "less than a minute"
+
+@st.cache_resource
+def start_prewarm_worker() -> PrewarmWorker:
+    """Keeps watched players' snapshots fresh in the background, started once per process
+
+    The worker also saves the population index every lookup adds to, and
+    saves it a last time when the server shuts down.
+    """
+    worker = PrewarmWorker(
+        get_watchlist(),
+        match_store=get_match_store(),
+        snapshot_store=get_snapshot_store()
+    ).start()
+    atexit.register(save_population_index)
+    return worker
+
+def request_refresh() -> None:
+    st.session_state["refresh_snapshot"] = True
+
+def toggle_watch(faceit_nickname: str) -> None:
+    if st.session_state[f"watch_{faceit_nickname}"]:
+        get_watchlist().add(faceit_nickname)
+    else:
+        get_watchlist().remove(faceit_nickname)
+
+def load_snapshot(faceit_nickname: str) -> Optional[PlayerSnapshot]:
+    """Returns the player's saved snapshot, or looks them up when there is none or a refresh was asked for"""
+    snapshot_store = get_snapshot_store()
+    refresh = st.session_state.pop("refresh_snapshot", False)
+    snapshot = None if refresh else snapshot_store.get(faceit_nickname)
+    if snapshot is not None:
+        return snapshot
+    with st.spinner(f"Looking up {faceit_nickname}..."):
+        try:
+            snapshot = take_snapshot(
+                faceit_nickname,
+                match_store=get_match_store(),
+                # Refreshing skips cached responses, so the new snapshot holds the latest matches
+                cache_policy=CachePolicy(refresh=True) if refresh else DEFAULT_CACHE_POLICY
+            )
+        except ApiRequestError as error:
+            if error.status_code == 404:
+                st.error(f"No Faceit player is called {faceit_nickname}.")
+            else:
+                st.error(str(error))
+            return None
+    # The player joined the population index when the snapshot was taken, the prewarm worker saves it
+    snapshot_store.put(snapshot)
+    return snapshot
+
+def render_snapshot(snapshot: PlayerSnapshot) -> None:
+    player = snapshot.player
+    st.subheader(player.nickname)
+    level_column, elo_column, games_column, bans_column = st.columns(4)
+    level_column.metric("Skill Level", player.skill_level)
+    elo_column.metric("Elo", player.elo)
+    games_column.metric("Matches", player.num_games)
+    bans_column.metric("Bans", snapshot.bans.num_bans)
+    if snapshot.bans.is_banned:
+        st.warning(f"{player.nickname} is currently banned on Faceit.")
+
+    # One row per window, without the player_id every store repeats
+    windows = {"All Time": snapshot.all_time, "Last 20": snapshot.last_20, "First 10": snapshot.first_10}
+    st.table({
+        name: {key: value for key, value in asdict(store).items() if key != "player_id"}
+        for name, store in windows.items()
+    })
+
+    # Ranked at render time, so the ranks follow the population as it grows
+    population_index = get_population_index()
+    level = player.skill_level
+    if population_index.population(level) >= MIN_RANKED_POPULATION:
+        values = population_index.metric_matrix(snapshot.lookup_columns())[0]
+        st.caption(" · ".join(
+            population_index.describe(level, metric, value)
+            for metric, value in zip(population_index.metrics, values)
+        ))
+
+    if snapshot.steam_summary is not None:
+        # Fields of private profiles are None
+        steam_values = {
+            "Steam Account Created": snapshot.steam_summary.created_at,
+            "Steam Friends": snapshot.steam_friends.num_steam_friends,
+            "Steam Games": snapshot.steam_games.num_games
+        }
+        for column, (label, value) in zip(st.columns(len(steam_values)), steam_values.items()):
+            column.metric(label, str(value) if value is not None else "Private")
+
+    # Staleness indicator and an explicit refresh, snapshots are otherwise shown as saved
+    age = snapshot.age_seconds()
+    age_column, watch_column, refresh_column = st.columns([0.6, 0.2, 0.2])
+    if snapshot.is_stale():
+        age_column.warning(f"These stats are {format_age(age)} old, refresh for the latest matches.")
+    else:
+        age_column.caption(f"Updated {format_age(age)} ago.")
+    # Watched players are refreshed by the prewarm worker before they go stale
+    watch_column.checkbox(
+        "Watch",
+        value=snapshot.faceit_nickname in get_watchlist(),
+        key=f"watch_{snapshot.faceit_nickname}",
+        on_change=toggle_watch,
+        args=(snapshot.faceit_nickname,)
+    )
+    refresh_column.button("Refresh", on_click=request_refresh)
+
 # Set config
 st.set_page_config(page_title = "Faceit Tracker DS", layout = "wide")
 
+start_prewarm_worker()
+
+# Hidden debug panel, opened by adding ?debug=1 to the URL
+debug_mode = st.query_params.get("debug") == "1"
+profile_enabled = debug_mode and st.session_state.get("profile_runs", False)
+
 # Page contents
-with st.container():
-    left_column, middle_column, right_column = st.columns([0.2, 0.6, 0.2])
-    with middle_column:
-        # Header
-        st.header("Faceit Stats DS")
-        pageelements.small_vertical_space(1)
-
-        # User Input
-        user_input = player_name = st.text_input(
-            "Enter Faceit Nickname:",
-            max_chars=12
-        )
-        pageelements.small_vertical_space(1)
-
-        if user_input:
-            try:
-                validated_input = PlayerInput(player_name=user_input)
-            except ValidationError as validation_error:
-                # TODO: Add log validation_error.errors()[0]['msg']
-                pass
\ No newline at end of file
+with profile_capture(enabled=profile_enabled) as profile_report, stage_timer("render.summary_page"):
+    with st.container():
+        left_column, middle_column, right_column = st.columns([0.2, 0.6, 0.2])
+        with middle_column:
+            # Header
+            st.header("Faceit Stats DS")
+            pageelements.small_vertical_space(1)
+
+            # User Input, prefilled by shared links such as ?player=nickname
+            user_input = player_name = st.text_input(
+                "Enter Faceit Nickname:",
+                value=st.query_params.get("player", ""),
+                max_chars=12
+            )
+            pageelements.small_vertical_space(1)
+
+            if user_input:
+                try:
+                    validated_input = PlayerInput(player_name=user_input)
+                except ValidationError as validation_error:
+                    st.error(validation_error.errors()[0]['msg'].removeprefix("Value error, "))
+                else:
+                    # Keep the URL shareable, it renders from the same snapshot
+                    st.query_params["player"] = validated_input.player_name
+                    snapshot = load_snapshot(validated_input.player_name)
+                    if snapshot is not None:
+                        render_snapshot(snapshot)
+
+if debug_mode:
+    with st.expander("Debug: instrumentation"):
+        st.checkbox("Profile each run (cProfile + tracemalloc)", key="profile_runs")
+        if profile_enabled:
+            st.caption(f"Peak traced memory: {profile_report.peak_memory_bytes} bytes")
+            st.code(profile_report.cprofile_text)
+            st.code("\n".join(profile_report.top_allocations))
+        st.json({"response_cache": get_response_cache().stats(), **metrics.to_dict()})
+        st.download_button("Metrics (JSON)", metrics.to_json(), file_name="metrics.json")
+        st.download_button("Metrics (Prometheus)", metrics.to_prometheus(), file_name="metrics.prom")
@@ -0,0 +1,82 @@
+"""Times folding new matches into a saved aggregate state against recomputing the full history
+
+The lookups then count API requests through the stand-in server. The folds
+are checked against full recomputes by tests/test_aggregatestate.py.
+
+Usage:
+    python benchmarks/benchmark_aggregatestate.py [--matches 3000] [--new-matches 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_match_items
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+from utilities.aggregatestate import MatchAggregateState
+from utilities.matchstatscolumns import MatchStatsColumns
+from utilities.windowstatistics import MatchStatsWindows
+
+def benchmark_fold(num_matches: int, new_matches: int) -> None:
+    # Both start from stats dicts, as read from the match store
+    total = num_matches + new_matches
+    match_stats = [item["stats"] for item in synthetic_match_items("0" * 36, "cs2", total, 0, total)]
+    saved = MatchAggregateState.from_columns(MatchStatsColumns.from_stats(match_stats[new_matches:])).to_bytes()
+
+    def fold() -> None:
+        state = MatchAggregateState.from_bytes(saved)
+        state.add_columns(MatchStatsColumns.from_stats(match_stats[:new_matches]))
+        state.all_time(), state.last_n(20), state.first_n(10)
+
+    def recompute() -> None:
+        windows = MatchStatsWindows(MatchStatsColumns.from_stats(match_stats))
+        windows.all_time(), windows.last_n(20), windows.first_n(10)
+
+    for name, call in (("fold", fold), ("full recompute", recompute)):
+        best = min(timeit.repeat(call, number=100, repeat=5)) / 100
+        print(f"  {name:>14}: {best * 1e6:8.1f} us")
+
+def benchmark_lookups(latency: float, num_matches: int, new_matches: int) -> None:
+    os.environ.setdefault("SERVER_KEY", "benchmark")
+    config = StandInConfig(latency_seconds=latency, default_matches={"cs2": num_matches, "csgo": 200})
+    with StandInServer(config) as server, tempfile.TemporaryDirectory() as store_dir:
+        point_services_at(server.base_url)
+        from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+        from services.matchhistorystore import MatchHistoryStore
+        from services.responsecache import get_response_cache
+
+        store = MatchHistoryStore(os.path.join(store_dir, "match_history.sqlite3"))
+        lookups = [
+            ("cold", "cs2", 0),
+            ("warm", "cs2", 0),
+            ("new matches", "cs2", new_matches),
+            ("new csgo", "csgo", new_matches)
+        ]
+        for name, game_id, num_new in lookups:
+            config.default_matches[game_id] += num_new
+            # Measure upstream requests rather than response cache hits
+            get_response_cache().clear()
+            server.request_count = 0
+            start = time.perf_counter()
+            retrieval = PlayerFaceitDataRetrieval("benchmark", match_store=store, prefetch=True)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:>12}: {elapsed:.3f}s, {server.request_count} requests, {len(retrieval.aggregate_state)} matches")
+        store.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--matches", type=int, default=3000, help="cs2 matches in the player's history")
+    parser.add_argument("--new-matches", type=int, default=2, help="matches played between lookups")
+    args = parser.parse_args()
+
+    print(f"{args.new_matches} new matches onto {args.matches}")
+    benchmark_fold(args.matches, args.new_matches)
+    print("lookups through the match store")
+    benchmark_lookups(args.latency, args.matches, args.new_matches)
+
+if __name__ == "__main__":
+    main()
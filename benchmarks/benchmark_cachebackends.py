@@ -0,0 +1,87 @@
+"""Times each cache backend, then replicas sharing each one
+
+Each replica is a separate process looking up the same players through the
+stand-in API, so the second replica's upstream requests show what the
+shared backend saved. The backends' behaviour is checked by
+tests/test_cachebackends.py.
+
+Usage:
+    python benchmarks/benchmark_cachebackends.py [--players 4] [--latency 0.02] [--repeat 2000]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import timeit
+from typing import List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_match_items
+from benchmarks.standinresp import StandInRespServer
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+from services.cachebackends import CacheBackend, backend_from_url, decode_value, encode_value
+
+def replica_lookup(base_url: str, cache_url: Optional[str], nicknames: List[str]) -> Tuple[float, int]:
+    """Runs in a fresh process, as one replica of the app would"""
+    os.environ["SERVER_KEY"] = "benchmark"
+    os.environ["STEAM_KEY"] = "benchmark"
+    point_services_at(base_url)
+    from services.batchlookup import lookup_players
+    from services.cachebackends import backend_from_url
+    from services.responsecache import configure_response_cache
+
+    cache = configure_response_cache(backend=backend_from_url(cache_url))
+    start = time.perf_counter()
+    players = lookup_players(nicknames)
+    assert players["error"].isna().all(), players["error"].tolist()
+    return time.perf_counter() - start, cache.stats()["backend_hits"]
+
+def benchmark_replicas(cache_urls: List[Optional[str]], num_players: int, latency: float) -> None:
+    nicknames = [f"replica{index}" for index in range(num_players)]
+    config = StandInConfig(latency_seconds=latency, default_matches={"cs2": 400, "csgo": 100})
+    context = multiprocessing.get_context("spawn")
+    with StandInServer(config) as server:
+        for cache_url in cache_urls:
+            timings = []
+            for replica in range(2):
+                server.request_count = 0
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    seconds, backend_hits = executor.submit(
+                        replica_lookup, server.base_url, cache_url, nicknames
+                    ).result()
+                timings.append(f"replica {replica + 1} {seconds:.2f}s {server.request_count:4d} requests {backend_hits:4d} shared hits")
+            print(f"  {cache_url or 'no backend':>40}: " + ", ".join(timings))
+
+def benchmark_latency(backends: List[Tuple[str, CacheBackend]], repeat: int) -> None:
+    page = encode_value({"items": synthetic_match_items("0" * 36, "cs2", 100, 0, 100)})
+    for name, backend in backends:
+        backend.set("page", page, 60)
+        set_seconds = min(timeit.repeat(lambda: backend.set("page", page, 60), number=repeat, repeat=3)) / repeat
+        get_seconds = min(timeit.repeat(lambda: backend.get("page"), number=repeat, repeat=3)) / repeat
+        decode_seconds = min(timeit.repeat(lambda: decode_value(page), number=repeat, repeat=3)) / repeat
+        print(
+            f"  {name:>8}: get {get_seconds * 1e6:7.1f} us, set {set_seconds * 1e6:7.1f} us, "
+            f"decode {decode_seconds * 1e6:7.1f} us for a {len(page)} byte match page"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir, StandInRespServer() as resp_server:
+        sqlite_url = f"sqlite://{os.path.join(cache_dir, 'cache.sqlite3')}"
+        backends = [(url.split(":")[0], backend_from_url(url)) for url in ("memory://", sqlite_url, resp_server.url)]
+        benchmark_latency(backends, args.repeat)
+        print(f"two replicas looking up {args.players} players")
+        benchmark_replicas([None, sqlite_url, resp_server.url], args.players, args.latency)
+        for _, backend in backends:
+            backend.close()
+
+if __name__ == "__main__":
+    main()
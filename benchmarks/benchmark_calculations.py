@@ -0,0 +1,67 @@
+"""Compares the List[Dict] and columnar paths of calculate_stats
+
+Usage:
+    python benchmarks/benchmark_calculations.py [--sizes 10000 100000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_match_items, synthetic_player_id
+from utilities.faceitstatisticscalculations import calculate_stats
+from utilities.matchstatscolumns import MatchStatsColumns
+
+def legacy_calculate_stats(match_dictionary: List[Dict]) -> Dict[str, float]:
+    """The per-key list and array rebuilding path that calculate_stats replaced"""
+    key_mapping = {
+        "Kills": "avg_kills", "K/R Ratio": "avg_kr_ratio", "K/D Ratio": "avg_kd_ratio",
+        "Headshots %": "avg_hsp", "Double Kills": "avg_2_kills", "Triple Kills": "avg_3_kills",
+        "Quadro Kills": "avg_4_kills", "Penta Kills": "avg_5_kills",
+        "perc_winrate": "perc_winrate", "avg_score_diff": "avg_score_diff"
+    }
+    averages = {}
+    for key, new_key in key_mapping.items():
+        results_array = np.array([float(match.get(key, 0)) for match in match_dictionary])
+        averages[new_key] = round(float(np.mean(results_array)), 2)
+    results_array = np.array([int(match.get("Result", 0)) for match in match_dictionary])
+    averages["perc_winrate"] = round(float(np.sum(results_array == 1) / len(results_array) * 100), 2)
+    results_array = np.array([int(match.get("Result", 0)) for match in match_dictionary], dtype=int)
+    split_score_array = np.array(
+        [match.get("Score", 0).split(" / ") for match in match_dictionary], dtype=int
+    )
+    scores_diff_absolute = np.abs(split_score_array[:, 0] - split_score_array[:, 1])
+    scores_diff_adjusted = np.where(results_array == 1, scores_diff_absolute, -scores_diff_absolute)
+    averages["avg_score_diff"] = round(float(np.mean(scores_diff_adjusted)), 2)
+    return averages
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    player_id = synthetic_player_id("benchmark")
+    for size in args.sizes:
+        items = synthetic_match_items(player_id, "cs2", size, 0, size)
+        match_stats = [item["stats"] for item in items]
+        columns = MatchStatsColumns.from_items(items)
+        assert legacy_calculate_stats(match_stats) == calculate_stats(columns)
+
+        timings = {
+            "legacy List[Dict]": lambda: legacy_calculate_stats(match_stats),
+            "columnar build": lambda: MatchStatsColumns.from_items(items),
+            "columnar aggregate": lambda: calculate_stats(columns),
+            "columnar build + aggregate": lambda: calculate_stats(MatchStatsColumns.from_items(items))
+        }
+        print(f"{size} matches")
+        for name, call in timings.items():
+            best = min(timeit.repeat(call, number=1, repeat=args.repeat))
+            print(f"  {name:>28}: {best * 1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
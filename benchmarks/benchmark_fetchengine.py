@@ -0,0 +1,52 @@
+"""Compares sequential and concurrent Faceit pagination against the stand-in server
+
+Usage:
+    python benchmarks/benchmark_fetchengine.py [--latency 0.05] [--cs2 3000] [--csgo 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--cs2", type=int, default=3000, help="cs2 matches in the player's history")
+    parser.add_argument("--csgo", type=int, default=1000, help="csgo matches in the player's history")
+    parser.add_argument("--window-size", type=int, default=4)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SERVER_KEY", "benchmark")
+    config = StandInConfig(
+        latency_seconds=args.latency,
+        default_matches={"cs2": args.cs2, "csgo": args.csgo}
+    )
+    with StandInServer(config) as server:
+        point_services_at(server.base_url)
+        from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+        from services.responsecache import get_response_cache
+
+        runs = {
+            "sequential": {"max_concurrency": 1, "window_size": 1},
+            "concurrent": {"max_concurrency": args.max_concurrency, "window_size": args.window_size}
+        }
+        timings = {}
+        for name, engine_kwargs in runs.items():
+            # Measure upstream requests rather than response cache hits
+            get_response_cache().clear()
+            server.request_count = 0
+            start = time.perf_counter()
+            retrieval = PlayerFaceitDataRetrieval("benchmark", prefetch=True, **engine_kwargs)
+            timings[name] = time.perf_counter() - start
+            print(
+                f"{name:>10}: {timings[name]:.3f}s, {server.request_count} requests, "
+                f"{len(retrieval.all_cs_game_stats)} matches"
+            )
+        print(f"   speedup: {timings['sequential'] / timings['concurrent']:.1f}x")
+
+if __name__ == "__main__":
+    main()
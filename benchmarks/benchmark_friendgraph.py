@@ -0,0 +1,81 @@
+"""Times friend graph crawls against the stand-in server and graph queries on a synthetic graph
+
+Usage:
+    python benchmarks/benchmark_friendgraph.py [--nodes 50000] [--friends 40] [--crawl-depth 2] [--latency 0.02]
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+
+def benchmark_queries(num_nodes: int, num_friends: int, repeat: int) -> None:
+    from utilities.friendgraph import FriendGraph
+
+    rng = np.random.default_rng(0)
+    # Mostly random friendships plus rings of 8 players who all know each other
+    sources = rng.integers(0, num_nodes, num_nodes * num_friends // 2)
+    targets = rng.integers(0, num_nodes, num_nodes * num_friends // 2)
+    rings = rng.choice(num_nodes, (num_nodes // 1000, 8), replace=False)
+    ring_pairs = np.array([(first, second) for first in range(8) for second in range(first + 1, 8)])
+    sources = np.concatenate([sources, rings[:, ring_pairs[:, 0]].ravel()])
+    targets = np.concatenate([targets, rings[:, ring_pairs[:, 1]].ravel()])
+    node_ids = [str(76561198000000000 + index) for index in range(num_nodes)]
+
+    graph = FriendGraph.from_edges(node_ids, sources, targets)
+    ring = [node_ids[index] for index in rings[0]]
+    assert graph.density(ring) == 1.0
+    assert set(ring[1:]) <= set(graph.friends(ring[0]))
+    print(
+        f"{len(graph)} nodes, {graph.num_edges} friendships, "
+        f"{(graph.indptr.nbytes + graph.indices.nbytes) / 1e6:.1f} MB of adjacency"
+    )
+    timings = {
+        "from_edges": lambda: FriendGraph.from_edges(node_ids, sources, targets),
+        "components": graph.components,
+        "common_friend_counts": lambda: graph.common_friend_counts(ring[0]),
+        "most_connected_to": lambda: graph.most_connected_to(ring[0]),
+        "density of a ring": lambda: graph.density(ring),
+        "jaccard": lambda: graph.jaccard(ring[0], ring[1])
+    }
+    for name, call in timings.items():
+        best = min(timeit.repeat(call, number=1, repeat=repeat))
+        print(f"  {name:>24}: {best * 1000:8.3f} ms")
+
+def benchmark_crawl(depth: int, latency: float) -> None:
+    with StandInServer(StandInConfig(latency_seconds=latency)) as server:
+        point_services_at(server.base_url)
+        from services.friendgraphcrawler import crawl_steam_friends
+        from services.responsecache import get_response_cache
+
+        get_response_cache().clear()
+        start = time.perf_counter()
+        crawl = crawl_steam_friends(["76561198000000001", "76561198000000002"], depth=depth)
+        seconds = time.perf_counter() - start
+        print(
+            f"crawl to depth {depth}: {seconds:.2f}s, {server.request_count} requests, "
+            f"{len(crawl.graph)} nodes, {crawl.graph.num_edges} friendships, {len(crawl.profiles)} profiles"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=50_000)
+    parser.add_argument("--friends", type=int, default=40)
+    parser.add_argument("--crawl-depth", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # The services read their keys on first use, the stand-in server ignores them
+    os.environ.setdefault("SERVER_KEY", "benchmark")
+    os.environ.setdefault("STEAM_KEY", "benchmark")
+    benchmark_queries(args.nodes, args.friends, args.repeat)
+    benchmark_crawl(args.crawl_depth, args.latency)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Times importing the services and checks heavy dependencies stay unloaded until used
+
+Each module is imported in a fresh interpreter with -X importtime.
+
+Usage:
+    python benchmarks/benchmark_importtime.py [--modules services.faceitplayerstatistics] [--top 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = [
+    "services.faceitplayerstatistics",
+    "services.steamplayerstatistics",
+    "services.responsecache",
+    "services.requestscheduler",
+    "services.playersnapshots"
+]
+# Only imported on first use, e.g. numpy when stats are first calculated
+DEFERRED_MODULES = ["streamlit", "numpy", "glom", "dotenv", "pyarrow"]
+
+def import_times(module: str) -> Tuple[List[Tuple[int, str]], List[str]]:
+    """Imports module in a new interpreter
+
+    Returns:
+        Tuple[List[Tuple[int, str]], List[str]]: (cumulative microseconds, name) of every
+            module imported, and the deferred modules that were imported anyway
+    """
+    check = f"import sys, {module}; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times.append((int(cumulative), name.strip()))
+    return times, [name for name in process.stdout.strip().split(",") if name]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        times, loaded = import_times(module)
+        total = next(cumulative for cumulative, name in times if name == module)
+        print(f"{module}: {total / 1000:8.1f} ms")
+        # Only top level packages, their submodules are counted in their cumulative time
+        packages = sorted((entry for entry in times if "." not in entry[1]), reverse=True)
+        for cumulative, name in packages[:args.top]:
+            print(f"  {name:>30}: {cumulative / 1000:8.1f} ms")
+        assert not loaded, f"{module} imported {loaded} at import time"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compares per map, month and game breakdowns read from the Parquet match dataset with loading every match
+
+Usage:
+    python benchmarks/benchmark_matchdataset.py [--players 200] [--matches 1500] [--repeat 5]
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_match_stats, synthetic_player_id
+from services.matchhistorydataset import MatchHistoryDataset, match_stats_schema
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--matches", type=int, default=1500, help="cs2 matches per player, a third as many csgo")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    player_ids = [synthetic_player_id(f"player{index}") for index in range(args.players)]
+    with tempfile.TemporaryDirectory() as dataset_dir:
+        dataset = MatchHistoryDataset(dataset_dir)
+        start = time.perf_counter()
+        for player_id in player_ids:
+            for game_id, num_matches in (("cs2", args.matches), ("csgo", args.matches // 3)):
+                dataset.write_history(
+                    player_id,
+                    game_id,
+                    [synthetic_match_stats(player_id, game_id, number) for number in range(num_matches)]
+                )
+        num_files = sum(len(files) for _, _, files in os.walk(dataset_dir))
+        size = sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(dataset_dir) for name in files)
+        print(
+            f"wrote {args.players} players in {time.perf_counter() - start:.2f}s, "
+            f"{num_files} files, {size / 1e6:.1f} MB"
+        )
+
+        one_player = player_ids[:1]
+        year_start = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc)
+        year_end = datetime.datetime(2018, 12, 31, 23, 59, tzinfo=datetime.timezone.utc)
+
+        def load_everything() -> pd.DataFrame:
+            """The baseline, every column of every match then filtered in pandas"""
+            return dataset.read([*match_stats_schema().names, "game_id"]).to_pandas()
+
+        everything = load_everything()
+        expected = everything[everything["player_id"] == one_player[0]].groupby("map")["kills"].mean()
+        assert (abs(dataset.per_map(one_player)["avg_kills"].to_numpy() - expected.to_numpy()) < 1e-6).all()
+        per_month = dataset.per_month(game_ids=["cs2"], start=year_start, end=year_end)
+        assert list(per_month["month"]) == [f"2018-{month:02d}" for month in range(1, 13)]
+        assert per_month["num_matches"].sum() == (
+            (everything["game_id"] == "cs2") & (everything["finished_at"].dt.year == 2018)
+        ).sum()
+
+        timings = {
+            "load every match": load_everything,
+            "per map, one player": lambda: dataset.per_map(one_player),
+            "per month, 2018 cs2": lambda: dataset.per_month(game_ids=["cs2"], start=year_start, end=year_end),
+            "per game, every player": lambda: dataset.per_game(),
+            "per map, every player": lambda: dataset.per_map()
+        }
+        for name, call in timings.items():
+            best = min(timeit.repeat(call, number=1, repeat=args.repeat))
+            print(f"  {name:>24}: {best * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Counts the API calls of a cold and a warm lookup through the match history store
+
+Usage:
+    python benchmarks/benchmark_matchhistorystore.py [--matches 3000] [--new-matches 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--matches", type=int, default=3000, help="cs2 matches in the player's history")
+    parser.add_argument("--new-matches", type=int, default=2, help="matches played between lookups")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SERVER_KEY", "benchmark")
+    config = StandInConfig(
+        latency_seconds=args.latency,
+        default_matches={"cs2": args.matches, "csgo": 0}
+    )
+    with StandInServer(config) as server, tempfile.TemporaryDirectory() as store_dir:
+        point_services_at(server.base_url)
+        from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+        from services.responsecache import get_response_cache
+        from services.matchhistorystore import MatchHistoryStore
+
+        store = MatchHistoryStore(os.path.join(store_dir, "match_history.sqlite3"))
+        lookups = [("cold", 0), ("warm", 0), ("new matches", args.new_matches)]
+        for name, new_matches in lookups:
+            config.default_matches["cs2"] += new_matches
+            # Measure upstream requests rather than response cache hits
+            get_response_cache().clear()
+            server.request_count = 0
+            start = time.perf_counter()
+            retrieval = PlayerFaceitDataRetrieval("benchmark", match_store=store, prefetch=True)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>12}: {elapsed:.3f}s, {server.request_count} requests, "
+                f"{len(retrieval.all_cs_game_stats)} matches"
+            )
+
+        # The stored history must match what a full fetch returns
+        full_retrieval = PlayerFaceitDataRetrieval("benchmark")
+        assert full_retrieval.all_cs_game_stats == retrieval.all_cs_game_stats
+        store.close()
+
+if __name__ == "__main__":
+    main()
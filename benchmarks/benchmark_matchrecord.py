@@ -0,0 +1,73 @@
+"""Compares the memory and parse time of raw stats dicts and MatchRecords
+
+Usage:
+    python benchmarks/benchmark_matchrecord.py [--sizes 1000 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_match_items, synthetic_player_id
+from utilities.faceitstatisticscalculations import calculate_stats
+from utilities.matchrecord import MatchRecord
+from utilities.matchstatscolumns import MatchStatsColumns
+
+def _records(match_stats: List) -> List[MatchRecord]:
+    """Creates records a page of 100 at a time, as the lookup does"""
+    return [
+        record
+        for start in range(0, len(match_stats), 100)
+        for record in MatchRecord.from_page(match_stats[start:start + 100])
+    ]
+
+def _retained_bytes(build: Callable[[], List]) -> int:
+    """Returns the bytes still allocated by the result of build"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return retained
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    player_id = synthetic_player_id("benchmark")
+    for size in args.sizes:
+        # Decoded from json like a response body, so no strings are shared with the fixtures
+        body = json.dumps(synthetic_match_items(player_id, "cs2", size, 0, size))
+        match_stats = [item["stats"] for item in json.loads(body)]
+        records = _records(match_stats)
+        assert MatchRecord.to_stats_list(records) == match_stats
+        assert records[size // 2].to_stats() == match_stats[size // 2]
+        assert calculate_stats(records) == calculate_stats(match_stats)
+
+        dict_bytes = _retained_bytes(lambda: [item["stats"] for item in json.loads(body)])
+        record_bytes = _retained_bytes(
+            lambda: _records([item["stats"] for item in json.loads(body)])
+        )
+        print(f"{size} matches")
+        print(f"  {'stats dict':>30}: {dict_bytes / size:8.0f} bytes per match")
+        print(f"  {'MatchRecord':>30}: {record_bytes / size:8.0f} bytes per match")
+
+        timings = {
+            "parse stats dicts": lambda: MatchStatsColumns.from_stats(match_stats),
+            "gather MatchRecords": lambda: MatchStatsColumns.from_records(records),
+            "create MatchRecords": lambda: _records(match_stats),
+            "round trip to stats dicts": lambda: MatchRecord.to_stats_list(records)
+        }
+        for name, call in timings.items():
+            best = min(timeit.repeat(call, number=1, repeat=args.repeat))
+            print(f"  {name:>30}: {best * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
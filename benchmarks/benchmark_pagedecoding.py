@@ -0,0 +1,111 @@
+"""Compares decoding only a stats page's new matches against decoding the full page
+
+Per page, a warm lookup through the match store keeps the matches ahead of
+the newest stored one. The lookups then compare the CPU time of warm
+lookups with the prefix decode and with the full decode it falls back to.
+
+Usage:
+    python benchmarks/benchmark_pagedecoding.py [--new-matches 0 2 10 50] [--players 10] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_match_items
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+from utilities.pagedecoding import decode_items_before
+
+def peak_memory(call: Callable[[], object]) -> int:
+    """Returns the peak bytes traced by tracemalloc while call runs"""
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def cpu_seconds(call: Callable[[], object], repeat: int) -> float:
+    timer = timeit.Timer(call, timer=time.process_time)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def benchmark_pages(new_matches_options: list, repeat: int) -> None:
+    page = {"items": synthetic_match_items("0" * 36, "cs2", 1000, 0, 100), "start": 0, "end": 100}
+    body = json.dumps(page, separators=(",", ":")).encode()
+    full_seconds = cpu_seconds(lambda: json.loads(body), repeat)
+    full_peak = peak_memory(lambda: json.loads(body))
+    print(f"  {'full page':>16}: {full_seconds * 1e6:8.1f} us CPU, {full_peak / 1024:7.1f} KiB peak")
+    for new_matches in new_matches_options:
+        newest_match_id = page["items"][new_matches]["stats"]["Match Id"]
+        decoded = decode_items_before(body, newest_match_id)
+        assert decoded == {"items": page["items"][:new_matches]}
+        seconds = cpu_seconds(lambda: decode_items_before(body, newest_match_id), repeat)
+        peak = peak_memory(lambda: decode_items_before(body, newest_match_id))
+        print(
+            f"  {f'{new_matches} new matches':>16}: {seconds * 1e6:8.1f} us CPU, {peak / 1024:7.1f} KiB peak, "
+            f"{full_seconds / seconds:5.1f}x less CPU"
+        )
+    # A match that isn't in the page, e.g. over 100 new matches, is left to the full decode
+    assert decode_items_before(body, "not-in-page") is None
+    assert decode_items_before(json.dumps(page, indent=2).encode(), newest_match_id) == decoded
+
+def benchmark_lookups(num_players: int, new_matches: int) -> None:
+    os.environ.setdefault("SERVER_KEY", "benchmark")
+    config = StandInConfig(latency_seconds=0.0, default_matches={"cs2": 1000, "csgo": 200})
+    with StandInServer(config) as server, tempfile.TemporaryDirectory() as store_dir:
+        point_services_at(server.base_url)
+        from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+        from services.matchhistorystore import MatchHistoryStore
+        from services.responsecache import get_response_cache
+        from utilities.instrumentation import metrics
+
+        class FullDecodeRetrieval(PlayerFaceitDataRetrieval):
+            """Decodes every page in full, as before the prefix decode"""
+            def _fetch_new_match_stats(self, game_id, is_stored, newest_match_id=None):
+                return super()._fetch_new_match_stats(game_id, is_stored)
+
+        nicknames = [f"decoding{index}" for index in range(num_players)]
+        for retrieval_class in (FullDecodeRetrieval, PlayerFaceitDataRetrieval):
+            store = MatchHistoryStore(os.path.join(store_dir, f"{retrieval_class.__name__}.sqlite3"))
+            for nickname in nicknames:
+                retrieval_class(nickname, match_store=store, prefetch=True)
+            config.default_matches["cs2"] += new_matches
+            # Measure decoding rather than response cache hits
+            get_response_cache().clear()
+            metrics.reset()
+            start = time.process_time()
+            for nickname in nicknames:
+                retrieval = retrieval_class(nickname, match_store=store, prefetch=True)
+                assert retrieval.player_data_store().num_games == config.default_matches["cs2"] + 200
+            seconds = time.process_time() - start
+            stages = metrics.to_dict()["stages"]
+            decode_seconds = sum(
+                stages.get(stage, {}).get("total_seconds", 0) for stage in ("faceit.json_decode", "faceit.selective_decode")
+            )
+            print(
+                f"  {retrieval_class.__name__:>26}: {seconds * 1000:7.1f} ms CPU for {num_players} warm lookups, "
+                f"{decode_seconds * 1000:6.1f} ms decoding"
+            )
+            store.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--new-matches", type=int, nargs="+", default=[0, 2, 10, 50])
+    parser.add_argument("--players", type=int, default=10, help="players looked up warm")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("one 100 match page")
+    benchmark_pages(args.new_matches, args.repeat)
+    print("warm lookups through the match store, 2 new matches each")
+    benchmark_lookups(args.players, 2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compares ranking players with the population percentile index against scanning the population
+
+Also times adding one player to a populated index, as each Summary page
+lookup does. The index's ranks are checked by tests/test_percentileindex.py.
+
+Usage:
+    python benchmarks/benchmark_percentileindex.py [--population 100000 1000000] [--batch 1000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities.percentileindex import PopulationPercentileIndex
+
+def scan_percentile(values: np.ndarray, levels: np.ndarray, level: int, value: float) -> float:
+    """The baseline, compares value with every player at the level"""
+    population = values[(levels == level) & ~np.isnan(values)]
+    return 100 * ((population < value).sum() + (population == value).sum() / 2) / len(population)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--population", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=1_000, help="players ranked at once")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.population:
+        index = PopulationPercentileIndex()
+        levels = rng.integers(1, 11, size)
+        values = np.round(rng.normal(1.0, 0.3, (size, len(index.metrics))), 2)
+        values[rng.random(values.shape) < 0.05] = np.nan
+        player_ids = [f"player{number}" for number in range(size)]
+        update_seconds = min(timeit.repeat(lambda: index.update(player_ids, levels, values), number=1, repeat=1))
+        print(f"{size} players: update {update_seconds * 1000:.0f} ms")
+
+        metric = "all_time_avg_hsp"
+        column = index.metrics.index(metric)
+        batch_levels, batch_values = levels[:args.batch], values[:args.batch]
+        new_values = np.round(rng.normal(1.0, 0.3, (args.repeat, len(index.metrics))), 2)
+        for name, replaced in (("new", False), ("replaced", True)):
+            # Each call adds or replaces a different player, so the level keeps growing or churning
+            calls = iter(range(args.repeat))
+            def add_player() -> None:
+                call = next(calls)
+                player_id = player_ids[call] if replaced else f"new{call}"
+                index.update([player_id], [4], new_values[call:call + 1])
+            best = min(timeit.repeat(add_player, number=1, repeat=args.repeat))
+            print(f"  {'one ' + name + ' player, update':>34}: {best * 1e6:10.1f} us")
+        timings = {
+            "one metric, index": (lambda: index.percentile(4, metric, 1.37), 1),
+            "one metric, scan": (lambda: scan_percentile(values[:, column], levels, 4, 1.37), 1),
+            f"{args.batch} players x {len(index.metrics)} metrics, index": (
+                lambda: index.percentiles(batch_levels, batch_values), args.batch * len(index.metrics)
+            )
+        }
+        for name, (call, num_ranks) in timings.items():
+            best = min(timeit.repeat(call, number=10, repeat=args.repeat)) / 10
+            print(f"  {name:>34}: {best * 1e6:10.1f} us, {best * 1e6 / num_ranks:8.2f} us per percentile")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Times the risk scoring engine on the seeded corpus and reports how well it separates smurfs
+
+The engine's behaviour is checked by tests/test_riskscoring.py.
+
+Usage:
+    python benchmarks/benchmark_riskscoring.py [--sizes 10 10000 100000] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_risk_corpus
+from utilities.riskscoring import RiskScoringEngine
+
+def ranking_auc(scores: np.ndarray, is_positive: np.ndarray) -> float:
+    """Probability that a random positive scores above a random negative"""
+    ranks = np.empty(len(scores))
+    ranks[np.argsort(scores, kind="stable")] = np.arange(1, len(scores) + 1)
+    num_positive = int(is_positive.sum())
+    num_negative = len(scores) - num_positive
+    return (ranks[is_positive].sum() - num_positive * (num_positive + 1) / 2) / (num_positive * num_negative)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = RiskScoringEngine()
+    for size in args.sizes:
+        columns, is_smurf = synthetic_risk_corpus(size, seed=args.seed)
+        matrix = engine.feature_matrix(columns)
+        risk_scores = engine.score(matrix)
+
+        best = min(timeit.repeat(lambda: engine.score(matrix), number=1, repeat=args.repeat))
+        print(f"{size} players: {best * 1000:8.3f} ms")
+        if 0 < is_smurf.sum() < size:
+            print(
+                f"  mean score {risk_scores.scores[is_smurf].mean():5.1f} smurfs, "
+                f"{risk_scores.scores[~is_smurf].mean():5.1f} others, "
+                f"AUC {ranking_auc(risk_scores.scores, is_smurf):.3f}"
+            )
+        riskiest = int(np.argmax(risk_scores.scores))
+        print(f"  riskiest player {riskiest}: {risk_scores.top_contributors(riskiest)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compares rendering the summary page from a player's snapshot against looking the player up again
+
+A lookup through the stand-in server takes the snapshot, then reads of it
+are timed against repeating the lookup with every response cached, which
+is what each rerun of the page cost before. The page itself is run through
+Streamlit's AppTest, once to take the snapshot and then as reruns, and the
+prewarm worker refreshes a watched player's snapshot.
+
+Usage:
+    python benchmarks/benchmark_snapshots.py [--latency 0.02] [--matches 3000] [--reruns 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def timings(call: Callable[[], object], runs: int) -> List[float]:
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+def report(name: str, seconds: List[float]) -> None:
+    print(f"  {name:>26}: {statistics.median(seconds) * 1000:9.1f} ms median over {len(seconds)}")
+
+def benchmark_snapshots(latency: float, num_matches: int, reruns: int) -> None:
+    os.environ.setdefault("SERVER_KEY", "benchmark")
+    os.environ.setdefault("STEAM_KEY", "benchmark")
+    config = StandInConfig(latency_seconds=latency, default_matches={"cs2": num_matches, "csgo": 200})
+    with StandInServer(config) as server, tempfile.TemporaryDirectory() as store_dir:
+        point_services_at(server.base_url)
+        from streamlit.testing.v1 import AppTest
+        from services.cachebackends import SQLiteBackend
+        from services.matchhistorystore import configure_match_store
+        from services.playersnapshots import configure_snapshot_store, take_snapshot
+        from services.prewarmworker import PrewarmWorker, configure_watchlist
+        from services.responsecache import get_response_cache
+        from utilities.percentileindex import PopulationPercentileIndex, configure_population_index, get_population_index
+
+        # Everything the page keeps goes to temporary files rather than the app's
+        snapshot_store = configure_snapshot_store(backend=SQLiteBackend(os.path.join(store_dir, "snapshots.sqlite3")))
+        match_store = configure_match_store(path=os.path.join(store_dir, "match_history.sqlite3"))
+        watchlist = configure_watchlist(path=os.path.join(store_dir, "watchlist.json"))
+        configure_population_index(os.path.join(store_dir, "population_index.npz"))
+        report("cold lookup", timings(lambda: take_snapshot("benchmark"), 1))
+        snapshot = take_snapshot("benchmark")
+        report("lookup, responses cached", timings(lambda: take_snapshot("benchmark"), reruns))
+        snapshot_store.put(snapshot)
+        assert snapshot_store.get("benchmark") == snapshot
+        report("snapshot read", timings(lambda: snapshot_store.get("benchmark"), reruns))
+
+        # A shared link to a player not looked up yet, then reruns of the same page
+        get_response_cache().clear()
+        app = AppTest.from_file(os.path.join(ROOT, "1_Summary.py"), default_timeout=600)
+        app.query_params["player"] = "linked"
+        report("page, first render", timings(app.run, 1))
+        assert not app.exception and not app.error, (app.exception, app.error)
+        report("page rerun", timings(app.run, reruns))
+        assert app.subheader[0].value == snapshot_store.get("linked").player.nickname
+        assert "Updated" in app.caption[-1].value
+
+        # Refresh takes a new snapshot rather than reading the saved one
+        requests_before = server.request_count
+        taken_before = snapshot_store.get("linked").taken_at
+        app.button[0].click()
+        report("page, after refresh", timings(app.run, 1))
+        assert server.request_count > requests_before
+        assert snapshot_store.get("linked").taken_at > taken_before
+
+        # Watching a player adds them to the watchlist the page's prewarm worker refreshes
+        app.checkbox[0].check()
+        app.run()
+        assert "linked" in watchlist.nicknames()
+
+        # A watched player's snapshot is replaced by the prewarm worker before it goes stale
+        watchlist.add("watched")
+        worker = PrewarmWorker(watchlist, match_store=match_store, snapshot_store=snapshot_store)
+        report("prewarm refresh", timings(lambda: worker.refresh("watched"), 1))
+        watched = snapshot_store.get("watched")
+        assert watched is not None and not watched.is_stale()
+        # Folded from the match store, the stats match a lookup without one
+        assert watched.all_time == take_snapshot("watched").all_time
+
+        # Lookups only add players to the population index in memory, the worker saves it when stopped
+        worker.stop()
+        saved_index = PopulationPercentileIndex.load(os.path.join(store_dir, "population_index.npz"))
+        assert len(saved_index) == len(get_population_index())
+
+        # Invalid nicknames are reported once and looked up never
+        app.text_input[0].input("x")
+        app.run()
+        assert [error.value for error in app.error] == ["Player name must be at least 3 characters long."]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--matches", type=int, default=3000, help="cs2 matches in the player's history")
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"a player with {args.matches} cs2 matches")
+    benchmark_snapshots(args.latency, args.matches, args.reruns)
+
+if __name__ == "__main__":
+    main()
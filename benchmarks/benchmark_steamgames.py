@@ -0,0 +1,116 @@
+"""Compares the direct per-player and batched owned games stats with the generator based version
+
+Usage:
+    python benchmarks/benchmark_steamgames.py [--sizes 1 1000 10000] [--repeat 5] [--library-size 200]
+"""
+import argparse
+from datetime import date
+import math
+import os
+import sys
+import timeit
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_owned_games
+from utilities.steamgamesanalytics import CS2_APP_ID, OwnedGamesColumns, owned_games_stats
+from utilities.steamstatisticscalculations import get_steam_games_stats
+
+def legacy_get_steam_games_stats(game_dictionary: Dict, steam_created_at: date) -> Dict[str, Union[int, float]]:
+    """The two generator scans and separate array passes that OwnedGamesColumns replaced"""
+    game_data = game_dictionary.get("response", {}).get("games", [])
+    playtime_cs2_mins = next(
+        (game.get('playtime_forever', None) for game in game_data if game['appid'] == 730),
+        0
+    )
+    playtime_all_games_array = np.array([game["playtime_forever"] for game in game_data])
+    try:
+        perc_cs2_playtime_all_games = round(100 * (playtime_cs2_mins / int(np.sum(playtime_all_games_array))), 2)
+    except ZeroDivisionError:
+        perc_cs2_playtime_all_games = 0.0
+    account_age_mins = (date.today() - steam_created_at).total_seconds() / 60
+    return {
+        "num_games": len(game_data),
+        "playtime_cs2_mins": next((game.get('playtime_forever', 0) for game in game_data if game['appid'] == 730), 0),
+        "playtime_all_games_stdev": float(np.std(playtime_all_games_array) if playtime_all_games_array.size > 0 else 0.0),
+        "perc_cs2_playtime_all_games": perc_cs2_playtime_all_games,
+        "perc_cs2_playtime_account_age": round(100 * playtime_cs2_mins / account_age_mins, 2)
+    }
+
+def _libraries(size: int, library_size: Optional[int]) -> List[Dict]:
+    if library_size is None:
+        libraries = [synthetic_owned_games(str(76561198000000000 + index)) for index in range(size)]
+    else:
+        rng = np.random.default_rng(size)
+        libraries = [
+            {"response": {"games": [
+                {"appid": int(app_id), "playtime_forever": int(rng.integers(0, 200_000)), "playtime_2weeks": 0}
+                for app_id in np.append(CS2_APP_ID, rng.choice(100_000, library_size - 1, replace=False) + 1_000)
+            ]}}
+            for _ in range(size)
+        ]
+    # Edge cases: an empty library and a library without CS2
+    libraries[0] = {"response": {}}
+    if size > 1:
+        libraries[1] = {"response": {"games": [
+            game for game in libraries[1]["response"]["games"] if game["appid"] != CS2_APP_ID
+        ]}}
+    return libraries
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--library-size", type=int, help="Games per library, the fixtures' mix by default")
+    args = parser.parse_args()
+
+    created_at = date(2015, 6, 1)
+    account_age_mins = (date.today() - created_at).total_seconds() / 60
+    for size in args.sizes:
+        libraries = _libraries(size, args.library_size)
+        for library in libraries:
+            new, old = get_steam_games_stats(library, created_at), legacy_get_steam_games_stats(library, created_at)
+            assert new.keys() == old.keys()
+            assert all(type(new[key]) is type(old[key]) for key in new), (new, old)
+            # Sums in a different order, so the standard deviation may differ in its last bits
+            assert math.isclose(new.pop("playtime_all_games_stdev"), old.pop("playtime_all_games_stdev"), rel_tol=1e-12)
+            assert new == old, (new, old)
+
+        columns = OwnedGamesColumns.from_responses(libraries)
+        for index in (0, size // 2, size - 1):
+            playtime = np.array([
+                game["playtime_forever"] for game in libraries[index].get("response", {}).get("games", [])
+            ], dtype=np.float64)
+            if playtime.size:
+                assert np.allclose(
+                    columns.playtime_percentiles([10, 50, 90])[index],
+                    np.percentile(playtime, [10, 50, 90])
+                )
+                assert columns.top_games(3)[1][index][0] == playtime.max()
+
+        timings = {
+            "per player, generator scans": lambda: [
+                legacy_get_steam_games_stats(library, created_at) for library in libraries
+            ],
+            "per player, direct": lambda: [
+                get_steam_games_stats(library, created_at) for library in libraries
+            ],
+            "batched, OwnedGamesColumns": lambda: owned_games_stats(
+                OwnedGamesColumns.from_responses(libraries), np.full(size, account_age_mins)
+            ),
+            "batched analytics": lambda: (
+                columns.playtime_percentiles([25, 50, 75]),
+                columns.top_games(5),
+                columns.share_of([CS2_APP_ID, 570]),
+                columns.recent_ratio()
+            )
+        }
+        print(f"{size} libraries, {len(columns.app_ids)} games")
+        for name, call in timings.items():
+            best = min(timeit.repeat(call, number=1, repeat=args.repeat))
+            print(f"  {name:>30}: {best * 1000:8.3f} ms")
+
+if __name__ == "__main__":
+    main()
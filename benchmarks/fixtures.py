@@ -0,0 +1,179 @@
+import hashlib
+import random
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+MAPS = ["de_mirage", "de_inferno", "de_nuke", "de_ancient", "de_anubis", "de_vertigo", "de_dust2"]
+
+# A player's first match finishes at this timestamp (ms), later ones follow a day apart
+FIRST_MATCH_FINISHED_AT = 1_500_000_000_000
+MATCH_SPACING_MS = 86_400_000
+
+def synthetic_player_id(nickname: str) -> str:
+    """Derives a stable fake Faceit player_id from a nickname"""
+    digest = hashlib.md5(nickname.encode()).hexdigest()
+    return f"{digest[:8]}-{digest[8:12]}-{digest[12:16]}-{digest[16:20]}-{digest[20:]}"
+
+def synthetic_match_stats(player_id: str, game_id: str, match_number: int) -> Dict:
+    """Builds one match's `stats` dict in the shape the Faceit stats endpoint returns
+
+    Args:
+        player_id (str): The player the match belongs to
+        game_id (str): cs2 or csgo
+        match_number (int): Position in the player's history, 0 being their first match
+
+    Returns:
+        Dict: A stats dict with string values, as the API returns them
+    """
+    # Seeded per match so a match keeps its data as newer matches are added
+    rng = random.Random(f"{player_id}:{game_id}:{match_number}")
+    loser_score = rng.randint(0, 11)
+    rounds = 13 + loser_score
+    kills = rng.randint(5, 35)
+    deaths = rng.randint(8, 28)
+    headshots = rng.randint(0, kills)
+    won = rng.random() < 0.52
+    # The player's team is listed first half of the time
+    score = (13, loser_score) if rng.random() < 0.5 else (loser_score, 13)
+    finished_at = FIRST_MATCH_FINISHED_AT + match_number * MATCH_SPACING_MS
+    return {
+        "Player Id": player_id,
+        "Match Id": f"1-{player_id[:8]}-{game_id}-{match_number:07d}",
+        "Game": game_id,
+        "Game Mode": "5v5",
+        "Map": rng.choice(MAPS),
+        "Region": "EU",
+        "Best Of": "2",
+        "Match Round": "1",
+        "Score": f"{score[0]} / {score[1]}",
+        "Result": "1" if won else "0",
+        "Rounds": str(rounds),
+        "Kills": str(kills),
+        "Assists": str(rng.randint(0, 12)),
+        "Deaths": str(deaths),
+        "Headshots": str(headshots),
+        "Headshots %": str(round(100 * headshots / kills) if kills else 0),
+        "K/D Ratio": f"{kills / deaths:.2f}",
+        "K/R Ratio": f"{kills / rounds:.2f}",
+        "MVPs": str(rng.randint(0, 6)),
+        "Double Kills": str(rng.randint(0, 5)),
+        "Triple Kills": str(rng.randint(0, 3)),
+        "Quadro Kills": str(rng.randint(0, 1)),
+        "Penta Kills": str(int(rng.random() < 0.02)),
+        "ADR": f"{rng.uniform(40, 130):.1f}",
+        "Created At": str(finished_at - 2_400_000),
+        "Updated At": str(finished_at),
+        "Match Finished At": finished_at
+    }
+
+def synthetic_match_items(player_id: str, game_id: str, num_matches: int, offset: int, limit: int) -> List[Dict]:
+    """Builds one page of items for the Faceit /games/{game_id}/stats endpoint, newest first"""
+    end = min(offset + limit, num_matches)
+    return [
+        {"stats": synthetic_match_stats(player_id, game_id, num_matches - 1 - index)}
+        for index in range(offset, end)
+    ]
+
+def synthetic_player_info(nickname: str, player_id: str) -> Dict:
+    """Builds a response for the Faceit players?nickname= endpoint"""
+    return {
+        "player_id": player_id,
+        "nickname": nickname,
+        "avatar": "",
+        "steam_id_64": str(76561198000000000 + int(player_id[:8], 16) % 100_000_000),
+        "friends_ids": [synthetic_player_id(f"{nickname}-friend-{i}") for i in range(5)],
+        "verified": False,
+        "games": {"cs2": {"skill_level": 7, "faceit_elo": 1650}}
+    }
+
+STEAM_APP_IDS = [730, 570, 440, 578080, 1172470, 252490, 271590, 359550, 1091500, 292030]
+
+def synthetic_steam_summary(steam_id: str) -> Dict:
+    """Builds one player's entry in a GetPlayerSummaries response"""
+    rng = random.Random(f"summary:{steam_id}")
+    return {
+        "steamid": str(steam_id),
+        "communityvisibilitystate": 1 if rng.random() < 0.1 else 3,
+        "personaname": f"player{str(steam_id)[-5:]}",
+        "timecreated": rng.randint(1_200_000_000, 1_650_000_000)
+    }
+
+def synthetic_owned_games(steam_id: str) -> Dict:
+    """Builds a GetOwnedGames response"""
+    rng = random.Random(f"games:{steam_id}")
+    app_ids = [730] + rng.sample(STEAM_APP_IDS[1:], rng.randint(0, len(STEAM_APP_IDS) - 1))
+    games = [
+        {
+            "appid": app_id,
+            "name": f"app {app_id}",
+            "playtime_forever": rng.randint(0, 200_000),
+            "playtime_2weeks": rng.randint(0, 1_500) if rng.random() < 0.3 else 0
+        }
+        for app_id in app_ids
+    ]
+    return {"response": {"game_count": len(games), "games": games}}
+
+def synthetic_friends(steam_id: str, num_friends: int = 40, population: int = 5_000) -> Dict:
+    """Builds a GetFriendList response drawn from a fixed population of steam ids"""
+    rng = random.Random(f"friends:{steam_id}")
+    base = 76561198000000000
+    friends = {str(base + rng.randrange(population)) for _ in range(rng.randint(0, num_friends))}
+    friends.discard(str(steam_id))
+    return {
+        "friendslist": {
+            "friends": [
+                {"steamid": friend, "relationship": "friend", "friend_since": 1_500_000_000}
+                for friend in sorted(friends)
+            ]
+        }
+    }
+
+def synthetic_risk_corpus(
+    num_players: int,
+    smurf_share: float = 0.1,
+    seed: int = 0
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Builds batch lookup columns for a population with a known share of smurfs
+
+    The same seed always builds the same corpus. Smurfs are new Faceit and
+    Steam accounts that play well above their match count, about a third of
+    them with private Steam profiles.
+
+    Args:
+        num_players (int): Rows to build
+        smurf_share (float): Expected share of smurfs
+        seed (int): Seed of the generator
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], np.ndarray]: Columns named like lookup_players returns
+            them, and whether each player is a smurf
+    """
+    rng = np.random.default_rng(seed)
+    is_smurf = rng.random(num_players) < smurf_share
+
+    def draw(regular: Tuple[float, float], smurf: Tuple[float, float], low: float = 0.0) -> np.ndarray:
+        """Normal draws with (mean, stdev) per group, floored at low"""
+        means = np.where(is_smurf, smurf[0], regular[0])
+        stdevs = np.where(is_smurf, smurf[1], regular[1])
+        return np.maximum(rng.normal(means, stdevs), low)
+
+    steam_is_private = rng.random(num_players) < np.where(is_smurf, 0.35, 0.1)
+    columns = {
+        "is_smurf": (rng.random(num_players) < np.where(is_smurf, 0.05, 0.001)).astype(float),
+        "num_games": np.round(draw((900, 600), (120, 90), low=1)),
+        "all_time_avg_kd_ratio": draw((1.0, 0.2), (1.35, 0.25)),
+        "first_10_avg_kd_ratio": draw((0.9, 0.3), (1.5, 0.35)),
+        "all_time_avg_hsp": draw((45, 8), (53, 8), low=5),
+        "all_time_perc_winrate": draw((50, 5), (60, 7)),
+        "steam_is_private": steam_is_private.astype(float),
+        "steam_num_games": np.round(draw((40, 30), (6, 6))),
+        "steam_num_steam_friends": np.round(draw((60, 40), (12, 10))),
+        "steam_playtime_all_games_stdev": draw((30_000, 20_000), (6_000, 5_000)),
+        "steam_perc_cs2_playtime_account_age": draw((4, 3), (9, 4))
+    }
+    # Private profiles report no Steam features
+    for name in ("steam_num_games", "steam_num_steam_friends", "steam_playtime_all_games_stdev",
+                 "steam_perc_cs2_playtime_account_age"):
+        columns[name][steam_is_private] = np.nan
+    return columns, is_smurf
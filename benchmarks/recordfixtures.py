@@ -0,0 +1,52 @@
+"""Records live Faceit and Steam responses of a lookup for replay by the stand-in server
+
+Needs SERVER_KEY and STEAM_KEY, like the dashboard. API keys are not recorded.
+
+Usage:
+    python benchmarks/recordfixtures.py NICKNAME [NICKNAME ...] [--output benchmarks/recordings.json]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.standinserver import load_recordings, recording_key
+from services.httptransport import HttpTransport
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("nicknames", nargs="+")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "recordings.json"))
+    args = parser.parse_args()
+
+    recordings: Dict[str, Dict] = load_recordings(args.output) if os.path.exists(args.output) else {}
+    send = HttpTransport.get
+
+    def recording_get(self, url, headers=None, timeout=None):
+        response = send(self, url, headers=headers, timeout=timeout)
+        if response.ok:
+            parsed = urlparse(url)
+            query = {name: values[0] for name, values in parse_qs(parsed.query).items()}
+            recordings[recording_key(parsed.path, query)] = response.json()
+        return response
+
+    HttpTransport.get = recording_get
+    from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+    from services.steamplayerstatistics import PlayerSteamDataRetrieval
+
+    for nickname in args.nicknames:
+        faceit_data = PlayerFaceitDataRetrieval(nickname, prefetch=True)
+        steam_id = faceit_data.player_data.get("steam_id_64")
+        if steam_id:
+            PlayerSteamDataRetrieval(steam_id, prefetch=True)
+        print(f"{nickname}: {len(faceit_data.all_cs_game_stats)} matches")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(recordings, file)
+    print(f"{len(recordings)} responses saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
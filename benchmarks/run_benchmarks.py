@@ -0,0 +1,254 @@
+"""Runs the offline benchmark suite and saves its results as JSON
+
+Lookups are replayed against the local stand-in server, so no network or API
+keys are needed. Each run is compared with the previous result file and any
+metric that got slower or bigger than --threshold is reported.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 10 100 1000 10000 50000] [--latency 0.02]
+        [--recordings benchmarks/recordings.json] [--baseline FILE] [--fail-on-regression]
+"""
+import argparse
+from datetime import date, datetime, timezone
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import synthetic_match_items, synthetic_owned_games, synthetic_player_id
+from benchmarks.standinserver import StandInConfig, StandInServer, load_recordings, point_services_at
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 50_000]
+# Metrics where a higher value is a regression
+COMPARED_METRICS = ("seconds", "requests", "peak_memory_bytes")
+
+def _nickname(size: int) -> str:
+    return f"benchmark-{size}"
+
+def _lookup(nickname: str, streaming: bool = False) -> None:
+    """Everything the summary page requests and computes for one player"""
+    from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+    from services.steamplayerstatistics import PlayerSteamDataRetrieval
+
+    faceit_data = PlayerFaceitDataRetrieval(nickname, prefetch=True, streaming=streaming)
+    faceit_data.player_data_store()
+    faceit_data.player_data_ban_store()
+    faceit_data.player_data_stats_all_time_store()
+    faceit_data.player_data_stats_last_20_store()
+    faceit_data.player_data_stats_first_10_store()
+    steam_data = PlayerSteamDataRetrieval(faceit_data.player_data["steam_id_64"], prefetch=True)
+    steam_data.player_steam_summary_data_store()
+    steam_data.player_steam_friends_data_store()
+    steam_data.player_steam_game_data_store()
+
+def _peak_memory(call: Callable[[], None]) -> int:
+    """Returns the peak bytes traced by tracemalloc while call runs"""
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _best_seconds(call: Callable[[], object], repeat: int) -> float:
+    """Seconds per call, looping fast calls so timer resolution doesn't dominate"""
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def benchmark_lookups(sizes: List[int], server: StandInServer, repeat: int) -> List[Dict]:
+    """Measures end-to-end lookups of players with each number of matches"""
+    from services.responsecache import get_response_cache
+
+    results = []
+    for size in sizes:
+        nickname = _nickname(size)
+        for name, streaming in (("lookup", False), ("lookup[streaming]", True)):
+            timings = []
+            for _ in range(repeat):
+                # Measure upstream requests rather than response cache hits
+                get_response_cache().clear()
+                server.request_count = 0
+                timings.append(timeit.timeit(lambda: _lookup(nickname, streaming), number=1))
+            requests = server.request_count
+            get_response_cache().clear()
+            peak_memory_bytes = _peak_memory(lambda: _lookup(nickname, streaming))
+            results.append({
+                "name": name,
+                "size": size,
+                "seconds": round(min(timings), 6),
+                "requests": requests,
+                "peak_memory_bytes": peak_memory_bytes
+            })
+            print(
+                f"  {name:>17} {size:>6} matches: {min(timings):8.3f}s, {requests:>4} requests, "
+                f"{peak_memory_bytes / 1e6:8.1f} MB peak"
+            )
+    return results
+
+def benchmark_functions(sizes: List[int], repeat: int) -> List[Dict]:
+    """Measures the calculations of a lookup on histories of each number of matches"""
+    from utilities.faceitstatisticscalculations import calculate_stats
+    from utilities.matchrecord import MatchRecord
+    from utilities.matchstatscolumns import MatchStatsColumns
+    from utilities.steamstatisticscalculations import get_steam_games_stats
+    from utilities.windowstatistics import MatchStatsWindows
+
+    results = []
+    for size in sizes:
+        player_id = synthetic_player_id(_nickname(size))
+        items = synthetic_match_items(player_id, "cs2", size, 0, size)
+        match_stats = [item["stats"] for item in items]
+        columns = MatchStatsColumns.from_items(items)
+        records = MatchRecord.from_page(match_stats)
+        windows = MatchStatsWindows(columns)
+        functions = {
+            "MatchStatsColumns.from_items": lambda: MatchStatsColumns.from_items(items),
+            "MatchRecord.from_page": lambda: MatchRecord.from_page(match_stats),
+            "MatchStatsColumns.from_records": lambda: MatchStatsColumns.from_records(records),
+            "calculate_stats[List[Dict]]": lambda: calculate_stats(match_stats),
+            "calculate_stats[MatchStatsColumns]": lambda: calculate_stats(columns),
+            "MatchStatsWindows": lambda: MatchStatsWindows(columns),
+            "MatchStatsWindows.last_n": lambda: windows.last_n(20),
+            "MatchStatsWindows.rolling": lambda: windows.rolling(20)
+        }
+        for name, call in functions.items():
+            seconds = _best_seconds(call, repeat)
+            results.append({
+                "name": name,
+                "size": size,
+                "seconds": round(seconds, 9),
+                "matches_per_second": round(size / seconds) if seconds else None
+            })
+            print(f"  {name:>36} {size:>6} matches: {seconds * 1000:10.3f} ms")
+
+    owned_games = synthetic_owned_games("76561198000000000")
+    created_at = date(2015, 1, 1)
+    seconds = _best_seconds(lambda: get_steam_games_stats(owned_games, created_at), repeat)
+    results.append({
+        "name": "get_steam_games_stats",
+        "size": len(owned_games["response"]["games"]),
+        "seconds": round(seconds, 9),
+        "calls_per_second": round(1 / seconds)
+    })
+    print(f"  {'get_steam_games_stats':>36}: {seconds * 1e6:10.3f} us")
+    return results
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def latest_result_file(results_dir: str = RESULTS_DIR) -> Optional[str]:
+    files = sorted(glob.glob(os.path.join(results_dir, "*.json")))
+    return files[-1] if files else None
+
+def compare_results(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Lists the metrics of current that are more than threshold worse than in baseline
+
+    Args:
+        baseline (Dict): An earlier result file
+        current (Dict): This run's results
+        threshold (float): Allowed relative increase, e.g. 0.2 for 20%
+
+    Returns:
+        List[str]: One line per regression
+    """
+    baseline_entries = {
+        (entry["name"], entry["size"]): entry
+        for entry in baseline.get("lookups", []) + baseline.get("functions", [])
+    }
+    regressions = []
+    for entry in current["lookups"] + current["functions"]:
+        baseline_entry = baseline_entries.get((entry["name"], entry["size"]))
+        if baseline_entry is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = baseline_entry.get(metric), entry.get(metric)
+            if not before or after is None:
+                continue
+            if after > before * (1 + threshold):
+                regressions.append(
+                    f"{entry['name']} ({entry['size']}) {metric}: {before} -> {after} "
+                    f"(+{100 * (after / before - 1):.0f}%)"
+                )
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="matches per player")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best is kept")
+    parser.add_argument("--recordings", help="responses saved by benchmarks/recordfixtures.py to replay")
+    parser.add_argument("--skip-lookups", action="store_true", help="only measure the calculations")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--baseline", help="result file to compare with, defaults to the latest one")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative increase reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SERVER_KEY", "benchmark")
+    os.environ.setdefault("STEAM_KEY", "benchmark")
+    baseline_file = args.baseline or latest_result_file(args.output_dir)
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "sizes": args.sizes,
+            "latency_seconds": args.latency,
+            "repeat": args.repeat,
+            "recordings": args.recordings
+        },
+        "lookups": [],
+        "functions": []
+    }
+    if not args.skip_lookups:
+        print("End-to-end lookups")
+        config = StandInConfig(
+            latency_seconds=args.latency,
+            players={_nickname(size): {"cs2": size - size // 4, "csgo": size // 4} for size in args.sizes},
+            recordings=load_recordings(args.recordings) if args.recordings else {}
+        )
+        with StandInServer(config) as server:
+            point_services_at(server.base_url)
+            results["lookups"] = benchmark_lookups(args.sizes, server, args.repeat)
+    print("Calculations")
+    results["functions"] = benchmark_functions(args.sizes, args.repeat)
+    # Kilobytes on Linux
+    results["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_file = os.path.join(
+        args.output_dir, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{results['git_commit'] or 'unknown'}.json"
+    )
+    with open(output_file, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {output_file}")
+
+    if baseline_file:
+        with open(baseline_file, encoding="utf-8") as file:
+            regressions = compare_results(json.load(file), results, args.threshold)
+        print(f"Compared with {baseline_file}: {len(regressions)} regressions")
+        for regression in regressions:
+            print(f"  {regression}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Answers the RESP2 commands the cache backend sends"""
+    disable_nagle_algorithm = True
+
+    def handle(self) -> None:
+        authenticated = self.server.password is None
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            if command[0].upper() == b"AUTH":
+                authenticated = command[-1].decode() == self.server.password
+                self.wfile.write(b"+OK\r\n" if authenticated else b"-WRONGPASS invalid username-password pair\r\n")
+            elif not authenticated:
+                self.wfile.write(b"-NOAUTH Authentication required.\r\n")
+            else:
+                self.wfile.write(self.server.execute(command))
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline commands, e.g. PING typed into a telnet session
+            return line.split()
+        arguments = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            arguments.append(self.rfile.read(length + 2)[:-2])
+        return arguments
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+def _array(values: List[bytes]) -> bytes:
+    return b"*%d\r\n" % len(values) + b"".join(values)
+
+class StandInRespServer(socketserver.ThreadingTCPServer):
+    """A local Redis-compatible server standing in for a shared cache
+
+    Supports the commands the cache backend uses, PING, AUTH, SELECT, GET,
+    SET with PX or EX, PTTL, DEL, SCAN, DBSIZE and FLUSHDB, with keys in
+    memory. Given a password, every connection must AUTH first.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    # Every lookup thread opens its own connection at once, the default backlog of 5 drops some
+    request_queue_size = 128
+
+    def __init__(self, port: int = 0, password: Optional[str] = None) -> None:
+        super().__init__(("127.0.0.1", port), _RespHandler)
+        self.password = password
+        self.lock = threading.Lock()
+        # key -> (value, expires_at or None)
+        self.entries: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.command_count = 0
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        credentials = f":{self.password}@" if self.password is not None else ""
+        return f"redis://{credentials}127.0.0.1:{self.server_address[1]}/0"
+
+    def _live(self, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.entries[key]
+            return None
+        return entry
+
+    def execute(self, command: List[bytes]) -> bytes:
+        name, arguments = command[0].upper(), command[1:]
+        with self.lock:
+            self.command_count += 1
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"SELECT":
+                return b"+OK\r\n"
+            if name == b"FLUSHDB":
+                self.entries.clear()
+                return b"+OK\r\n"
+            if name == b"GET":
+                entry = self._live(arguments[0])
+                return _bulk(entry[0] if entry else None)
+            if name == b"SET":
+                options = [argument.upper() for argument in arguments[2::2]]
+                expires_at = None
+                if b"PX" in options:
+                    expires_at = time.monotonic() + int(arguments[3 + 2 * options.index(b"PX")]) / 1000
+                elif b"EX" in options:
+                    expires_at = time.monotonic() + int(arguments[3 + 2 * options.index(b"EX")])
+                self.entries[arguments[0]] = (arguments[1], expires_at)
+                return b"+OK\r\n"
+            if name == b"PTTL":
+                entry = self._live(arguments[0])
+                if entry is None:
+                    return b":-2\r\n"
+                return b":-1\r\n" if entry[1] is None else b":%d\r\n" % int((entry[1] - time.monotonic()) * 1000)
+            if name == b"DEL":
+                return b":%d\r\n" % sum(self.entries.pop(key, None) is not None for key in arguments)
+            if name == b"DBSIZE":
+                return b":%d\r\n" % len(self.entries)
+            if name == b"SCAN":
+                # Every match in one reply, so the cursor always ends at 0
+                pattern = arguments[arguments.index(b"MATCH") + 1].decode() if b"MATCH" in arguments else "*"
+                keys = [key for key in list(self.entries) if self._live(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+                return _array([_bulk(b"0"), _array([_bulk(key) for key in keys])])
+            return b"-ERR unknown command '%s'\r\n" % name
+
+    def start(self) -> "StandInRespServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StandInRespServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,194 @@
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import threading
+import time
+from typing import Dict
+from urllib.parse import parse_qs, urlencode, urlparse
+
+# Allow access to services and benchmarks folders
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import (
+    synthetic_friends,
+    synthetic_match_items,
+    synthetic_owned_games,
+    synthetic_player_id,
+    synthetic_player_info,
+    synthetic_steam_summary
+)
+
+FACEIT_API_BASE = "https://open.faceit.com"
+STEAM_API_BASES = ["https://api.steampowered.com", "http://api.steampowered.com"]
+
+@dataclass
+class StandInConfig:
+    """Controls the data and latency served by the stand-in API"""
+    latency_seconds: float = 0.05
+    # Matches per game for any nickname not listed in players
+    default_matches: Dict[str, int] = field(default_factory=lambda: {"cs2": 1000, "csgo": 500})
+    # nickname -> {game_id: number of matches}
+    players: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # Answer every nth request with a 429, 0 never does
+    rate_limit_every: int = 0
+    retry_after_seconds: float = 0.1
+    # recording_key -> payload replayed instead of synthetic data, see load_recordings
+    recordings: Dict[str, Dict] = field(default_factory=dict)
+
+def recording_key(path: str, query: Dict[str, str]) -> str:
+    """Identifies a request independently of its host and API key
+
+    Args:
+        path (str): e.g. /data/v4/players
+        query (Dict[str, str]): The request's query parameters
+
+    Returns:
+        str: The path and its sorted query parameters, without Steam's key parameter
+    """
+    parameters = sorted((name, value) for name, value in query.items() if name != "key")
+    return f"{path}?{urlencode(parameters)}" if parameters else path
+
+def load_recordings(path: str) -> Dict[str, Dict]:
+    """Loads responses saved by benchmarks/recordfixtures.py"""
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Serves synthetic responses shaped like the Faceit and Steam APIs"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, avoid Nagle stalls on keep-alive connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        server = self.server
+        time.sleep(server.config.latency_seconds)
+        with server.lock:
+            server.request_count += 1
+            request_count = server.request_count
+        every = server.config.rate_limit_every
+        if every and request_count % every == 0:
+            self._send(
+                429,
+                {"errors": [{"message": "rate limited"}]},
+                {"Retry-After": str(server.config.retry_after_seconds)}
+            )
+            return
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        payload = server.route(url.path, query)
+        if payload is None:
+            self._send(404, {"errors": [{"message": "not found"}]})
+        else:
+            self._send(200, payload)
+
+    def _send(self, status: int, payload: Dict, headers: Dict[str, str] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        # Keep benchmark output clean
+        pass
+
+class StandInServer(ThreadingHTTPServer):
+    """A local HTTP server standing in for the Faceit and Steam APIs, with artificial latency"""
+    daemon_threads = True
+
+    def __init__(self, config: StandInConfig = None, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), _StandInHandler)
+        self.config = config or StandInConfig()
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self._player_ids = {}
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def matches_for(self, player_id: str) -> Dict[str, int]:
+        nickname = self._player_ids.get(player_id)
+        return self.config.players.get(nickname, self.config.default_matches)
+
+    def route(self, path: str, query: Dict[str, str]) -> Dict:
+        """Returns the payload for a path, or None if the path is unknown
+
+        Recorded responses take precedence, anything not recorded is synthesised.
+        """
+        recorded = self.config.recordings.get(recording_key(path, query))
+        if recorded is not None:
+            return recorded
+        if path == "/data/v4/players":
+            nickname = query.get("nickname", "")
+            player_id = synthetic_player_id(nickname)
+            self._player_ids[player_id] = nickname
+            return synthetic_player_info(nickname, player_id)
+
+        player_match = re.fullmatch(r"/data/v4/players/([^/]+)", path)
+        if player_match:
+            player_id = player_match.group(1)
+            return synthetic_player_info(self._player_ids.get(player_id, player_id), player_id)
+
+        bans_match = re.fullmatch(r"/data/v4/players/([^/]+)/bans", path)
+        if bans_match:
+            return {"items": [], "start": 0, "end": 0}
+
+        stats_match = re.fullmatch(r"/data/v4/players/([^/]+)/games/([^/]+)/stats", path)
+        if stats_match:
+            player_id, game_id = stats_match.groups()
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", 20))
+            num_matches = self.matches_for(player_id).get(game_id, 0)
+            return {
+                "items": synthetic_match_items(player_id, game_id, num_matches, offset, limit),
+                "start": offset,
+                "end": offset + limit
+            }
+
+        if path == "/ISteamUser/GetPlayerSummaries/v2/":
+            steam_ids = [steam_id for steam_id in query.get("steamids", "").split(",") if steam_id]
+            return {"response": {"players": [synthetic_steam_summary(steam_id) for steam_id in steam_ids]}}
+        if path == "/IPlayerService/GetOwnedGames/v1/":
+            return synthetic_owned_games(query.get("steamid", ""))
+        if path == "/ISteamUser/GetFriendList/v1/":
+            return synthetic_friends(query.get("steamid", ""))
+        return None
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+def point_services_at(base_url: str) -> None:
+    """Rewrites the service endpoint templates to target a stand-in server
+
+    Args:
+        base_url (str): e.g. http://127.0.0.1:8000
+    """
+    from services.faceitplayerstatistics import FaceitEndpoints
+    from services.steamplayerstatistics import SteamEndpoints
+    for name in ("player_info", "player_info_by_id", "player_bans", "player_statistics"):
+        template = getattr(FaceitEndpoints, name).strip()
+        setattr(FaceitEndpoints, name, template.replace(FACEIT_API_BASE, base_url))
+    for name in ("player_summary", "player_games", "player_friends"):
+        template = getattr(SteamEndpoints, name).strip()
+        for steam_api_base in STEAM_API_BASES:
+            template = template.replace(steam_api_base, base_url)
+        setattr(SteamEndpoints, name, template)
@@ -0,0 +1,76 @@
+import re
+from typing import Dict, Optional
+
+import requests
+
+# API keys are passed in the query string of Steam endpoints
+_KEY_PATTERN = re.compile(r"([?&]key=)[^&]+")
+
+def redact_url(url: str) -> str:
+    """Hides the API key of a URL, so it can be logged or shown"""
+    return _KEY_PATTERN.sub(r"\1***", url)
+
+class ApiRequestError(Exception):
+    """A Faceit or Steam request that failed, after any retries
+
+    Raised by the services instead of reporting the error themselves, so the
+    caller decides how to show it, e.g. st.error in the app or an error column
+    in a batch lookup.
+    """
+    # requests exception -> the kind of failure and how it is described
+    _KINDS = (
+        (requests.exceptions.HTTPError, "http", "Http Error"),
+        (requests.exceptions.ConnectionError, "connection", "Error Connecting"),
+        (requests.exceptions.Timeout, "timeout", "Timeout Error"),
+        (requests.exceptions.RequestException, "request", "An Error Occurred")
+    )
+
+    def __init__(
+        self,
+        api: str,
+        kind: str,
+        message: str,
+        url: Optional[str] = None,
+        status_code: Optional[int] = None
+    ) -> None:
+        """Initialises the error
+
+        Args:
+            api (str): "faceit" or "steam"
+            kind (str): "http", "connection", "timeout" or "request"
+            message (str): A description of the failure, shown to users
+            url (Optional[str]): The endpoint requested, API keys are redacted
+            status_code (Optional[int]): The response's status code, for http errors
+        """
+        super().__init__(message)
+        self.api = api
+        self.kind = kind
+        self.url = redact_url(url) if url else url
+        self.status_code = status_code
+
+    @classmethod
+    def from_request_exception(cls, api: str, error: requests.exceptions.RequestException) -> "ApiRequestError":
+        """Wraps an exception raised by requests"""
+        kind, description = next(
+            (kind, description) for error_type, kind, description in cls._KINDS
+            if isinstance(error, error_type)
+        )
+        response = error.response
+        url = error.request.url if error.request is not None else None
+        return cls(
+            api,
+            kind,
+            redact_url(f"{description}: {error}"),
+            url=url,
+            status_code=response.status_code if response is not None else None
+        )
+
+    def to_dict(self) -> Dict:
+        """The error as plain values, e.g. for a JSON result"""
+        return {
+            "api": self.api,
+            "kind": self.kind,
+            "message": str(self),
+            "url": self.url,
+            "status_code": self.status_code
+        }
@@ -0,0 +1,238 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields
+from typing import Dict, List, Optional, Tuple, get_type_hints
+
+import numpy as np
+import pandas as pd
+
+# Allow access to services folder
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.apierrors import ApiRequestError
+from services.faceitplayerstatistics import (
+    PlayerBanInformationData,
+    PlayerFaceitDataRetrieval,
+    PlayerInformationData,
+    PlayerStatisticsAllTimeData,
+    PlayerStatisticsFirst10Data,
+    PlayerStatisticsLast20Data
+)
+from services.matchhistorydataset import MatchHistoryDataset
+from services.matchhistorystore import MatchHistoryStore
+from services.requestscheduler import Priority
+from services.steamplayerstatistics import (
+    PlayerSteamDataRetrieval,
+    PlayerSteamFriendsData,
+    PlayerSteamGameData,
+    PlayerSteamSummaryData
+)
+from utilities.percentileindex import PopulationPercentileIndex, get_population_index
+from utilities.riskscoring import RiskScoringEngine
+
+DEFAULT_MAX_WORKERS = 4
+
+def _prefixed(prefix: str, store: object, exclude: tuple = ("player_id", "steam_id")) -> Dict:
+    """Flattens a dataclass store into columns named {prefix}_{field}"""
+    return {
+        f"{prefix}_{key}": value for key, value in asdict(store).items() if key not in exclude
+    }
+
+def _error_fields(error: Exception) -> Dict:
+    """Describes a failed lookup in the error columns of its row"""
+    return {
+        "error": f"{type(error).__name__}: {error}",
+        "error_type": type(error).__name__,
+        "error_status_code": error.status_code if isinstance(error, ApiRequestError) else None
+    }
+
+def _faceit_summary(faceit_data: PlayerFaceitDataRetrieval) -> Dict:
+    """Builds the Faceit part of one player's row"""
+    player_store = faceit_data.player_data_store()
+    ban_store = faceit_data.player_data_ban_store()
+    return {
+        **asdict(player_store),
+        "is_banned": ban_store.is_banned,
+        "is_smurf": ban_store.is_smurf,
+        "num_bans": ban_store.num_bans,
+        **_prefixed("all_time", faceit_data.player_data_stats_all_time_store()),
+        **_prefixed("last_20", faceit_data.player_data_stats_last_20_store()),
+        **_prefixed("first_10", faceit_data.player_data_stats_first_10_store())
+    }
+
+def _steam_summary(
+    steam_id: int,
+    player_summary_data: Optional[Dict],
+    priority: Priority
+) -> Tuple[Dict, PlayerSteamDataRetrieval]:
+    """Builds the Steam part of one player's row, but for the games columns added for the whole batch"""
+    steam_data = PlayerSteamDataRetrieval(
+        steam_id,
+        player_summary_data=player_summary_data,
+        prefetch=True,
+        priority=priority
+    )
+    return {
+        **_prefixed("steam", steam_data.player_summary_instance),
+        **_prefixed("steam", steam_data.player_steam_friends_data_store())
+    }, steam_data
+
+def _prefixed_types(prefix: str, store_type: type, exclude: tuple = ("player_id", "steam_id")) -> Dict[str, type]:
+    """The columns _prefixed makes out of a dataclass store, and their annotated types"""
+    return {
+        f"{prefix}_{field.name}": get_type_hints(store_type)[field.name]
+        for field in fields(store_type) if field.name not in exclude
+    }
+
+def lookup_column_types(include_steam: bool = True) -> Dict[str, type]:
+    """The columns of a lookup_players result in order, and the type annotated on each
+
+    Args:
+        include_steam (bool): Whether the Steam columns are included
+
+    Returns:
+        Dict[str, type]: column -> type, e.g. for a fixed schema when writing chunks to Parquet
+    """
+    ban_types = get_type_hints(PlayerBanInformationData)
+    column_types = {
+        "faceit_nickname": str,
+        **get_type_hints(PlayerInformationData),
+        **{name: ban_types[name] for name in ("is_banned", "is_smurf", "num_bans")},
+        **_prefixed_types("all_time", PlayerStatisticsAllTimeData),
+        **_prefixed_types("last_20", PlayerStatisticsLast20Data),
+        **_prefixed_types("first_10", PlayerStatisticsFirst10Data),
+        "error": Optional[str],
+        "error_type": Optional[str],
+        "error_status_code": Optional[int]
+    }
+    if include_steam:
+        for store_type in (PlayerSteamSummaryData, PlayerSteamFriendsData, PlayerSteamGameData):
+            column_types.update(_prefixed_types("steam", store_type))
+    return column_types
+
+def lookup_players(
+    faceit_nicknames: List[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    include_steam: bool = True,
+    match_store: Optional[MatchHistoryStore] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    streaming: bool = False,
+    match_dataset: Optional[MatchHistoryDataset] = None
+) -> pd.DataFrame:
+    """Looks up a batch of players, e.g. a match lobby, and summarises each in one row
+
+    Faceit lookups fan out across a bounded pool of workers. Steam profiles for
+    the whole batch are then fetched with a single GetPlayerSummaries call per
+    100 players before the per-player Steam calls fan out the same way, and
+    every owned games library is wrangled in one batched pass.
+
+    Args:
+        faceit_nicknames (List[str]): The nicknames of the players on faceit
+        max_workers (int): The maximum number of players looked up at once
+        include_steam (bool): Whether to add each player's Steam summaries
+        match_store (Optional[MatchHistoryStore]): Passed on to each Faceit lookup
+        priority (Priority): The request scheduler lane, e.g. BACKGROUND for bulk refreshes
+        streaming (bool): Whether each player's stats are folded in page by page rather than
+            from their full history, keeping memory flat when screening many players
+        match_dataset (Optional[MatchHistoryDataset]): Passed on to each Faceit lookup
+
+    Returns:
+        pd.DataFrame: One row per nickname, in the order given. Players whose lookup
+            failed have the reason in the error columns
+    """
+    def lookup_faceit(faceit_nickname: str) -> Dict:
+        try:
+            faceit_data = PlayerFaceitDataRetrieval(
+                faceit_nickname,
+                match_store=match_store,
+                prefetch=True,
+                priority=priority,
+                streaming=streaming,
+                match_dataset=match_dataset
+            )
+            return {
+                "faceit_nickname": faceit_nickname,
+                **_faceit_summary(faceit_data),
+                "error": None,
+                "error_type": None,
+                "error_status_code": None
+            }
+        except Exception as error:
+            return {"faceit_nickname": faceit_nickname, **_error_fields(error)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(lookup_faceit, faceit_nicknames))
+
+        steam_ids = [row["steam_id"] for row in rows if row.get("steam_id")]
+        if include_steam and steam_ids:
+            player_summaries = PlayerSteamDataRetrieval.player_summaries_batch(steam_ids, priority=priority)
+
+            def lookup_steam(row: Dict) -> Tuple[Dict, Optional[PlayerSteamDataRetrieval]]:
+                if not row.get("steam_id"):
+                    return row, None
+                try:
+                    steam_columns, steam_data = _steam_summary(
+                        row["steam_id"],
+                        player_summaries.get(str(row["steam_id"])),
+                        priority
+                    )
+                    return {**row, **steam_columns}, steam_data
+                except Exception as error:
+                    return {**row, **_error_fields(error)}, None
+
+            looked_up = list(executor.map(lookup_steam, rows))
+            game_stores = iter(PlayerSteamDataRetrieval.player_steam_game_data_stores(
+                [steam_data for _, steam_data in looked_up if steam_data is not None]
+            ))
+            rows = [
+                {**row, **_prefixed("steam", next(game_stores))} if steam_data is not None else row
+                for row, steam_data in looked_up
+            ]
+
+    return pd.DataFrame.from_records(rows)
+
+def add_risk_scores(players: pd.DataFrame, engine: Optional[RiskScoringEngine] = None) -> pd.DataFrame:
+    """Adds a risk_score column and each feature's contribution to a lookup_players result
+
+    Args:
+        players (pd.DataFrame): The result of lookup_players
+        engine (Optional[RiskScoringEngine]): Defaults to the default features and weights
+
+    Returns:
+        pd.DataFrame: A copy of players with the risk columns added. Players whose
+            Faceit lookup failed are left unscored
+    """
+    engine = engine or RiskScoringEngine()
+    risk_columns = engine.score_frame_columns(players)
+    failed = players["player_id"].isna().to_numpy() if "player_id" in players else True
+    for values in risk_columns.values():
+        values[failed] = np.nan
+    return players.assign(**risk_columns)
+
+def add_percentiles(
+    players: pd.DataFrame,
+    index: Optional[PopulationPercentileIndex] = None,
+    update: bool = True
+) -> pd.DataFrame:
+    """Adds each player's percentile within their skill level for every metric of the index
+
+    Args:
+        players (pd.DataFrame): The result of lookup_players
+        index (Optional[PopulationPercentileIndex]): Defaults to the process-wide population
+        update (bool): Whether the players join the population before being ranked
+
+    Returns:
+        pd.DataFrame: A copy of players with a {metric}_percentile column per metric.
+            Players whose Faceit lookup failed are left unranked
+    """
+    index = index or get_population_index()
+    succeeded = players["player_id"].notna().to_numpy() if "player_id" in players else np.zeros(len(players), dtype=bool)
+    # Failed rows leave skill_level NaN, which would have made the column float
+    ranked = players[succeeded].astype({"skill_level": int}) if succeeded.any() else None
+    if update and ranked is not None:
+        index.update_columns(ranked)
+    percentile_columns = {f"{metric}_percentile": np.full(len(players), np.nan) for metric in index.metrics}
+    if ranked is not None:
+        for name, values in index.percentile_frame_columns(ranked).items():
+            percentile_columns[name][succeeded] = values
+    return players.assign(**percentile_columns)
@@ -0,0 +1,384 @@
+from dataclasses import fields, is_dataclass
+import datetime
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+import zlib
+
+DEFAULT_CACHE_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "response_cache.sqlite3"
+)
+DEFAULT_RESP_PORT = 6379
+DEFAULT_KEY_PREFIX = "faceit-tracker:"
+# Encoded values shorter than this aren't worth compressing
+COMPRESS_MIN_BYTES = 512
+
+_RAW, _COMPRESSED = b"\x00", b"\x01"
+# "module:qualname" -> the only dataclasses decode_value rebuilds, added with cacheable_dataclass
+_CACHEABLE_DATACLASSES: Dict[str, type] = {}
+
+def _dataclass_tag(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+def cacheable_dataclass(cls: type) -> type:
+    """Registers a dataclass as one decode_value may rebuild, e.g. a stats store kept in a snapshot
+
+    Values in a shared backend can be written by anyone with access to it,
+    so only registered dataclasses are ever constructed from them.
+    """
+    if not is_dataclass(cls):
+        raise TypeError(f"{cls.__name__} is not a dataclass")
+    _CACHEABLE_DATACLASSES[_dataclass_tag(cls)] = cls
+    return cls
+
+def _to_json(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        tag = _dataclass_tag(type(value))
+        if _CACHEABLE_DATACLASSES.get(tag) is not type(value):
+            raise TypeError(f"{tag} can't be cached, it isn't registered with cacheable_dataclass")
+        return {
+            "__dataclass__": tag,
+            "fields": {field.name: getattr(value, field.name) for field in fields(value) if field.init}
+        }
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if hasattr(value, "item"):
+        # numpy scalars, e.g. from the stats calculations
+        return value.item()
+    raise TypeError(f"{type(value).__name__} can't be cached")
+
+def _from_json(value: Dict) -> Any:
+    if "__dataclass__" in value:
+        cls = _CACHEABLE_DATACLASSES.get(value["__dataclass__"])
+        if cls is None or not is_dataclass(cls):
+            raise ValueError(f"Refusing to rebuild {value['__dataclass__']!r}, it isn't a registered dataclass")
+        field_values = value.get("fields")
+        expected = {field.name for field in fields(cls) if field.init}
+        if not isinstance(field_values, dict) or set(field_values) != expected:
+            raise ValueError(f"Refusing to rebuild {value['__dataclass__']!r} from fields it doesn't have")
+        return cls(**field_values)
+    if "__datetime__" in value:
+        return datetime.datetime.fromisoformat(value["__datetime__"])
+    if "__date__" in value:
+        return datetime.date.fromisoformat(value["__date__"])
+    return value
+
+def encode_value(value: Any) -> bytes:
+    """Serialises a cached value, e.g. a decoded response or a stats dataclass, into compact bytes
+
+    Values are compact JSON, so any replica can read them whatever its
+    Python version, zlib compressed when large. Dataclasses, dates and
+    datetimes are tagged so decode_value rebuilds them, dataclasses only
+    when registered with cacheable_dataclass.
+    """
+    encoded = json.dumps(value, default=_to_json, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(encoded) < COMPRESS_MIN_BYTES:
+        return _RAW + encoded
+    # Level 1 compresses JSON about as well as the default at a fraction of the time
+    return _COMPRESSED + zlib.compress(encoded, 1)
+
+def decode_value(data: bytes) -> Tuple[Any, int]:
+    """Rebuilds a value written by encode_value
+
+    Returns:
+        Tuple[Any, int]: The value and the length of its JSON, comparable to a response body's size
+    """
+    encoded = zlib.decompress(data[1:]) if data[:1] == _COMPRESSED else data[1:]
+    return json.loads(encoded, object_hook=_from_json), len(encoded)
+
+class CacheBackend:
+    """A store of encoded values shared beyond the process, behind the in-memory response cache
+
+    Backends only hold bytes with an expiry. Errors reading or writing are the
+    caller's to handle, the response cache treats them as misses.
+    """
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Returns the value stored under key and its remaining seconds to live, None if absent or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, data: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class MemoryBackend(CacheBackend):
+    """Holds values in this process, e.g. to exercise the backend code path in one process"""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # key -> (data, expires_at)
+        self._entries: Dict[str, Tuple[bytes, float]] = {}
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        data, expires_at = entry
+        remaining = expires_at - time.monotonic()
+        return (data, remaining) if remaining > 0 else None
+
+    def set(self, key: str, data: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (data, time.monotonic() + ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteBackend(CacheBackend):
+    """Values in a SQLite file, shared by every process on the machine
+
+    WAL mode lets replicas read while one writes. Expired rows are skipped on
+    read and purged every purge_every writes.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_DB_PATH, purge_every: int = 1000) -> None:
+        """Opens the database, creating it if it does not exist
+
+        Args:
+            path (str): Location of the SQLite database
+            purge_every (int): Writes between deletions of expired rows
+        """
+        self.path = path
+        self.purge_every = purge_every
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Replicas write at the same time, so wait for their locks rather than failing
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._connection:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                # Durable enough for a cache, and a commit no longer waits on fsync
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        # Wall clock time, which unlike time.monotonic() is the same in every process
+        remaining = row[1] - time.time()
+        return (row[0], remaining) if remaining > 0 else None
+
+    def set(self, key: str, data: bytes, ttl: float) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)", (key, data, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache_entries")
+
+    def close(self) -> None:
+        self._connection.close()
+
+class RespError(Exception):
+    """An error reply from a Redis-compatible server"""
+
+class _RespConnection:
+    """One socket speaking RESP2, the Redis wire protocol"""
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self.socket = socket.create_connection((host, port), timeout=timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.socket.makefile("rb")
+
+    def send(self, *commands: Tuple) -> None:
+        """Writes several commands in one packet, their replies are read in the same order"""
+        buffer = bytearray()
+        for command in commands:
+            buffer += b"*%d\r\n" % len(command)
+            for argument in command:
+                if not isinstance(argument, bytes):
+                    argument = str(argument).encode()
+                buffer += b"$%d\r\n%s\r\n" % (len(argument), argument)
+        self.socket.sendall(buffer)
+
+    def read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RespError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise RespError(f"Unexpected reply {line!r}")
+
+    def close(self) -> None:
+        self.reader.close()
+        self.socket.close()
+
+class RespBackend(CacheBackend):
+    """Values in a Redis-compatible server, shared by replicas on any machine
+
+    Speaks the wire protocol directly over one connection per thread, so
+    needs no client library. A failed connection is dropped and reopened
+    on the next call.
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_RESP_PORT,
+        db: int = 0,
+        timeout: float = 1.0,
+        key_prefix: str = DEFAULT_KEY_PREFIX,
+        password: Optional[str] = None,
+        username: Optional[str] = None
+    ) -> None:
+        """Initialises the backend, connections are opened on first use
+
+        Args:
+            host (str): The server's host name
+            port (int): The server's port
+            db (int): The logical database selected on connecting
+            timeout (float): Seconds before a command times out, kept short as the API is the fallback
+            key_prefix (str): Namespaces this app's keys, clear only deletes keys with it
+            password (Optional[str]): Sent with AUTH on connecting, for servers that require it
+            username (Optional[str]): The ACL user the password belongs to, the default user if None
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.password = password
+        self.username = username
+        self._local = threading.local()
+
+    def _connect(self) -> _RespConnection:
+        connection = _RespConnection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password is not None:
+            setup.append(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        try:
+            if setup:
+                connection.send(*setup)
+                for _ in setup:
+                    connection.read_reply()
+        except BaseException:
+            # e.g. a wrong password, the connection is never used
+            connection.close()
+            raise
+        return connection
+
+    def _execute(self, *commands: Tuple) -> List[Any]:
+        """Sends commands pipelined and returns their replies"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        try:
+            connection.send(*commands)
+            return [connection.read_reply() for _ in commands]
+        except BaseException:
+            # Any failure can leave replies unread, so the next call reconnects rather than reading them
+            self._local.connection = None
+            connection.close()
+            raise
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        key = self.key_prefix + key
+        data, ttl_ms = self._execute(("GET", key), ("PTTL", key))
+        if data is None or ttl_ms == -2:
+            return None
+        # -1 is a key without an expiry, which this backend never writes
+        return data, (ttl_ms / 1000 if ttl_ms >= 0 else float("inf"))
+
+    def set(self, key: str, data: bytes, ttl: float) -> None:
+        self._execute(("SET", self.key_prefix + key, data, "PX", max(int(ttl * 1000), 1)))
+
+    def delete(self, key: str) -> None:
+        self._execute(("DEL", self.key_prefix + key))
+
+    def clear(self) -> None:
+        cursor = "0"
+        while True:
+            cursor, keys = self._execute(("SCAN", cursor, "MATCH", self.key_prefix + "*", "COUNT", 1000))[0]
+            if keys:
+                self._execute(("DEL", *keys))
+            if cursor in (b"0", "0"):
+                return
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+def backend_from_url(url: Optional[str]) -> Optional[CacheBackend]:
+    """Builds the backend a URL names, e.g. from the CACHE_URL setting
+
+    Args:
+        url (Optional[str]): memory://, sqlite:///absolute/path.sqlite3, sqlite:// for the
+            default path, or redis://[[user]:password@]host:port/db. None or empty for no shared backend
+
+    Returns:
+        Optional[CacheBackend]: The backend, None for no URL
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBackend()
+    if parsed.scheme == "sqlite":
+        return SQLiteBackend(parsed.path or DEFAULT_CACHE_DB_PATH)
+    if parsed.scheme == "redis":
+        return RespBackend(
+            parsed.hostname or "127.0.0.1",
+            parsed.port or DEFAULT_RESP_PORT,
+            db=int(parsed.path.strip("/") or 0),
+            password=unquote(parsed.password) if parsed.password is not None else None,
+            username=unquote(parsed.username) if parsed.username else None
+        )
+    raise ValueError(f"Unknown cache backend {parsed.scheme!r} in {url!r}")
@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Allow access to utilities folder
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities.instrumentation import metrics
+
+class FaceitMatchFetchEngine:
+    """Fetches a player's paginated Faceit data concurrently
+
+    Pages are requested speculatively in windows of offsets. Each window is
+    fetched in parallel and the walk stops at the first short page, so a
+    history of n pages costs roughly n / window_size round trips in sequence.
+    """
+    def __init__(
+        self,
+        request_data: Callable[[str], Dict],
+        max_concurrency: int = 8,
+        window_size: int = 4,
+        page_limit: int = 100
+    ) -> None:
+        """Initialises the engine and its thread pool
+
+        Args:
+            request_data (Callable[[str], Dict]): Sends a request to an endpoint and returns its json
+            max_concurrency (int): The maximum number of page requests in flight at once
+            window_size (int): The number of pages requested speculatively per window
+            page_limit (int): The number of matches requested per page
+        """
+        if max_concurrency < 1 or window_size < 1:
+            raise ValueError("max_concurrency and window_size must be at least 1")
+        self.request_data = request_data
+        self.max_concurrency = max_concurrency
+        self.window_size = window_size
+        self.page_limit = page_limit
+
+    def gather(self, *calls: Callable[[], Any]) -> List[Any]:
+        """Runs independent calls at the same time and returns their results in order
+
+        Args:
+            *calls (Callable[[], Any]): Zero-argument callables, e.g. one per endpoint chain
+
+        Returns:
+            List[Any]: The result of each call, in the order given
+        """
+        # A separate pool from the page pool, as each call may itself fetch pages
+        with ThreadPoolExecutor(max_workers=max(len(calls), 1)) as executor:
+            futures = [executor.submit(call) for call in calls]
+            return [future.result() for future in futures]
+
+    def fetch_pages(
+        self,
+        endpoint_template: str,
+        is_known: Optional[Callable[[Dict], bool]] = None,
+        window_size: Optional[int] = None,
+        start_offset: int = 0,
+        request_data: Optional[Callable[[str], Dict]] = None,
+        **endpoint_kwargs: Any
+    ) -> List[Dict]:
+        """Fetches every item of a paginated endpoint
+
+        Takes the same arguments as iter_pages.
+
+        Returns:
+            List[Dict]: The items of every page, in the order the API returns them
+        """
+        all_items = []
+        for items in self.iter_pages(
+            endpoint_template,
+            is_known=is_known,
+            window_size=window_size,
+            start_offset=start_offset,
+            request_data=request_data,
+            **endpoint_kwargs
+        ):
+            all_items.extend(items)
+        return all_items
+
+    def iter_pages(
+        self,
+        endpoint_template: str,
+        is_known: Optional[Callable[[Dict], bool]] = None,
+        window_size: Optional[int] = None,
+        start_offset: int = 0,
+        request_data: Optional[Callable[[str], Dict]] = None,
+        **endpoint_kwargs: Any
+    ) -> Iterator[List[Dict]]:
+        """Yields the items of a paginated endpoint one page at a time
+
+        At most one window of pages is held at once, so a consumer that folds
+        each page into an aggregate never holds the whole history.
+
+        Args:
+            endpoint_template (str): Endpoint with {offset} and {limit} placeholders
+            is_known (Optional[Callable[[Dict], bool]]): Marks items that are already held
+                elsewhere. The walk stops at the first known item, which is dropped
+            window_size (Optional[int]): Overrides the engine's window size for this walk
+            start_offset (int): The offset of the first page to request
+            request_data (Optional[Callable[[str], Dict]]): Overrides the engine's request function
+            **endpoint_kwargs (Any): Any other placeholders in the endpoint
+
+        Yields:
+            List[Dict]: The items of each page, in the order the API returns them
+        """
+        window_size = window_size or self.window_size
+        request_data = request_data or self.request_data
+        offset = start_offset
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, window_size)) as executor:
+            while True:
+                window_offsets = [
+                    offset + page * self.page_limit for page in range(window_size)
+                ]
+                futures = [
+                    executor.submit(
+                        request_data,
+                        endpoint_template.format(
+                            offset=window_offset,
+                            limit=self.page_limit,
+                            **endpoint_kwargs
+                        )
+                    )
+                    for window_offset in window_offsets
+                ]
+                try:
+                    # Walk the window in order so the items keep the API's ordering
+                    for future in futures:
+                        items = future.result().get("items", [])
+                        metrics.count("pages_fetched")
+                        if is_known is not None:
+                            new_items = []
+                            for item in items:
+                                if is_known(item):
+                                    break
+                                new_items.append(item)
+                            reached_known = len(new_items) < len(items)
+                            items = new_items
+                        else:
+                            reached_known = False
+                        if items:
+                            yield items
+                        if reached_known or len(items) < self.page_limit:
+                            return
+                finally:
+                    # Pages after a short page are empty, and a consumer may stop early,
+                    # either way drop any still queued
+                    for pending in futures:
+                        pending.cancel()
+                offset += window_size * self.page_limit
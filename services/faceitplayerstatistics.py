@@ -1,31 +1,53 @@
 from dataclasses import dataclass
+import datetime
 import os
-from typing import Dict
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-from dotenv import load_dotenv
-from glom import glom
 import requests
-import streamlit as st
 
 # Allow access to utilities folder
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utilities.faceitstatisticscalculations import calculate_stats
+from services.apierrors import ApiRequestError
+from services.cachebackends import cacheable_dataclass
+from services.faceitfetchengine import FaceitMatchFetchEngine
+from services.matchhistorydataset import MatchHistoryDataset
+from services.matchhistorystore import MatchHistoryStore
+from services.requestscheduler import Priority, RequestCounter, get_request_scheduler
+from services.responsecache import DEFAULT_CACHE_POLICY, CachePolicy, get_response_cache
+from utilities.config import get_settings
+from utilities.instrumentation import instrumented, metrics, stage_timer
+from utilities.lazyloading import lazy_callable, lazy_property
+from utilities.pagedecoding import decode_items_before
+
+# numpy and the modules built on it are imported on first use, so importing
+# this module stays cheap, e.g. for app boot and batch worker spawn
+if TYPE_CHECKING:
+    import numpy as np
+    from utilities.aggregatestate import MatchAggregateState
+    from utilities.matchrecord import MatchRecord
+    from utilities.matchstatscolumns import MatchStatsColumns
+    from utilities.streamingstatistics import StreamingMatchStats
+    from utilities.windowstatistics import MatchStatsWindows
+glom = lazy_callable("glom", "glom")
 
 @dataclass
 class FaceitEndpoints:
     """API endpoints that retrieve relevant player information"""
     player_info: str = "https://open.faceit.com/data/v4/players?nickname={nickname}"
+    player_info_by_id: str = "https://open.faceit.com/data/v4/players/{player_id}"
     player_bans: str = "https://open.faceit.com/data/v4/players/{player_id}/bans"
     player_statistics: str = """
         https://open.faceit.com/data/v4/players/{player_id}/games/{game_id}/stats?offset={offset}&limit={limit}
     """
 
+@cacheable_dataclass
 @dataclass
 class PlayerInformationData:
     """A store for information about the player"""
     player_id: str
-    steam_id: int
+    # The API returns the 64 bit steam id as a string
+    steam_id: str
     nickname: str
     avatar: str
     num_friends: int
@@ -34,6 +56,7 @@ class PlayerInformationData:
     elo: int
     num_games: int
 
+@cacheable_dataclass
 @dataclass
 class PlayerBanInformationData:
     """A store for informaiton about the player's bans"""
@@ -43,6 +66,7 @@ class PlayerBanInformationData:
     num_bans: int
     ban_response: dict
 
+@cacheable_dataclass
 @dataclass
 class PlayerStatisticsAllTimeData:
     """A store for the player's performance in Faceit across all their games"""
@@ -58,6 +82,7 @@ class PlayerStatisticsAllTimeData:
     perc_winrate: float
     avg_score_diff: float
 
+@cacheable_dataclass
 @dataclass
 class PlayerStatisticsLast20Data:
     """A store for the player's performance in Faceit in their last 20 games"""
@@ -73,6 +98,7 @@ class PlayerStatisticsLast20Data:
     perc_winrate: float
     avg_score_diff: float
 
+@cacheable_dataclass
 @dataclass
 class PlayerStatisticsFirst10Data:
     """A store for the player's performance in Faceit in their first 10 games"""
@@ -88,33 +114,220 @@ class PlayerStatisticsFirst10Data:
     perc_winrate: float
     avg_score_diff: float
 
+@cacheable_dataclass
+@dataclass
+class PlayerStatisticsWindowData:
+    """A store for the player's performance in Faceit over an arbitrary window of games"""
+    player_id: str
+    num_games: int
+    avg_kills: float
+    avg_kr_ratio: float
+    avg_kd_ratio: float
+    avg_hsp: float
+    avg_2_kills: float
+    avg_3_kills: float
+    avg_4_kills: float
+    avg_5_kills: float
+    perc_winrate: float
+    avg_score_diff: float
+
 class PlayerFaceitDataRetrieval:
-    """Handles the retrieval of a player's Faceit data"""
+    """Handles the retrieval of a player's Faceit data
+
+    Each dataset is requested on first access and kept for later calls, so
+    reading the player's profile alone costs a single request.
+    """
     def __init__(
         self,
-        faceit_nickname: str
+        faceit_nickname: str,
+        max_concurrency: int = 8,
+        window_size: int = 4,
+        match_store: Optional[MatchHistoryStore] = None,
+        match_dataset: Optional[MatchHistoryDataset] = None,
+        prefetch: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        streaming: bool = False,
+        cache_policy: CachePolicy = DEFAULT_CACHE_POLICY,
+        request_counter: Optional[RequestCounter] = None
     ) -> None:
         """Initialises the class and its attributes
 
         Args:
             faceit_nickname (str): The nickname of the player on faceit
+            max_concurrency (int): The maximum number of match pages requested at once
+            window_size (int): The number of match pages requested speculatively per window
+            match_store (Optional[MatchHistoryStore]): A store of previously fetched matches,
+                when given only matches newer than the stored ones are requested, and without a
+                dataset the summary stats are folded forward from a saved state
+            match_dataset (Optional[MatchHistoryDataset]): A Parquet dataset each fetched
+                history is written to, for per map, month and game breakdowns
+            prefetch (bool): Whether to load every dataset now rather than on first access
+            priority (Priority): The request scheduler lane, background refreshes yield
+                to interactive lookups
+            streaming (bool): Whether the all time, last 20 and first 10 stats are folded in
+                page by page rather than read from the full history, e.g. when screening
+                many players in one process. A match store's history is read back a page
+                at a time too. Other windows still load the full history
+            cache_policy (CachePolicy): How responses are read from and written to the
+                response cache, e.g. refreshed by the prewarm worker
+            request_counter (Optional[RequestCounter]): Counts the requests this lookup sends,
+                e.g. to bill a prewarm refresh to its budget
         """
         self.faceit_nickname = faceit_nickname
+        self.match_store = match_store
+        self.match_dataset = match_dataset
+        self.priority = priority
+        self.streaming = streaming
+        self.cache_policy = cache_policy
+        self.request_counter = request_counter
         self.headers = self._initialise_api_header()
-        self.player_data = (self
-            ._request_data(FaceitEndpoints.player_info
-                .format(nickname=self.faceit_nickname)
-            )
+        self.fetch_engine = FaceitMatchFetchEngine(
+            self._request_data,
+            max_concurrency=max_concurrency,
+            window_size=window_size
         )
-        self.player_id = self.player_data.get("player_id")
-        self.player_ban_data = (self
-            ._request_data(FaceitEndpoints.player_bans
-                .format(player_id=self.player_id)
+        if prefetch:
+            self.prefetch()
+
+    def prefetch(self) -> None:
+        """Loads every dataset up front, e.g. for the dashboard which renders all of them"""
+        # Resolve player_id first so the calls below don't each request the profile
+        self.player_id
+        if self.streaming or self._uses_aggregate_state:
+            self.fetch_engine.gather(
+                lambda: self.player_ban_data,
+                lambda: self._summary_stats
             )
+            return
+        # Bans and both match histories only depend on player_id, so fetch them together
+        self.fetch_engine.gather(
+            lambda: self.player_ban_data,
+            lambda: self.player_cs2_game_stats,
+            lambda: self.player_csgo_game_stats
         )
-        self.player_cs2_game_stats = self._request_faceit_match_data("cs2")
-        self.player_csgo_game_stats = self._request_faceit_match_data("csgo")
-        self.all_cs_game_stats = self.player_cs2_game_stats + self.player_csgo_game_stats
+        self.all_cs_game_windows
+
+    @lazy_property
+    def player_data(self) -> Dict:
+        """The player's profile"""
+        return self._request_data(FaceitEndpoints.player_info
+            .format(nickname=self.faceit_nickname)
+        )
+
+    @lazy_property
+    def player_id(self) -> str:
+        return self.player_data.get("player_id")
+
+    @lazy_property
+    def player_ban_data(self) -> Dict:
+        """The player's bans"""
+        return self._request_data(FaceitEndpoints.player_bans
+            .format(player_id=self.player_id)
+        )
+
+    @lazy_property
+    def player_cs2_game_stats(self) -> List["MatchRecord"]:
+        return self._request_faceit_match_data("cs2")
+
+    @lazy_property
+    def player_csgo_game_stats(self) -> List["MatchRecord"]:
+        return self._request_faceit_match_data("csgo")
+
+    @lazy_property
+    def all_cs_game_stats(self) -> List["MatchRecord"]:
+        # Resolve player_id first so both histories don't request the profile
+        self.player_id
+        # Fetch whichever histories are not loaded yet at the same time
+        cs2_game_stats, csgo_game_stats = self.fetch_engine.gather(
+            lambda: self.player_cs2_game_stats,
+            lambda: self.player_csgo_game_stats
+        )
+        return cs2_game_stats + csgo_game_stats
+
+    @lazy_property
+    def all_cs_game_columns(self) -> "MatchStatsColumns":
+        from utilities.matchstatscolumns import MatchStatsColumns
+        # Gathered once here, every stats window below reads the same prefix sums
+        return MatchStatsColumns.from_records(self.all_cs_game_stats)
+
+    @lazy_property
+    def all_cs_game_windows(self) -> "MatchStatsWindows":
+        from utilities.windowstatistics import MatchStatsWindows
+        return MatchStatsWindows(self.all_cs_game_columns)
+
+    @lazy_property
+    def streamed_match_stats(self) -> "StreamingMatchStats":
+        """Stats folded in one page at a time, without holding the match history"""
+        from utilities.streamingstatistics import StreamingMatchStats
+        streamed_stats = StreamingMatchStats(last_n=20, first_n=10)
+        # cs2 before csgo, the same order as all_cs_game_stats
+        for game_id in ("cs2", "csgo"):
+            for page in self._iter_faceit_match_pages(game_id):
+                streamed_stats.add_page(page)
+        return streamed_stats
+
+    @lazy_property
+    def aggregate_state(self) -> "MatchAggregateState":
+        """Stats saved in the match store and folded forward over only the matches played since
+
+        Gives the same all time, last 20 and first 10 stats as the full history
+        without loading it, unless the state is missing or out of step with
+        the store, in which case it is rebuilt from the stored matches.
+        """
+        from utilities.aggregatestate import MatchAggregateState
+        from utilities.matchstatscolumns import MatchStatsColumns
+        # Resolve player_id first so both histories don't request the profile
+        self.player_id
+        saved_state = self.match_store.load_aggregate_state(self.player_id)
+        state = MatchAggregateState.from_bytes(saved_state) if saved_state is not None else None
+        if state is not None and any(
+            state.game_counts.get(game_id, 0) != self.match_store.count(self.player_id, game_id)
+            for game_id in ("cs2", "csgo")
+        ):
+            # The store changed without the state, e.g. was written by a lookup with a dataset
+            state = None
+        new_cs2_stats, new_csgo_stats = self.fetch_engine.gather(*(
+            lambda game_id=game_id: self._fetch_new_match_stats(
+                game_id,
+                lambda match_id: self.match_store.contains(self.player_id, game_id, match_id),
+                self.match_store.newest_match_id(self.player_id, game_id)
+            )
+            for game_id in ("cs2", "csgo")
+        ))
+        # Chronologically csgo comes before cs2, the same order as all_cs_game_stats reversed,
+        # so new csgo matches only fold onto the end while there are no cs2 matches
+        if state is None or (new_csgo_stats and state.game_counts.get("cs2", 0)):
+            with stage_timer("aggregate.rebuild"):
+                stored_match_stats = {
+                    game_id: self.match_store.load(self.player_id, game_id) for game_id in ("cs2", "csgo")
+                }
+                state = MatchAggregateState.from_columns(
+                    MatchStatsColumns.from_stats(stored_match_stats["cs2"] + stored_match_stats["csgo"]),
+                    game_counts={game_id: len(match_stats) for game_id, match_stats in stored_match_stats.items()},
+                    last_n=20,
+                    first_n=10
+                )
+            metrics.count("aggregate_rebuilds")
+        else:
+            state.add_columns(MatchStatsColumns.from_stats(new_csgo_stats), game_id="csgo")
+            state.add_columns(MatchStatsColumns.from_stats(new_cs2_stats), game_id="cs2")
+            metrics.count("aggregate_folds")
+        self.match_store.save_aggregate_state(self.player_id, state.to_bytes())
+        return state
+
+    @property
+    def _uses_aggregate_state(self) -> bool:
+        # A dataset is written from the full stored history, so there is nothing to save by skipping it
+        return self.match_store is not None and self.match_dataset is None and not self.streaming
+
+    @property
+    def _summary_stats(self) -> Union["MatchStatsWindows", "StreamingMatchStats", "MatchAggregateState"]:
+        """The source of the all time, last 20 and first 10 stores"""
+        if self.streaming:
+            return self.streamed_match_stats
+        if self._uses_aggregate_state:
+            return self.aggregate_state
+        return self.all_cs_game_windows
 
     @staticmethod
     def _initialise_api_header() -> Dict[str, str]:
@@ -126,11 +339,8 @@ class PlayerFaceitDataRetrieval:
         Returns:
             Dict[str, str]: Headers for the get request
         """
-        # Handle server key
-        load_dotenv()
-        # The SERVER_KEY environment variable was generated at:
-        # https://developers.faceit.com/apps > select app > api keys > create server side api key
-        bearer = os.getenv("SERVER_KEY")
+        # Handle server key, read from the environment once per process
+        bearer = get_settings().faceit_server_key
         if not bearer:
             raise KeyError("Environment variable 'SERVER_KEY' does not exist")
 
@@ -140,37 +350,76 @@ class PlayerFaceitDataRetrieval:
         }
         return headers
 
+    @instrumented
     def _request_data(
             self,
-            endpoint: str
-    ) -> requests.Response:
-        """Sends a request to the provided API endpoint, handling errors in the process
+            endpoint: str,
+            cache_key: Optional[str] = None,
+            cache_policy: Optional[CachePolicy] = None,
+            decode: Optional[Callable[[bytes], Optional[Dict]]] = None
+    ) -> Dict:
+        """Returns the response of the provided API endpoint through the process-wide response cache
 
         Args:
             endpoint (str): The endpoint URL
+            cache_key (Optional[str]): Caches the response under this key instead of the endpoint
+            cache_policy (Optional[CachePolicy]): Overrides the instance's cache policy
+            decode (Optional[Callable[[bytes], Optional[Dict]]]): Passed on to _send_request,
+                give a cache_key too when it decodes less than the full response
 
         Returns:
-            requests.Response: The response of the get request
+            Dict: The decoded response of the get request
+        """
+        # strip method is needed due to formatting of multi-line strings
+        endpoint = endpoint.strip()
+        return get_response_cache().get_or_fetch(
+            cache_key or endpoint,
+            lambda: self._send_request(endpoint, decode),
+            cache_policy or self.cache_policy
+        )
+
+    @instrumented
+    def _send_request(
+            self,
+            endpoint: str,
+            decode: Optional[Callable[[bytes], Optional[Dict]]] = None
+    ) -> Tuple[Dict, Optional[int]]:
+        """Sends a request to the provided API endpoint
+
+        Args:
+            endpoint (str): The endpoint URL
+            decode (Optional[Callable[[bytes], Optional[Dict]]]): Decodes the raw body in place of
+                the full JSON decode, e.g. only part of it. Returning None falls back to the full decode
+
+        Raises:
+            ApiRequestError: If the request failed after any retries
+
+        Returns:
+            Tuple[Dict, Optional[int]]: The decoded response and the size of its body
         """
         try:
-            response_api = requests.get(
-                # strip method is needed due to formatting of multi-line strings
-                endpoint.strip(),
+            # The scheduler paces requests to the rate limits and retries 429s and 5xxs
+            response_api = get_request_scheduler().get(
+                endpoint,
                 headers=self.headers,
-                timeout=20
+                priority=self.priority,
+                counter=self.request_counter
             )
             response_api.raise_for_status()
-        # Handle errors and present to user on front-end
-        except requests.exceptions.HTTPError as http_error:
-            st.error(f"Http Error: {http_error}")
-        except requests.exceptions.ConnectionError as conn_error:
-            st.error(f"Error Connecting: {conn_error}")
-        except requests.exceptions.Timeout as timeout_error:
-            st.error(f"Timeout Error: {timeout_error}")
-        except requests.exceptions.RequestException as req_error:
-            st.error(f"An Error Occurred: {req_error}")
-        return response_api.json()
+            metrics.count("bytes_received", len(response_api.content), api="faceit")
+            if decode is not None:
+                with stage_timer("faceit.selective_decode"):
+                    decoded = decode(response_api.content)
+                if decoded is not None:
+                    return decoded, len(response_api.content)
+                metrics.count("selective_decode_fallbacks")
+            with stage_timer("faceit.json_decode"):
+                return response_api.json(), len(response_api.content)
+        # Left to the caller to present, failed responses are never cached
+        except requests.exceptions.RequestException as request_error:
+            raise ApiRequestError.from_request_exception("faceit", request_error) from request_error
 
+    @instrumented
     def player_data_store(self) -> PlayerInformationData:
         """Inserts the player's information into the PlayerInformationData dataclass"""
         return PlayerInformationData(
@@ -182,9 +431,10 @@ class PlayerFaceitDataRetrieval:
             is_verified=self.player_data.get("verified"),
             skill_level=glom(self.player_data, "games.cs2.skill_level", default=0),
             elo=glom(self.player_data, "games.cs2.faceit_elo", default=0),
-            num_games=len(self.player_cs2_game_stats) + len(self.player_csgo_game_stats)
+            num_games=len(self._summary_stats)
         )
 
+    @instrumented
     def player_data_ban_store(self) -> PlayerBanInformationData:
         """Inserts the player's ban information into the PlayerBanInformationData dataclass"""
         player_ban_items = self.player_ban_data.get("items", [])
@@ -196,42 +446,183 @@ class PlayerFaceitDataRetrieval:
             ban_response=player_ban_items
         )
 
-    def _request_faceit_match_data(self, game_id: str) -> Dict:
-        """Handles paginated stats data"""
-        match_stats = []
-        # Endpoint fetches results {limit} at a time
-        # And adds to offset until end is reached
-        offset = 0
-        limit = 100
-        while True:
-            endpoint = FaceitEndpoints.player_statistics.format(
-                player_id=self.player_id,
-                game_id=game_id,
-                offset=offset,
-                limit=limit
+    def _request_faceit_match_data(self, game_id: str) -> List["MatchRecord"]:
+        """Handles paginated stats data, keeping each match as a compact record"""
+        from utilities.matchrecord import MatchRecord
+        return [
+            record
+            for page in self._iter_faceit_match_pages(game_id)
+            for record in MatchRecord.from_page(page)
+        ]
+
+    def _iter_faceit_match_pages(self, game_id: str) -> Iterator[List[Dict]]:
+        """Yields the player's match stats for a game one page at a time, newest first"""
+        if self.match_store is None:
+            if self.match_dataset is None:
+                yield from self._iter_requested_match_pages(game_id)
+                return
+            pages = []
+            for page in self._iter_requested_match_pages(game_id):
+                pages.append(page)
+                yield page
+            self.match_dataset.write_history(self.player_id, game_id, (stats for page in pages for stats in page))
+            return
+
+        if self.streaming and self.match_dataset is None:
+            # New matches are appended to the store first, then the whole history is read back
+            # a page at a time, so the stream never holds more of it than the API would send
+            self._fetch_new_match_stats(
+                game_id,
+                lambda match_id: self.match_store.contains(self.player_id, game_id, match_id),
+                self.match_store.newest_match_id(self.player_id, game_id)
+            )
+            yield from self.match_store.iter_pages(self.player_id, game_id, self.fetch_engine.page_limit)
+            return
+
+        stored_match_stats = self.match_store.load(self.player_id, game_id)
+        known_match_ids = {stats.get("Match Id") for stats in stored_match_stats}
+        new_match_stats = self._fetch_new_match_stats(
+            game_id,
+            lambda match_id: match_id in known_match_ids,
+            stored_match_stats[0].get("Match Id") if stored_match_stats else None
+        )
+        if self.match_dataset is not None and stored_match_stats and not self.match_dataset.has_history(self.player_id, game_id):
+            # Histories stored before the dataset was given are written in full once
+            self.match_dataset.write_history(self.player_id, game_id, new_match_stats + stored_match_stats)
+        elif self.match_dataset is not None and new_match_stats:
+            # Older years hold no new matches, so only the years from the oldest new match are rewritten
+            self.match_dataset.write_history(
+                self.player_id,
+                game_id,
+                new_match_stats + stored_match_stats,
+                since=min(int(stats.get("Match Finished At", 0)) for stats in new_match_stats)
+            )
+        if new_match_stats:
+            yield new_match_stats
+        if stored_match_stats:
+            yield stored_match_stats
+
+    def _fetch_new_match_stats(
+            self,
+            game_id: str,
+            is_stored: Callable[[str], bool],
+            newest_match_id: Optional[str] = None
+    ) -> List[Dict]:
+        """Requests the matches newer than the stored history and appends them to the store
+
+        Args:
+            game_id (str): cs2 or csgo
+            is_stored (Callable[[str], bool]): Whether a match id is already in the store
+            newest_match_id (Optional[str]): The newest stored match, when given only the
+                items ahead of it in a page are decoded
+
+        Returns:
+            List[Dict]: The new matches' stats, newest first
+        """
+        request_page = None
+        if newest_match_id is not None:
+            # The cache holds the decoded prefix apart from the full page other lookups read
+            request_page = lambda endpoint: self._request_data(
+                endpoint,
+                cache_key=f"{endpoint.strip()}#before={newest_match_id}",
+                decode=lambda body: decode_items_before(body, newest_match_id)
+            )
+        # New matches are only added at offset 0, so walk forward until a stored one appears
+        items = self.fetch_engine.fetch_pages(
+            FaceitEndpoints.player_statistics,
+            is_known=lambda item: is_stored(item.get("stats", {}).get("Match Id")),
+            # A warm history usually only needs the first page
+            window_size=1 if self.match_store.has_history(self.player_id, game_id) else None,
+            request_data=request_page,
+            player_id=self.player_id,
+            game_id=game_id
+        )
+        new_match_stats = [item.get("stats") for item in items]
+        self.match_store.append_newest(self.player_id, game_id, new_match_stats)
+        return new_match_stats
+
+    def _iter_requested_match_pages(self, game_id: str) -> Iterator[List[Dict]]:
+        """Yields the player's match stats for a game from the API, one page at a time, newest first"""
+        # Offsets shift whenever a match is played, so the first page is fetched
+        # first and the rest are cached against its newest match
+        head_items = self._request_data(FaceitEndpoints.player_statistics.format(
+            player_id=self.player_id,
+            game_id=game_id,
+            offset=0,
+            limit=self.fetch_engine.page_limit
+        )).get("items", [])
+        metrics.count("pages_fetched")
+        if head_items:
+            yield [item.get("stats") for item in head_items]
+        if len(head_items) < self.fetch_engine.page_limit:
+            return
+        head_match_id = head_items[0].get("stats", {}).get("Match Id")
+        if self.streaming:
+            # Caching every page would hold the history the stream avoids holding
+            request_page = lambda endpoint: self._send_request(endpoint.strip())[0]
+        else:
+            request_page = lambda endpoint: self._request_data(
+                endpoint,
+                cache_key=f"{endpoint.strip()}#head={head_match_id}",
+                # Pinned pages never change, so are never worth refreshing
+                cache_policy=DEFAULT_CACHE_POLICY
             )
-            player_stats_batch = self._request_data(endpoint)
-            items = player_stats_batch.get("items", [])
-            if items == []:
-                break
-            match_stats.extend([item.get("stats") for item in items])
-            offset += limit
-        return match_stats
+        # Endpoint fetches results {limit} at a time, the engine requests
+        # several offsets at once until a short page marks the end
+        for items in self.fetch_engine.iter_pages(
+            FaceitEndpoints.player_statistics,
+            start_offset=self.fetch_engine.page_limit,
+            request_data=request_page,
+            player_id=self.player_id,
+            game_id=game_id
+        ):
+            yield [item.get("stats") for item in items]
 
+    @instrumented
     def player_data_stats_all_time_store(self) -> PlayerStatisticsAllTimeData:
         """Inserts the player's all time stats into the relevant dataclass"""
-        return PlayerStatisticsAllTimeData(self.player_id, **calculate_stats(self.all_cs_game_stats))
+        return PlayerStatisticsAllTimeData(self.player_id, **self._summary_stats.all_time())
 
+    @instrumented
     def player_data_stats_last_20_store(self) -> PlayerStatisticsLast20Data:
         """Inserts the player's last 20 game stats into the relevant dataclass"""
-        # Extract first 20 records in all_cs_game_stats
-        last_20_cs_game_stats = self.all_cs_game_stats[:20]
-        return PlayerStatisticsLast20Data(self.player_id, **calculate_stats(last_20_cs_game_stats))
+        return PlayerStatisticsLast20Data(self.player_id, **self._summary_stats.last_n(20))
 
+    @instrumented
     def player_data_stats_first_10_store(self):
-        # Extract last 10 records in all_cs_game_stats
         """Inserts the player's first 10 game stats into the relevant dataclass"""
-        first_10_cs_game_stats = self.all_cs_game_stats[-len(self.all_cs_game_stats):-len(self.all_cs_game_stats) + 10]
-        return PlayerStatisticsFirst10Data(self.player_id, **calculate_stats(first_10_cs_game_stats))
+        return PlayerStatisticsFirst10Data(self.player_id, **self._summary_stats.first_n(10))
+
+    @instrumented
+    def player_data_stats_window_store(self, start: int, stop: int) -> PlayerStatisticsWindowData:
+        """Inserts the player's stats over games [start, stop) into the relevant dataclass
+
+        Args:
+            start (int): Index of the first game, 0 being the player's first game
+            stop (int): Index after the last game, negative values count back from the latest
+        """
+        start, stop, _ = slice(start, stop).indices(len(self.all_cs_game_windows))
+        return PlayerStatisticsWindowData(
+            self.player_id,
+            num_games=max(stop - start, 0),
+            **self.all_cs_game_windows.window(start, stop)
+        )
+
+    @instrumented
+    def player_data_stats_date_range_store(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime
+    ) -> PlayerStatisticsWindowData:
+        """Inserts the player's stats over games finished between two datetimes into the relevant dataclass"""
+        return self.player_data_stats_window_store(
+            *self.all_cs_game_windows.date_range_indices(start, end)
+        )
+
+    @instrumented
+    def player_data_stats_rolling(self, window_size: int = 20) -> Dict[str, "np.ndarray"]:
+        """Returns the player's form over time as averages of every window_size consecutive games"""
+        return self.all_cs_game_windows.rolling(window_size)
 
-print(PlayerFaceitDataRetrieval("nadysen").player_data_store())
+if __name__ == "__main__":
+    print(PlayerFaceitDataRetrieval("nadysen").player_data_store())
@@ -0,0 +1,204 @@
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Allow access to services folder
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.faceitplayerstatistics import FaceitEndpoints, PlayerFaceitDataRetrieval
+from services.requestscheduler import Priority
+from services.steamplayerstatistics import PlayerSteamDataRetrieval
+from utilities.friendgraph import FriendGraph
+from utilities.instrumentation import metrics, stage_timer
+from utilities.lazyloading import lazy_callable
+
+glom = lazy_callable("glom", "glom")
+
+DEFAULT_CRAWL_CONCURRENCY = 8
+DEFAULT_MAX_NODES = 50_000
+
+@dataclass
+class FriendGraphCrawl:
+    """The friend graph around some seed players"""
+    graph: FriendGraph
+    # Each node's distance from the nearest seed, in graph.node_ids order
+    depths: np.ndarray
+    # node id -> its Steam summary or Faceit profile, when fetched
+    profiles: Dict[str, Dict]
+    # node id -> why its friends could not be fetched
+    failed: Dict[str, str]
+    # Whether max_nodes stopped the crawl from adding every friend found
+    truncated: bool
+
+def _map_bounded(
+    executor: ThreadPoolExecutor,
+    function: Callable[[str], List[str]],
+    items: List[str],
+    max_in_flight: int
+) -> Iterator[Tuple[str, Optional[List[str]], Optional[Exception]]]:
+    """Yields (item, result, error) in the order of items, with at most max_in_flight calls submitted"""
+    items_left = iter(items)
+    in_flight = deque()
+    for item in items_left:
+        in_flight.append((item, executor.submit(function, item)))
+        if len(in_flight) >= max_in_flight:
+            break
+    while in_flight:
+        item, future = in_flight.popleft()
+        try:
+            yield item, future.result(), None
+        except Exception as error:
+            yield item, None, error
+        next_item = next(items_left, None)
+        if next_item is not None:
+            in_flight.append((next_item, executor.submit(function, next_item)))
+
+def crawl_friend_graph(
+    seeds: Iterable[str],
+    friends_of: Callable[[str], List[str]],
+    depth: int = 2,
+    max_concurrency: int = DEFAULT_CRAWL_CONCURRENCY,
+    max_nodes: int = DEFAULT_MAX_NODES
+) -> FriendGraphCrawl:
+    """Breadth first crawl of a friend graph out to depth hops from the seeds
+
+    Each level's friend lists are fetched by a pool of max_concurrency threads
+    with at most twice that many requests queued, so the frontier held in
+    memory is the level's node ids rather than one pending request per node.
+    A node is fetched once however many of its friends lead to it.
+
+    Args:
+        seeds (Iterable[str]): The node ids the crawl starts from, at depth 0
+        friends_of (Callable[[str], List[str]]): Returns a node's friends, called from worker threads
+        depth (int): Hops from the seeds, the friends of nodes at this depth are not fetched
+        max_concurrency (int): The number of friend lists fetched at once
+        max_nodes (int): Stops adding new nodes once the graph holds this many
+
+    Returns:
+        FriendGraphCrawl: The graph, without profiles
+    """
+    node_ids: List[str] = []
+    index_of: Dict[str, int] = {}
+    depths = array("b")
+    # Compact int64 buffers, a Python list of ints takes several times the memory
+    sources = array("q")
+    targets = array("q")
+    failed: Dict[str, str] = {}
+    truncated = False
+
+    def add_node(node_id: str, node_depth: int) -> Tuple[Optional[int], bool]:
+        nonlocal truncated
+        index = index_of.get(node_id)
+        if index is not None:
+            return index, False
+        if len(node_ids) >= max_nodes:
+            truncated = True
+            return None, False
+        index_of[node_id] = len(node_ids)
+        node_ids.append(node_id)
+        depths.append(node_depth)
+        return index_of[node_id], True
+
+    frontier = [node_id for node_id in dict.fromkeys(seeds) if add_node(node_id, 0)[1]]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor, stage_timer("friendgraph.crawl"):
+        for level in range(depth):
+            next_frontier = []
+            for node_id, friends, error in _map_bounded(executor, friends_of, frontier, 2 * max_concurrency):
+                if error is not None:
+                    failed[node_id] = f"{type(error).__name__}: {error}"
+                    metrics.count("friendgraph_fetches", outcome="error")
+                    continue
+                metrics.count("friendgraph_fetches", outcome="ok")
+                source = index_of[node_id]
+                for friend_id in friends:
+                    target, is_new = add_node(friend_id, level + 1)
+                    if target is None:
+                        continue
+                    sources.append(source)
+                    targets.append(target)
+                    if is_new:
+                        next_frontier.append(friend_id)
+            frontier = next_frontier
+
+    graph = FriendGraph.from_edges(
+        node_ids,
+        np.frombuffer(sources, dtype=np.int64),
+        np.frombuffer(targets, dtype=np.int64)
+    )
+    return FriendGraphCrawl(graph, np.frombuffer(depths, dtype=np.int8).copy(), {}, failed, truncated)
+
+def crawl_steam_friends(
+    steam_ids: Iterable[str],
+    depth: int = 2,
+    max_concurrency: int = DEFAULT_CRAWL_CONCURRENCY,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    include_profiles: bool = True,
+    priority: Priority = Priority.BACKGROUND
+) -> FriendGraphCrawl:
+    """Crawls Steam friend lists, then fetches every node's summary 100 steamids per request
+
+    Private friend lists count as no friends, so their owners only have the
+    edges other players' lists report.
+
+    Args:
+        steam_ids (Iterable[str]): The 64 bit steam ids to start from
+        depth (int): Hops from the seeds
+        max_concurrency (int): The number of friend lists fetched at once
+        max_nodes (int): Stops adding new players once the graph holds this many
+        include_profiles (bool): Whether to fetch each player's GetPlayerSummaries entry
+        priority (Priority): The request scheduler lane, a crawl is a background job by default
+
+    Returns:
+        FriendGraphCrawl: The graph, profiles hold GetPlayerSummaries entries
+    """
+    def friends_of(steam_id: str) -> List[str]:
+        friends_data = PlayerSteamDataRetrieval(steam_id, priority=priority).player_friends_data
+        return [friend["steamid"] for friend in glom(friends_data, "friendslist.friends", default=[])]
+
+    crawl = crawl_friend_graph([str(steam_id) for steam_id in steam_ids], friends_of, depth, max_concurrency, max_nodes)
+    if include_profiles and len(crawl.graph):
+        with stage_timer("friendgraph.profiles"):
+            summaries = PlayerSteamDataRetrieval.player_summaries_batch(crawl.graph.node_ids, priority=priority)
+        crawl.profiles = {
+            steam_id: summary["response"]["players"][0] for steam_id, summary in summaries.items()
+        }
+    return crawl
+
+def crawl_faceit_friends(
+    faceit_nicknames: Iterable[str],
+    depth: int = 1,
+    max_concurrency: int = DEFAULT_CRAWL_CONCURRENCY,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    priority: Priority = Priority.BACKGROUND
+) -> FriendGraphCrawl:
+    """Crawls Faceit friends, whose ids come with each player's profile
+
+    Args:
+        faceit_nicknames (Iterable[str]): The nicknames of the players to start from
+        depth (int): Hops from the seeds, every hop is one profile request per player
+        max_concurrency (int): The number of profiles fetched at once
+        max_nodes (int): Stops adding new players once the graph holds this many
+        priority (Priority): The request scheduler lane, a crawl is a background job by default
+
+    Returns:
+        FriendGraphCrawl: Nodes are Faceit player ids, profiles hold each fetched profile
+    """
+    seeds = [PlayerFaceitDataRetrieval(nickname, priority=priority) for nickname in faceit_nicknames]
+    profiles = {seed.player_id: seed.player_data for seed in seeds if seed.player_id}
+
+    def friends_of(player_id: str) -> List[str]:
+        profile = profiles.get(player_id)
+        if profile is None:
+            # Any retrieval sends requests with the same key and lane
+            profile = seeds[0]._request_data(FaceitEndpoints.player_info_by_id.format(player_id=player_id))
+            profiles[player_id] = profile
+        return profile.get("friends_ids", [])
+
+    crawl = crawl_friend_graph(list(profiles), friends_of, depth, max_concurrency, max_nodes)
+    crawl.profiles = profiles
+    return crawl
@@ -0,0 +1,317 @@
+"""Looks up players without the Streamlit app, e.g. for cron jobs and nightly batches
+
+Usage:
+    python services/headless.py lookup NICKNAME [NICKNAME ...] [--format jsonl|parquet] [--output PATH]
+    python services/headless.py lookup --input nicknames.txt --processes 8 --format parquet --output players.parquet
+"""
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+from itertools import islice
+import json
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Union, get_args
+
+import pandas as pd
+
+# Allow access to services folder
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.batchlookup import DEFAULT_MAX_WORKERS, add_percentiles, add_risk_scores, lookup_column_types, lookup_players
+from services.httptransport import configure_shared_transport
+from services.matchhistorydataset import DEFAULT_DATASET_PATH, MatchHistoryDataset
+from services.matchhistorystore import DEFAULT_STORE_PATH, MatchHistoryStore
+from services.requestscheduler import (
+    DEFAULT_HOST_LIMITS,
+    DEFAULT_KEY_LIMITS,
+    Priority,
+    RateLimit,
+    configure_request_scheduler
+)
+from utilities.percentileindex import PERCENTILE_METRICS, save_population_index
+from utilities.riskscoring import RiskScoringEngine
+
+DEFAULT_CHUNK_SIZE = 500
+
+def read_nicknames(lines: Iterable[str]) -> List[str]:
+    """Reads one nickname per line, skipping blank lines and # comments"""
+    return [
+        line.strip() for line in lines
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+
+def _chunks(items: List[str], chunk_size: int) -> List[List[str]]:
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+# Set in each worker process by _initialise_worker
+_worker_match_store: Optional[MatchHistoryStore] = None
+_worker_match_dataset: Optional[MatchHistoryDataset] = None
+
+def _open_match_store(match_store_path: Optional[str], match_dataset_path: Optional[str]) -> None:
+    global _worker_match_store, _worker_match_dataset
+    # SQLite in WAL mode lets every process read and append to the same store
+    _worker_match_store = MatchHistoryStore(match_store_path) if match_store_path else None
+    # Each player's files are only written by the process looking them up
+    _worker_match_dataset = MatchHistoryDataset(match_dataset_path) if match_dataset_path else None
+
+def _close_match_store() -> None:
+    global _worker_match_store, _worker_match_dataset
+    if _worker_match_store is not None:
+        _worker_match_store.close()
+    _worker_match_store = None
+    _worker_match_dataset = None
+
+def _initialise_worker(processes: int, match_store_path: Optional[str], match_dataset_path: Optional[str]) -> None:
+    """Splits the API limits between the worker processes, so together they stay within them"""
+    def share(limits: Dict[str, RateLimit]) -> Dict[str, RateLimit]:
+        return {
+            host: RateLimit(limit.requests_per_second / processes, max(limit.burst / processes, 1))
+            for host, limit in limits.items()
+        }
+    configure_request_scheduler(host_limits=share(DEFAULT_HOST_LIMITS), key_limits=share(DEFAULT_KEY_LIMITS))
+    # A forked worker must not share the parent's keep-alive connections
+    configure_shared_transport()
+    _open_match_store(match_store_path, match_dataset_path)
+
+def _lookup_chunk(
+    faceit_nicknames: List[str],
+    threads: int,
+    include_steam: bool,
+    streaming: bool,
+    risk_scores: bool
+) -> pd.DataFrame:
+    players = lookup_players(
+        faceit_nicknames,
+        max_workers=threads,
+        include_steam=include_steam,
+        match_store=_worker_match_store,
+        priority=Priority.BACKGROUND,
+        streaming=streaming,
+        match_dataset=_worker_match_dataset
+    )
+    return add_risk_scores(players) if risk_scores else players
+
+def iter_lookup_chunks(
+    faceit_nicknames: List[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    processes: int = 1,
+    threads: int = DEFAULT_MAX_WORKERS,
+    include_steam: bool = True,
+    streaming: bool = True,
+    risk_scores: bool = True,
+    match_store_path: Optional[str] = None,
+    match_dataset_path: Optional[str] = None,
+    percentiles: bool = True
+) -> Iterator[pd.DataFrame]:
+    """Looks up players a chunk at a time, yielding each chunk's rows once it completes
+
+    With more than one process the chunks are shared out across a process pool,
+    so the JSON decoding and stats calculations of a large batch use every core.
+    Each process runs its own thread pool of lookups and its share of the API
+    limits. Chunks are yielded in the order of the nicknames.
+
+    Args:
+        faceit_nicknames (List[str]): The nicknames of the players on faceit
+        chunk_size (int): The number of players per chunk, and per row group when writing Parquet
+        processes (int): The number of worker processes, 1 looks up in this process
+        threads (int): The number of players each process looks up at once
+        include_steam (bool): Whether to add each player's Steam summaries
+        streaming (bool): Whether stats are folded in page by page, keeping memory flat
+        risk_scores (bool): Whether to add the risk score columns
+        match_store_path (Optional[str]): A match store shared by every process, none by default
+        match_dataset_path (Optional[str]): A Parquet match dataset every fetched history is
+            written to, none by default
+        percentiles (bool): Whether to add the percentile columns. Every chunk joins the
+            population index in this process, which is saved once the last chunk is yielded
+
+    Returns:
+        Iterator[pd.DataFrame]: One frame per chunk, with the columns of lookup_players.
+            Failed lookups have the reason in the error columns rather than raising
+    """
+    frames = _iter_unranked_chunks(
+        _chunks(faceit_nicknames, chunk_size),
+        processes,
+        (threads, include_steam, streaming, risk_scores),
+        match_store_path,
+        match_dataset_path
+    )
+    for frame in frames:
+        # Ranked here rather than in the worker processes, so every chunk joins one population
+        yield add_percentiles(frame) if percentiles else frame
+    if percentiles:
+        save_population_index()
+
+def _iter_unranked_chunks(
+    chunks: List[List[str]],
+    processes: int,
+    options: tuple,
+    match_store_path: Optional[str],
+    match_dataset_path: Optional[str]
+) -> Iterator[pd.DataFrame]:
+    if processes <= 1:
+        _open_match_store(match_store_path, match_dataset_path)
+        try:
+            for chunk in chunks:
+                yield _lookup_chunk(chunk, *options)
+        finally:
+            # Also when the caller stops early, so a later run in this process opens its own store
+            _close_match_store()
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_initialise_worker,
+        initargs=(processes, match_store_path, match_dataset_path)
+    ) as executor:
+        # At most two chunks per process are submitted, so finished frames waiting
+        # on an earlier chunk don't pile up in memory however large the batch
+        chunks_left = iter(chunks)
+        in_flight = deque(
+            executor.submit(_lookup_chunk, chunk, *options) for chunk in islice(chunks_left, 2 * processes)
+        )
+        try:
+            while in_flight:
+                frame = in_flight.popleft().result()
+                next_chunk = next(chunks_left, None)
+                if next_chunk is not None:
+                    # Submitted before yielding, so the processes keep busy while the frame is written
+                    in_flight.append(executor.submit(_lookup_chunk, next_chunk, *options))
+                yield frame
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+def lookup_columns(include_steam: bool = True, risk_scores: bool = True, percentiles: bool = True) -> Dict[str, type]:
+    """The columns written by the CLI in order, and the type of each"""
+    column_types = lookup_column_types(include_steam)
+    if risk_scores:
+        engine = RiskScoringEngine()
+        column_types["risk_score"] = float
+        column_types.update({f"contribution_{name}": float for name in engine.feature_names})
+    if percentiles:
+        column_types.update({f"{metric}_percentile": float for metric in PERCENTILE_METRICS})
+    return column_types
+
+def _json_default(value: object) -> object:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    # numpy scalars
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def write_jsonl(frames: Iterable[pd.DataFrame], file: IO[str]) -> int:
+    """Writes each player as one line of JSON, flushing after every chunk
+
+    Returns:
+        int: The number of players written
+    """
+    num_rows = 0
+    for frame in frames:
+        # NaN becomes null, and ints stay ints rather than the floats pandas keeps beside NaN
+        records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+        for record in records:
+            file.write(json.dumps(record, default=_json_default) + "\n")
+        file.flush()
+        num_rows += len(records)
+    return num_rows
+
+def write_parquet(frames: Iterable[pd.DataFrame], path: str, column_types: Dict[str, type]) -> int:
+    """Writes each chunk as a row group of one Parquet file
+
+    The schema is fixed up front from column_types, so a chunk where a column
+    happens to be all null, e.g. every player failed, still matches the others.
+
+    Returns:
+        int: The number of players written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {
+        str: pa.string(),
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        datetime.date: pa.date32(),
+        datetime.datetime: pa.timestamp("us")
+    }
+
+    def arrow_type(annotation: type) -> "pa.DataType":
+        # Optional[X] is Union[X, None]
+        if getattr(annotation, "__origin__", None) is Union:
+            annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+        return arrow_types[annotation]
+
+    schema = pa.schema([(name, arrow_type(annotation)) for name, annotation in column_types.items()])
+    num_rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for frame in frames:
+            # Columns missing from a chunk or all null are written as typed nulls, pandas
+            # would otherwise hold them as NaN floats which don't cast to e.g. dates
+            writer.write_table(pa.Table.from_arrays([
+                pa.array(frame[field.name], type=field.type, from_pandas=True)
+                if field.name in frame and frame[field.name].notna().any()
+                else pa.nulls(len(frame), type=field.type)
+                for field in schema
+            ], schema=schema))
+            num_rows += len(frame)
+    return num_rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    lookup = commands.add_parser("lookup", help="Looks up players and writes one row per player")
+    lookup.add_argument("nicknames", nargs="*")
+    lookup.add_argument("--input", help="A file of nicknames, one per line, - for stdin")
+    lookup.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    lookup.add_argument("--output", help="Where to write, stdout by default for jsonl")
+    lookup.add_argument("--processes", type=int, default=1)
+    lookup.add_argument("--threads", type=int, default=DEFAULT_MAX_WORKERS)
+    lookup.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    lookup.add_argument("--no-steam", action="store_true")
+    lookup.add_argument("--no-risk-scores", action="store_true")
+    lookup.add_argument("--no-percentiles", action="store_true", help="Skip ranking players within their skill level")
+    lookup.add_argument("--full-history", action="store_true", help="Calculate from each full history rather than streaming")
+    lookup.add_argument("--match-store", nargs="?", const=DEFAULT_STORE_PATH)
+    lookup.add_argument("--match-dataset", nargs="?", const=DEFAULT_DATASET_PATH, help="Also write each match history as Parquet")
+    args = parser.parse_args(argv)
+
+    nicknames = list(args.nicknames)
+    if args.input:
+        if args.input == "-":
+            nicknames += read_nicknames(sys.stdin)
+        else:
+            with open(args.input, encoding="utf-8") as file:
+                nicknames += read_nicknames(file)
+    if not nicknames:
+        parser.error("no nicknames given")
+    if args.format == "parquet" and not args.output:
+        parser.error("--output is required for parquet")
+
+    frames = iter_lookup_chunks(
+        nicknames,
+        chunk_size=args.chunk_size,
+        processes=args.processes,
+        threads=args.threads,
+        include_steam=not args.no_steam,
+        streaming=not args.full_history,
+        risk_scores=not args.no_risk_scores,
+        match_store_path=args.match_store,
+        match_dataset_path=args.match_dataset,
+        percentiles=not args.no_percentiles
+    )
+    if args.format == "parquet":
+        column_types = lookup_columns(not args.no_steam, not args.no_risk_scores, not args.no_percentiles)
+        num_rows = write_parquet(frames, args.output, column_types)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            num_rows = write_jsonl(frames, file)
+    else:
+        num_rows = write_jsonl(frames, sys.stdout)
+    print(f"Looked up {num_rows} players", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
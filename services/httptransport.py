@@ -0,0 +1,110 @@
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_TIMEOUT = 20
+
+class HttpTransport:
+    """A pooled, keep-alive HTTP layer shared by the Faceit and Steam services
+
+    A single HTTPAdapter holds one connection pool per host, so repeated
+    lookups reuse warm TCP+TLS connections. Each thread gets its own
+    requests.Session mounted on that adapter, which keeps session state
+    thread-local while the connections themselves are shared.
+    """
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        timeout: float = DEFAULT_TIMEOUT
+    ) -> None:
+        """Initialises the transport and its connection pools
+
+        Args:
+            pool_connections (int): The number of per-host pools to keep
+            pool_maxsize (int): The number of connections kept alive per host
+            timeout (float): Seconds before a request times out
+        """
+        self.timeout = timeout
+        # Blocking makes threads wait for a free connection instead of
+        # opening throwaway ones beyond pool_maxsize
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's session, mounted on the shared adapter"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            session.headers.update({
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive"
+            })
+            self._local.session = session
+        return session
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> requests.Response:
+        """Sends a GET request over a pooled connection
+
+        Args:
+            url (str): The endpoint URL
+            headers (Optional[Dict[str, str]]): Headers added to the session defaults
+            timeout (Optional[float]): Overrides the transport's timeout
+
+        Returns:
+            requests.Response: The response of the get request
+        """
+        return self.session.get(
+            url,
+            headers=headers,
+            timeout=self.timeout if timeout is None else timeout
+        )
+
+    def close(self) -> None:
+        """Closes every pooled connection"""
+        self.adapter.close()
+
+_shared_transport: Optional[HttpTransport] = None
+_shared_transport_lock = threading.Lock()
+
+def get_shared_transport() -> HttpTransport:
+    """Returns the process-wide transport, creating it on first use
+
+    The transport lives at module level, so it outlives Streamlit reruns and
+    is shared by every browser session served by the process.
+    """
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = HttpTransport()
+    return _shared_transport
+
+def configure_shared_transport(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    timeout: float = DEFAULT_TIMEOUT
+) -> HttpTransport:
+    """Replaces the process-wide transport, e.g. to raise the pool size for batch jobs"""
+    global _shared_transport
+    with _shared_transport_lock:
+        if _shared_transport is not None:
+            _shared_transport.close()
+        _shared_transport = HttpTransport(pool_connections, pool_maxsize, timeout)
+    return _shared_transport
@@ -0,0 +1,265 @@
+import datetime
+import glob
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+# Allow access to utilities folder
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities.instrumentation import instrumented
+from utilities.lazyloading import lazy_import
+
+# pyarrow costs more to import than the rest of the services together, so it
+# is only imported once a dataset is written or queried
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+ds = lazy_import("pyarrow.dataset")
+pc = lazy_import("pyarrow.compute")
+
+DEFAULT_DATASET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "match_history"
+)
+
+# Faceit stats key -> (column, numpy dtype of its parsed values)
+NUMERIC_COLUMNS = {
+    "Result": ("result", "int8"),
+    "Rounds": ("rounds", "int16"),
+    "Kills": ("kills", "int16"),
+    "Deaths": ("deaths", "int16"),
+    "Assists": ("assists", "int16"),
+    "Headshots %": ("hsp", "float32"),
+    "K/D Ratio": ("kd_ratio", "float32"),
+    "K/R Ratio": ("kr_ratio", "float32"),
+    "ADR": ("adr", "float32"),
+    "MVPs": ("mvps", "int16"),
+    "Double Kills": ("double_kills", "int16"),
+    "Triple Kills": ("triple_kills", "int16"),
+    "Quadro Kills": ("quadro_kills", "int16"),
+    "Penta Kills": ("penta_kills", "int16")
+}
+
+DEFAULT_METRICS = ("kills", "kd_ratio", "kr_ratio", "hsp", "adr")
+
+class MatchHistoryDataset:
+    """Players' parsed match histories as a Parquet dataset partitioned by game and year
+
+    Files sit at game_id=<game>/year=<year>/<player_id>-0.parquet, so a query
+    only opens the files of the games, years and players it filters on and
+    only reads the columns it aggregates. Each file holds one player's
+    matches of that game and year, oldest first, so writing a history again
+    replaces the player's files rather than duplicating their matches.
+    """
+    def __init__(self, path: str = DEFAULT_DATASET_PATH) -> None:
+        """
+        Args:
+            path (str): The dataset's root directory, created on first write
+        """
+        self.path = path
+
+    @property
+    def partitioning(self) -> "ds.Partitioning":
+        return ds.partitioning(pa.schema([("game_id", pa.string()), ("year", pa.int16())]), flavor="hive")
+
+    @instrumented
+    def write_history(
+        self,
+        player_id: str,
+        game_id: str,
+        match_stats: Iterable[Dict],
+        since: Optional[int] = None
+    ) -> None:
+        """Writes a player's match history for a game
+
+        Args:
+            player_id (str): The player the matches belong to
+            game_id (str): cs2 or csgo
+            match_stats (Iterable[Dict]): Every stats dict of the player's history, in any order
+            since (Optional[int]): A Match Finished At timestamp in ms, only the years from
+                its year on are rewritten, e.g. the oldest newly played match's
+        """
+        table = match_stats_table(player_id, match_stats)
+        if since is not None:
+            first_year = datetime.datetime.fromtimestamp(since / 1000, datetime.timezone.utc).year
+            table = table.filter(pc.field("year") >= first_year)
+        if table.num_rows == 0:
+            return
+        ds.write_dataset(
+            table.append_column("game_id", pa.array([game_id] * table.num_rows, pa.string())),
+            self.path,
+            format="parquet",
+            partitioning=self.partitioning,
+            basename_template=f"{player_id}-{{i}}.parquet",
+            # Replaces this player's file in each year written and leaves every other file alone
+            existing_data_behavior="overwrite_or_ignore"
+        )
+
+    def _dataset(self, player_ids: Optional[Sequence[str]]) -> Optional["ds.Dataset"]:
+        """The dataset, only the given players' files when player_ids is given"""
+        if player_ids is None:
+            if not os.path.isdir(self.path):
+                return None
+            return ds.dataset(self.path, format="parquet", partitioning=self.partitioning)
+        files = [
+            file
+            for player_id in player_ids
+            for file in glob.glob(os.path.join(glob.escape(self.path), "*", "*", f"{glob.escape(player_id)}-*.parquet"))
+        ]
+        if not files:
+            return None
+        return ds.dataset(files, format="parquet", partitioning=self.partitioning, partition_base_dir=self.path)
+
+    @staticmethod
+    def _filter(
+        game_ids: Optional[Sequence[str]],
+        start: Optional[datetime.datetime],
+        end: Optional[datetime.datetime]
+    ) -> Optional["ds.Expression"]:
+        """The filter on the partition columns that prunes files, and on finished_at for exact bounds"""
+        conditions = []
+        if game_ids is not None:
+            conditions.append(ds.field("game_id").isin(list(game_ids)))
+        # Partitions hold the UTC year, e.g. a match at 23:30 on 31 December in New York is in the next year's.
+        # astimezone takes naive datetimes as local time, as MatchStatsWindows.date_range does
+        if start is not None:
+            start = start.astimezone(datetime.timezone.utc)
+            conditions.append(ds.field("year") >= start.year)
+            conditions.append(ds.field("finished_at") >= pa.scalar(start, pa.timestamp("ms", "UTC")))
+        if end is not None:
+            end = end.astimezone(datetime.timezone.utc)
+            conditions.append(ds.field("year") <= end.year)
+            conditions.append(ds.field("finished_at") <= pa.scalar(end, pa.timestamp("ms", "UTC")))
+        if not conditions:
+            return None
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        return expression
+
+    @instrumented
+    def read(
+        self,
+        columns: Sequence[str],
+        player_ids: Optional[Sequence[str]] = None,
+        game_ids: Optional[Sequence[str]] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None
+    ) -> "pa.Table":
+        """Reads only columns of the matches passing the filters
+
+        Args:
+            columns (Sequence[str]): The columns to read, game_id and year included
+            player_ids (Optional[Sequence[str]]): The players to read, every player by default
+            game_ids (Optional[Sequence[str]]): cs2 and/or csgo, both by default
+            start (Optional[datetime.datetime]): The earliest finish time read, in any timezone, naive as local time
+            end (Optional[datetime.datetime]): The latest finish time read, in any timezone, naive as local time
+        """
+        dataset = self._dataset(player_ids)
+        if dataset is None:
+            return match_stats_schema().append(pa.field("game_id", pa.string())).empty_table().select(list(columns))
+        return dataset.to_table(columns=list(columns), filter=self._filter(game_ids, start, end))
+
+    @instrumented
+    def aggregate(
+        self,
+        by: Sequence[str],
+        metrics: Sequence[str] = DEFAULT_METRICS,
+        player_ids: Optional[Sequence[str]] = None,
+        game_ids: Optional[Sequence[str]] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None
+    ) -> "pd.DataFrame":
+        """Averages the metrics over the matches passing the filters, grouped by columns
+
+        Args:
+            by (Sequence[str]): The columns to group by, e.g. map, month or game_id
+            metrics (Sequence[str]): The numeric columns averaged
+
+        Returns:
+            pd.DataFrame: One row per group, sorted by the group columns, holding
+                num_matches, perc_winrate and avg_<metric> for each metric
+        """
+        table = self.read([*by, "result", *metrics], player_ids, game_ids, start, end)
+        aggregated = table.group_by(list(by)).aggregate(
+            [("result", "count"), ("result", "mean")] + [(metric, "mean") for metric in metrics]
+        )
+        frame = aggregated.to_pandas().rename(columns={
+            "result_count": "num_matches",
+            "result_mean": "perc_winrate",
+            **{f"{metric}_mean": f"avg_{metric}" for metric in metrics}
+        })
+        frame["perc_winrate"] *= 100
+        return frame[[*by, "num_matches", "perc_winrate", *(f"avg_{metric}" for metric in metrics)]].sort_values(
+            list(by), ignore_index=True
+        )
+
+    def per_map(self, player_ids: Optional[Sequence[str]] = None, **filters) -> "pd.DataFrame":
+        """Stats per map, filters as for aggregate"""
+        return self.aggregate(["map"], player_ids=player_ids, **filters)
+
+    def per_month(self, player_ids: Optional[Sequence[str]] = None, **filters) -> "pd.DataFrame":
+        """Stats per calendar month, as YYYY-MM, filters as for aggregate"""
+        return self.aggregate(["month"], player_ids=player_ids, **filters)
+
+    def per_game(self, player_ids: Optional[Sequence[str]] = None, **filters) -> "pd.DataFrame":
+        """Stats for cs2 and csgo, filters as for aggregate"""
+        return self.aggregate(["game_id"], player_ids=player_ids, **filters)
+
+    def has_history(self, player_id: str, game_id: str) -> bool:
+        """Returns whether any of a player's matches of a game are stored"""
+        return bool(glob.glob(os.path.join(
+            glob.escape(self.path), f"game_id={glob.escape(game_id)}", "*", f"{glob.escape(player_id)}-*.parquet"
+        )))
+
+    def player_ids(self) -> List[str]:
+        """The players with any stored matches, read from the file names"""
+        names = glob.glob(os.path.join(glob.escape(self.path), "*", "*", "*.parquet"))
+        return sorted({os.path.basename(name).rsplit("-", 1)[0] for name in names})
+
+def match_stats_schema() -> "pa.Schema":
+    """The columns of each history, game_id and year are written as partition directories rather than columns"""
+    return pa.schema(
+        [
+            ("player_id", pa.string()),
+            ("match_id", pa.string()),
+            ("finished_at", pa.timestamp("ms", "UTC")),
+            ("year", pa.int16()),
+            ("month", pa.string()),
+            ("map", pa.string())
+        ]
+        + [(column_name, pa.from_numpy_dtype(np.dtype(dtype))) for column_name, dtype in NUMERIC_COLUMNS.values()]
+    )
+
+def match_stats_table(player_id: str, match_stats: Iterable[Dict]) -> "pa.Table":
+    """Parses Faceit `stats` dicts into a table of match_stats_schema, oldest match first"""
+    match_stats = list(match_stats)
+    count = len(match_stats)
+    finished_at = np.fromiter(
+        (int(stats.get("Match Finished At", 0)) for stats in match_stats),
+        dtype=np.int64,
+        count=count
+    )
+    # Sorted so each file's row group statistics bound finished_at tightly
+    order = np.argsort(finished_at, kind="stable")
+    match_stats = [match_stats[index] for index in order]
+    finished_at = finished_at[order].astype("datetime64[ms]")
+    columns = {
+        "player_id": pa.array([player_id] * count, pa.string()),
+        "match_id": pa.array([stats.get("Match Id") for stats in match_stats], pa.string()),
+        "finished_at": pa.array(finished_at, pa.timestamp("ms", "UTC")),
+        "year": pa.array(finished_at.astype("datetime64[Y]").astype(np.int64) + 1970, pa.int16()),
+        "month": pa.array(finished_at.astype("datetime64[M]").astype(str), pa.string()),
+        "map": pa.array([stats.get("Map") for stats in match_stats], pa.string())
+    }
+    for key, (column_name, dtype) in NUMERIC_COLUMNS.items():
+        # Floats first, the API reports some integer stats as "1.0"
+        columns[column_name] = pa.array(np.fromiter(
+            (float(stats.get(key) or 0) for stats in match_stats),
+            dtype=np.float64,
+            count=count
+        ).astype(dtype))
+    return pa.Table.from_pydict(columns, schema=match_stats_schema())
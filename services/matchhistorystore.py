@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "match_history.sqlite3"
+)
+
+class MatchHistoryStore:
+    """A local on-disk store of each player's Faceit match stats
+
+    Past matches never change and new ones only ever appear at offset 0, so
+    once a player's history is stored a lookup only needs the pages holding
+    matches newer than the newest stored one.
+    """
+    def __init__(self, path: str = DEFAULT_STORE_PATH) -> None:
+        """Opens the store, creating the database file if it does not exist
+
+        Args:
+            path (str): Location of the SQLite database
+        """
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            if path != ":memory:":
+                # Lets several processes read while one writes
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS match_stats (
+                    player_id TEXT NOT NULL,
+                    game_id TEXT NOT NULL,
+                    match_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    stats TEXT NOT NULL,
+                    PRIMARY KEY (player_id, game_id, match_id)
+                )
+            """)
+            # Records fetched histories, including empty ones
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS fetched_histories (
+                    player_id TEXT NOT NULL,
+                    game_id TEXT NOT NULL,
+                    PRIMARY KEY (player_id, game_id)
+                )
+            """)
+            # Each player's stats folded over their stored matches, see MatchAggregateState
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS aggregate_states (
+                    player_id TEXT PRIMARY KEY,
+                    state BLOB NOT NULL
+                )
+            """)
+            self._connection.execute("""
+                CREATE INDEX IF NOT EXISTS match_stats_position
+                ON match_stats (player_id, game_id, position)
+            """)
+
+    def load(self, player_id: str, game_id: str) -> List[Dict]:
+        """Returns a player's stored match stats, newest first as the API returns them"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT stats FROM match_stats WHERE player_id = ? AND game_id = ? ORDER BY position DESC",
+                (player_id, game_id)
+            ).fetchall()
+        return [json.loads(stats) for (stats,) in rows]
+
+    def iter_pages(self, player_id: str, game_id: str, page_size: int = 100) -> Iterator[List[Dict]]:
+        """Yields a player's stored match stats page_size at a time, newest first, without loading them all"""
+        # Walks down the positions, so matches appended meanwhile are newer and never yielded twice
+        before_position = None
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT position, stats FROM match_stats WHERE player_id = ? AND game_id = ? "
+                    "AND (? IS NULL OR position < ?) ORDER BY position DESC LIMIT ?",
+                    (player_id, game_id, before_position, before_position, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [json.loads(stats) for _, stats in rows]
+            before_position = rows[-1][0]
+
+    def has_history(self, player_id: str, game_id: str) -> bool:
+        """Returns whether a player's history for a game has been fetched before"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM fetched_histories WHERE player_id = ? AND game_id = ?",
+                (player_id, game_id)
+            ).fetchone()
+        return row is not None
+
+    def count(self, player_id: str, game_id: str) -> int:
+        """Returns the number of stored matches in a player's history for a game"""
+        with self._lock:
+            (num_matches,) = self._connection.execute(
+                "SELECT COUNT(*) FROM match_stats WHERE player_id = ? AND game_id = ?",
+                (player_id, game_id)
+            ).fetchone()
+        return num_matches
+
+    def contains(self, player_id: str, game_id: str, match_id: str) -> bool:
+        """Returns whether a match is stored, without loading the player's history"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM match_stats WHERE player_id = ? AND game_id = ? AND match_id = ?",
+                (player_id, game_id, match_id)
+            ).fetchone()
+        return row is not None
+
+    def newest_match_id(self, player_id: str, game_id: str) -> Optional[str]:
+        """Returns the id of a player's newest stored match for a game, None if none are stored"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT match_id FROM match_stats WHERE player_id = ? AND game_id = ? ORDER BY position DESC LIMIT 1",
+                (player_id, game_id)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def load_aggregate_state(self, player_id: str) -> Optional[bytes]:
+        """Returns the serialised aggregate state saved for a player, None if there is none"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state FROM aggregate_states WHERE player_id = ?", (player_id,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def save_aggregate_state(self, player_id: str, state: bytes) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO aggregate_states VALUES (?, ?)", (player_id, state)
+            )
+
+    def append_newest(self, player_id: str, game_id: str, match_stats: List[Dict]) -> None:
+        """Stores matches that are newer than every stored match
+
+        Args:
+            player_id (str): The player the matches belong to
+            game_id (str): cs2 or csgo
+            match_stats (List[Dict]): New stats dicts, newest first as the API returns them
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO fetched_histories VALUES (?, ?)",
+                (player_id, game_id)
+            )
+            (top_position,) = self._connection.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM match_stats WHERE player_id = ? AND game_id = ?",
+                (player_id, game_id)
+            ).fetchone()
+            # Positions count up from the oldest match, so older rows never move
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO match_stats VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        player_id,
+                        game_id,
+                        stats.get("Match Id"),
+                        top_position + len(match_stats) - index,
+                        json.dumps(stats)
+                    )
+                    for index, stats in enumerate(match_stats)
+                ]
+            )
+
+    def clear(self, player_id: str) -> None:
+        """Removes every stored match for a player"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM match_stats WHERE player_id = ?", (player_id,))
+            self._connection.execute("DELETE FROM fetched_histories WHERE player_id = ?", (player_id,))
+            self._connection.execute("DELETE FROM aggregate_states WHERE player_id = ?", (player_id,))
+
+    def close(self) -> None:
+        self._connection.close()
+
+_shared_store: Optional[MatchHistoryStore] = None
+_shared_store_lock = threading.Lock()
+
+def get_match_store() -> MatchHistoryStore:
+    """Returns the process-wide match store, e.g. the one every lookup of the app folds from"""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = MatchHistoryStore()
+    return _shared_store
+
+def configure_match_store(**store_kwargs) -> MatchHistoryStore:
+    """Replaces the process-wide match store, e.g. to keep matches in another file"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is not None:
+            _shared_store.close()
+        _shared_store = MatchHistoryStore(**store_kwargs)
+    return _shared_store
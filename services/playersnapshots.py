@@ -0,0 +1,217 @@
+from dataclasses import asdict, dataclass
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Allow access to services folder
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.cachebackends import (
+    CacheBackend,
+    SQLiteBackend,
+    backend_from_url,
+    cacheable_dataclass,
+    decode_value,
+    encode_value
+)
+from services.faceitplayerstatistics import (
+    PlayerBanInformationData,
+    PlayerFaceitDataRetrieval,
+    PlayerInformationData,
+    PlayerStatisticsAllTimeData,
+    PlayerStatisticsFirst10Data,
+    PlayerStatisticsLast20Data
+)
+from services.matchhistorystore import MatchHistoryStore
+from services.requestscheduler import Priority, RequestCounter
+from services.responsecache import DEFAULT_CACHE_POLICY, CachePolicy
+from services.steamplayerstatistics import (
+    PlayerSteamDataRetrieval,
+    PlayerSteamFriendsData,
+    PlayerSteamGameData,
+    PlayerSteamSummaryData
+)
+from utilities.config import get_settings
+from utilities.instrumentation import metrics, stage_timer
+from utilities.lazyloading import lazy_callable
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "player_snapshots.sqlite3"
+)
+# Bumped whenever PlayerSnapshot or a store it holds changes shape, older snapshots are then never read
+SNAPSHOT_VERSION = 1
+# Snapshots older than this are shown as stale, the prewarm worker refreshes watched players' sooner
+DEFAULT_STALE_AFTER = 600
+# How long a snapshot is kept at all, so a shared link still renders days later
+DEFAULT_SNAPSHOT_TTL = 30 * 24 * 3600
+
+# Imported on first use, so importing this module doesn't import numpy
+get_population_index = lazy_callable("utilities.percentileindex", "get_population_index")
+
+@cacheable_dataclass
+@dataclass
+class PlayerSnapshot:
+    """Everything the summary page renders for one player, computed once per lookup"""
+    faceit_nickname: str
+    # Unix time the lookup finished
+    taken_at: float
+    player: PlayerInformationData
+    bans: PlayerBanInformationData
+    all_time: PlayerStatisticsAllTimeData
+    last_20: PlayerStatisticsLast20Data
+    first_10: PlayerStatisticsFirst10Data
+    # None when the player has no linked Steam account
+    steam_summary: Optional[PlayerSteamSummaryData] = None
+    steam_friends: Optional[PlayerSteamFriendsData] = None
+    steam_games: Optional[PlayerSteamGameData] = None
+    version: int = SNAPSHOT_VERSION
+
+    def age_seconds(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.taken_at
+
+    def is_stale(self, stale_after: float = DEFAULT_STALE_AFTER) -> bool:
+        return self.age_seconds() > stale_after
+
+    def lookup_columns(self) -> Dict[str, List]:
+        """The player as a one row batch lookup result, e.g. to rank them in the population index"""
+        row = {"player_id": self.player.player_id, "skill_level": self.player.skill_level}
+        for prefix, store in (("all_time", self.all_time), ("last_20", self.last_20), ("first_10", self.first_10)):
+            row.update({f"{prefix}_{key}": value for key, value in asdict(store).items() if key != "player_id"})
+        return {name: [value] for name, value in row.items()}
+
+def take_snapshot(
+    faceit_nickname: str,
+    match_store: Optional[MatchHistoryStore] = None,
+    include_steam: bool = True,
+    priority: Priority = Priority.INTERACTIVE,
+    cache_policy: CachePolicy = DEFAULT_CACHE_POLICY,
+    request_counter: Optional[RequestCounter] = None
+) -> PlayerSnapshot:
+    """Looks a player up and gathers every store the summary page renders
+
+    The player also joins the process-wide population index, so they and
+    later players are ranked against everyone looked up.
+
+    Args:
+        faceit_nickname (str): The nickname of the player on faceit
+        match_store (Optional[MatchHistoryStore]): Passed on to the Faceit lookup, e.g. the
+            app's store, so only matches newer than the stored ones are fetched
+        include_steam (bool): Whether to add the player's Steam summaries
+        priority (Priority): The request scheduler lane
+        cache_policy (CachePolicy): How responses are read from the response cache,
+            e.g. refreshed when the user asks for fresh data
+        request_counter (Optional[RequestCounter]): Counts the requests the lookup sends
+
+    Raises:
+        ApiRequestError: If a request failed, e.g. a 404 for an unknown nickname
+
+    Returns:
+        PlayerSnapshot: The player's stores, taken now
+    """
+    with stage_timer("snapshot.take"):
+        faceit_data = PlayerFaceitDataRetrieval(
+            faceit_nickname,
+            match_store=match_store,
+            prefetch=True,
+            priority=priority,
+            cache_policy=cache_policy,
+            request_counter=request_counter
+        )
+        steam_stores = {}
+        steam_id = faceit_data.player_data.get("steam_id_64")
+        if include_steam and steam_id:
+            steam_data = PlayerSteamDataRetrieval(
+                steam_id,
+                prefetch=True,
+                priority=priority,
+                cache_policy=cache_policy,
+                request_counter=request_counter
+            )
+            steam_stores = {
+                "steam_summary": steam_data.player_summary_instance,
+                "steam_friends": steam_data.player_steam_friends_data_store(),
+                "steam_games": steam_data.player_steam_game_data_store()
+            }
+        snapshot = PlayerSnapshot(
+            faceit_nickname=faceit_nickname,
+            taken_at=time.time(),
+            player=faceit_data.player_data_store(),
+            bans=faceit_data.player_data_ban_store(),
+            all_time=faceit_data.player_data_stats_all_time_store(),
+            last_20=faceit_data.player_data_stats_last_20_store(),
+            first_10=faceit_data.player_data_stats_first_10_store(),
+            **steam_stores
+        )
+    get_population_index().update_columns(snapshot.lookup_columns())
+    return snapshot
+
+class SnapshotStore:
+    """Keeps each player's latest snapshot, so reruns and shared links render in one read
+
+    Snapshots are encoded like the response cache's values and kept in a
+    cache backend, so replicas given the same CACHE_URL share them. Keys
+    carry SNAPSHOT_VERSION, so a snapshot of an older shape is never read.
+    """
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = DEFAULT_SNAPSHOT_TTL) -> None:
+        """Initialises the store
+
+        Args:
+            backend (Optional[CacheBackend]): Where snapshots are kept, a SQLite file by default
+            ttl (float): Seconds a snapshot is kept after it is taken
+        """
+        self.backend = backend if backend is not None else SQLiteBackend(DEFAULT_SNAPSHOT_PATH)
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(faceit_nickname: str) -> str:
+        return f"snapshot:v{SNAPSHOT_VERSION}:{faceit_nickname}"
+
+    def get(self, faceit_nickname: str) -> Optional[PlayerSnapshot]:
+        """Returns the player's latest snapshot, None if there is none or it can't be read"""
+        with stage_timer("snapshot.read"):
+            try:
+                entry = self.backend.get(self._key(faceit_nickname))
+                snapshot = decode_value(entry[0])[0] if entry is not None else None
+            except Exception:
+                # An unreadable snapshot is only a missed shortcut, the lookup runs instead
+                metrics.count("snapshots", outcome="error")
+                return None
+        if not isinstance(snapshot, PlayerSnapshot) or snapshot.version != SNAPSHOT_VERSION:
+            metrics.count("snapshots", outcome="miss")
+            return None
+        metrics.count("snapshots", outcome="hit")
+        return snapshot
+
+    def put(self, snapshot: PlayerSnapshot) -> None:
+        self.backend.set(self._key(snapshot.faceit_nickname), encode_value(snapshot), self.ttl)
+
+    def delete(self, faceit_nickname: str) -> None:
+        self.backend.delete(self._key(faceit_nickname))
+
+    def close(self) -> None:
+        self.backend.close()
+
+_shared_store: Optional[SnapshotStore] = None
+_shared_store_lock = threading.Lock()
+
+def get_snapshot_store() -> SnapshotStore:
+    """Returns the process-wide snapshot store, creating it on first use"""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                # Shared between replicas with the response cache's CACHE_URL, a local file otherwise
+                _shared_store = SnapshotStore(backend=backend_from_url(get_settings().cache_url))
+    return _shared_store
+
+def configure_snapshot_store(**store_kwargs) -> SnapshotStore:
+    """Replaces the process-wide snapshot store, e.g. to keep snapshots in another backend"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is not None:
+            _shared_store.close()
+        _shared_store = SnapshotStore(**store_kwargs)
+    return _shared_store
@@ -0,0 +1,279 @@
+import argparse
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Allow access to services folder
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.matchhistorystore import MatchHistoryStore
+from services.playersnapshots import DEFAULT_STALE_AFTER, SnapshotStore, get_snapshot_store, take_snapshot
+from services.requestscheduler import Priority, RateLimit, RequestCounter, TokenBucket
+from services.responsecache import CachePolicy
+from utilities.instrumentation import metrics, stage_timer
+from utilities.lazyloading import lazy_callable
+
+DEFAULT_WATCHLIST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "watchlist.json"
+)
+# A minute ahead of the page showing a snapshot as stale, so watched players' never are
+DEFAULT_REFRESH_INTERVAL = DEFAULT_STALE_AFTER - 60
+# Imported on first use, so importing this module doesn't import numpy
+save_population_index = lazy_callable("utilities.percentileindex", "save_population_index")
+# Seconds between saves of the population index, which every lookup in the process adds to
+DEFAULT_INDEX_SAVE_INTERVAL = 60
+# Background refreshes spend at most a tenth of the Faceit key's 10,000 requests an hour
+DEFAULT_PREWARM_BUDGET = RateLimit(requests_per_second=1000 / 3600, burst=250)
+
+class Watchlist:
+    """The nicknames moderators keep an eye on, saved to a JSON file
+
+    The file is re-read whenever another process changes it, so the app and a
+    separate worker process can share one watchlist.
+    """
+    def __init__(self, path: str = DEFAULT_WATCHLIST_PATH) -> None:
+        """Loads the watchlist, which starts empty if the file does not exist
+
+        Args:
+            path (str): Location of the JSON file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._nicknames: List[str] = []
+        self._loaded_mtime: Optional[float] = None
+        self._reload_if_changed()
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return
+        if mtime != self._loaded_mtime:
+            with open(self.path, encoding="utf-8") as file:
+                self._nicknames = json.load(file)
+            self._loaded_mtime = mtime
+
+    def __contains__(self, faceit_nickname: str) -> bool:
+        return faceit_nickname in self.nicknames()
+
+    def nicknames(self) -> List[str]:
+        with self._lock:
+            self._reload_if_changed()
+            return list(self._nicknames)
+
+    def add(self, faceit_nickname: str) -> None:
+        with self._lock:
+            self._reload_if_changed()
+            if faceit_nickname not in self._nicknames:
+                self._nicknames.append(faceit_nickname)
+                self._save()
+
+    def remove(self, faceit_nickname: str) -> None:
+        with self._lock:
+            self._reload_if_changed()
+            if faceit_nickname in self._nicknames:
+                self._nicknames.remove(faceit_nickname)
+                self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Written to a temporary file first, so a reader never sees half a list
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(self._nicknames, file)
+        os.replace(temporary_path, self.path)
+        self._loaded_mtime = os.path.getmtime(self.path)
+
+class PrewarmWorker:
+    """Refreshes watched players in the background so their lookups are served warm
+
+    Each refresh takes a new snapshot of a player, re-fetching their profile,
+    bans, newest match pages and Steam data in the BACKGROUND lane, so
+    interactive lookups go first. The snapshot is saved to the snapshot store
+    for the summary page to render, the responses are kept in the response
+    cache until the next refresh is due and the matches are appended to the
+    match store, so a lookup of a watched player made with the same store
+    sends no requests at all.
+
+    Refreshes are paced by an API budget: a player is only refreshed while
+    the budget has tokens left, and afterwards the requests it actually sent
+    are taken from the budget.
+
+    The worker also saves the process-wide population index, which refreshes
+    and the page's lookups add players to, every index_save_interval and
+    when stopped, so no lookup waits for it to be written.
+    """
+    def __init__(
+        self,
+        watchlist: Watchlist,
+        match_store: Optional[MatchHistoryStore] = None,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        budget: RateLimit = DEFAULT_PREWARM_BUDGET,
+        include_steam: bool = True,
+        snapshot_store: Optional[SnapshotStore] = None,
+        index_save_interval: float = DEFAULT_INDEX_SAVE_INTERVAL
+    ) -> None:
+        """Initialises the worker, call start to run it in a thread
+
+        Args:
+            watchlist (Watchlist): The players to keep warm
+            match_store (Optional[MatchHistoryStore]): Where refreshed matches are stored,
+                interactive lookups must pass the same store to be served from it
+            refresh_interval (float): Seconds between refreshes of the same player
+            budget (RateLimit): Background requests allowed per second, and in a burst
+            include_steam (bool): Whether to also refresh each player's Steam data
+            snapshot_store (Optional[SnapshotStore]): Where refreshed snapshots are saved,
+                the summary page reads them from the process-wide store
+            index_save_interval (float): Seconds between saves of the population index
+        """
+        self.watchlist = watchlist
+        self.match_store = match_store
+        self.refresh_interval = refresh_interval
+        self.include_steam = include_steam
+        self.snapshot_store = snapshot_store
+        self.index_save_interval = index_save_interval
+        self.budget = TokenBucket(budget)
+        # Keep responses until just after the next refresh is due
+        self.cache_policy = CachePolicy(ttl=2 * refresh_interval, refresh=True)
+        # nickname -> time.monotonic() of its last successful refresh
+        self.last_refreshed: Dict[str, float] = {}
+        # nickname -> the error of its last failed refresh
+        self.last_errors: Dict[str, str] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def due_nicknames(self) -> List[str]:
+        """Watched players whose refresh is due, the longest waiting first"""
+        now = time.monotonic()
+        due = [
+            nickname for nickname in self.watchlist.nicknames()
+            if now - self.last_refreshed.get(nickname, float("-inf")) >= self.refresh_interval
+        ]
+        return sorted(due, key=lambda nickname: self.last_refreshed.get(nickname, float("-inf")))
+
+    def refresh(self, faceit_nickname: str) -> int:
+        """Takes a new snapshot of one player, re-fetching them into the response cache and match store
+
+        Returns:
+            int: The requests this refresh sent, including retries
+        """
+        # Counted per refresh, so other background requests in the process aren't billed to the budget
+        request_counter = RequestCounter()
+        with stage_timer("prewarm.refresh"):
+            # The match walk starts at offset 0, so the newest pages land first
+            snapshot = take_snapshot(
+                faceit_nickname,
+                match_store=self.match_store,
+                include_steam=self.include_steam,
+                priority=Priority.BACKGROUND,
+                cache_policy=self.cache_policy,
+                request_counter=request_counter
+            )
+        if self.snapshot_store is not None:
+            self.snapshot_store.put(snapshot)
+        return request_counter.count
+
+    def run_once(self) -> List[str]:
+        """Refreshes every due player the budget allows
+
+        Returns:
+            List[str]: The nicknames refreshed
+        """
+        refreshed = []
+        for nickname in self.due_nicknames():
+            if self._stop_event.is_set() or self.budget.wait_time(time.monotonic()) > 0:
+                break
+            try:
+                requests_sent = self.refresh(nickname)
+            except Exception as error:
+                self.last_errors[nickname] = f"{type(error).__name__}: {error}"
+                metrics.count("prewarm_refreshes", outcome="error")
+                # Retried at the next interval rather than straight away
+                self.last_refreshed[nickname] = time.monotonic()
+                continue
+            self.budget.consume(time.monotonic(), requests_sent)
+            self.last_refreshed[nickname] = time.monotonic()
+            self.last_errors.pop(nickname, None)
+            metrics.count("prewarm_refreshes", outcome="ok")
+            metrics.count("prewarm_requests", requests_sent)
+            refreshed.append(nickname)
+        return refreshed
+
+    def _run(self, poll_interval: float) -> None:
+        last_index_save = time.monotonic()
+        while not self._stop_event.is_set():
+            self.run_once()
+            if time.monotonic() - last_index_save >= self.index_save_interval:
+                # Skipped when no player was added since the last save
+                save_population_index()
+                last_index_save = time.monotonic()
+            self._stop_event.wait(poll_interval)
+
+    def start(self, poll_interval: float = 5) -> "PrewarmWorker":
+        """Runs the worker in a daemon thread until stop is called
+
+        Args:
+            poll_interval (float): Seconds between checks for due players
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(poll_interval,),
+                name="prewarm-worker",
+                daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the worker once its current refresh finishes, then saves the population index"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        save_population_index()
+
+_shared_watchlist: Optional[Watchlist] = None
+_shared_watchlist_lock = threading.Lock()
+
+def get_watchlist() -> Watchlist:
+    """Returns the process-wide watchlist, read from DEFAULT_WATCHLIST_PATH"""
+    global _shared_watchlist
+    if _shared_watchlist is None:
+        with _shared_watchlist_lock:
+            if _shared_watchlist is None:
+                _shared_watchlist = Watchlist()
+    return _shared_watchlist
+
+def configure_watchlist(**watchlist_kwargs) -> Watchlist:
+    """Replaces the process-wide watchlist, e.g. to read it from another file"""
+    global _shared_watchlist
+    with _shared_watchlist_lock:
+        _shared_watchlist = Watchlist(**watchlist_kwargs)
+    return _shared_watchlist
+
+if __name__ == "__main__":
+    # Warms the snapshot and match stores the app reads, and the response cache too when CACHE_URL shares it
+    parser = argparse.ArgumentParser(description="Keeps watched players' snapshots and match histories up to date")
+    parser.add_argument("--watchlist", default=DEFAULT_WATCHLIST_PATH)
+    parser.add_argument("--interval", type=float, default=DEFAULT_REFRESH_INTERVAL)
+    parser.add_argument("--requests-per-hour", type=float, default=1000)
+    args = parser.parse_args()
+
+    worker = PrewarmWorker(
+        Watchlist(args.watchlist),
+        match_store=MatchHistoryStore(),
+        refresh_interval=args.interval,
+        budget=RateLimit(requests_per_second=args.requests_per_hour / 3600, burst=args.requests_per_hour / 4),
+        snapshot_store=get_snapshot_store()
+    )
+    worker.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        worker.stop()
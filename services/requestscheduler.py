@@ -0,0 +1,270 @@
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+# Allow access to services folder
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.httptransport import HttpTransport, get_shared_transport
+
+class Priority(IntEnum):
+    """Request lanes, lower values are sent first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+@dataclass
+class RateLimit:
+    """A sustained request rate and the burst allowed above it"""
+    requests_per_second: float
+    burst: float
+
+# Faceit allows 10,000 requests an hour per key, Steam 100,000 a day per key
+DEFAULT_KEY_LIMITS = {
+    "open.faceit.com": RateLimit(requests_per_second=2.75, burst=100),
+    "api.steampowered.com": RateLimit(requests_per_second=1.15, burst=100)
+}
+DEFAULT_HOST_LIMITS = {
+    "open.faceit.com": RateLimit(requests_per_second=20, burst=40),
+    "api.steampowered.com": RateLimit(requests_per_second=10, burst=20)
+}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class RetryableResponseError(requests.exceptions.HTTPError):
+    """A rate limited or temporarily failing response, raised so it can be retried"""
+    def __init__(self, response: requests.Response, retry_after: Optional[float]) -> None:
+        super().__init__(
+            f"{response.status_code} Error: {response.reason} for url: {response.url}",
+            response=response
+        )
+        self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converts a Retry-After header, in seconds or as an HTTP date, to seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Allows requests_per_second on average with bursts of up to burst requests"""
+    def __init__(self, limit: RateLimit) -> None:
+        self.limit = limit
+        self.tokens = limit.burst
+        self.updated_at = time.monotonic()
+        # Set by a 429 response, no tokens are handed out before this time
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.limit.burst, self.tokens + elapsed * self.limit.requests_per_second)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available"""
+        self._refill(now)
+        token_wait = max(1 - self.tokens, 0) / self.limit.requests_per_second
+        return max(token_wait, self.blocked_until - now, 0.0)
+
+    def consume(self, now: float, tokens: float = 1) -> None:
+        self._refill(now)
+        self.tokens -= tokens
+
+    def block_for(self, seconds: float, now: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0
+
+class RequestCounter:
+    """Counts the requests sent for one caller, including retries, e.g. to bill a prewarm refresh to its budget
+
+    Passed down to the scheduler by the retrieval classes, so requests other
+    callers send at the same time are not counted.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, amount: int = 1) -> None:
+        with self._lock:
+            self.count += amount
+
+class RequestScheduler:
+    """Paces requests to stay within each API's quota
+
+    Every request takes a token from a bucket for its host and one for its
+    API key. Waiting requests are released in priority order per host, so
+    interactive lookups go ahead of background refreshes. 429 responses drain
+    the buckets until their Retry-After has passed, and retryable failures are
+    retried with jittered exponential backoff.
+    """
+    def __init__(
+        self,
+        host_limits: Optional[Dict[str, RateLimit]] = None,
+        key_limits: Optional[Dict[str, RateLimit]] = None,
+        max_attempts: int = 5,
+        max_backoff: float = 30
+    ) -> None:
+        """Initialises the scheduler
+
+        Args:
+            host_limits (Optional[Dict[str, RateLimit]]): host -> limit shared by every key
+            key_limits (Optional[Dict[str, RateLimit]]): host -> limit of each API key on that host
+            max_attempts (int): Attempts per request, including the first
+            max_backoff (float): Upper bound in seconds on the wait between attempts
+        """
+        self.host_limits = DEFAULT_HOST_LIMITS if host_limits is None else host_limits
+        self.key_limits = DEFAULT_KEY_LIMITS if key_limits is None else key_limits
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self._condition = threading.Condition()
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        # host -> heap of (priority, arrival order) of waiting requests
+        self._waiting: Dict[str, list] = {}
+        self._arrivals = itertools.count()
+        self.rate_limited_count = 0
+        # Requests sent per lane, including retries
+        self.sent_counts: Dict[Priority, int] = {priority: 0 for priority in Priority}
+
+    def _bucket(self, host: str, api_key: str) -> Optional[TokenBucket]:
+        """Returns the bucket for a host when api_key is empty, or for an API key on a host
+
+        Hosts without a configured limit, e.g. a local stand-in server, are not paced.
+        """
+        bucket = self._buckets.get((host, api_key))
+        if bucket is None:
+            limit = (self.key_limits if api_key else self.host_limits).get(host)
+            if limit is None:
+                return None
+            bucket = TokenBucket(limit)
+            self._buckets[(host, api_key)] = bucket
+        return bucket
+
+    @staticmethod
+    def _api_key_of(url: str, headers: Optional[Dict[str, str]]) -> str:
+        """Finds the API key of a request, the Faceit bearer or Steam's key parameter"""
+        if headers and headers.get("Authorization"):
+            return headers["Authorization"]
+        return parse_qs(urlparse(url).query).get("key", [""])[0]
+
+    def acquire(self, host: str, api_key: str, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Blocks until the request may be sent"""
+        with self._condition:
+            waiting = self._waiting.setdefault(host, [])
+            ticket = (int(priority), next(self._arrivals))
+            heapq.heappush(waiting, ticket)
+            buckets = [
+                bucket for bucket in {self._bucket(host, ""), self._bucket(host, api_key)}
+                if bucket is not None
+            ]
+            while True:
+                now = time.monotonic()
+                wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+                if waiting[0] == ticket and wait == 0:
+                    heapq.heappop(waiting)
+                    for bucket in buckets:
+                        bucket.consume(now)
+                    self.sent_counts[Priority(priority)] += 1
+                    # Let the next request in line re-check the buckets
+                    self._condition.notify_all()
+                    return
+                self._condition.wait(timeout=wait if waiting[0] == ticket else None)
+
+    def report_rate_limited(self, host: str, api_key: str, retry_after: Optional[float]) -> None:
+        """Holds back every request to a host and key after a 429 response"""
+        with self._condition:
+            self.rate_limited_count += 1
+            bucket = self._bucket(host, api_key) or self._bucket(host, "")
+            if bucket is not None:
+                bucket.block_for(retry_after or 1.0, time.monotonic())
+            self._condition.notify_all()
+
+    def _wait_before_retry(self, retry_state) -> float:
+        """Waits for Retry-After when the API sent one, otherwise backs off with jitter"""
+        backoff = wait_random_exponential(multiplier=0.5, max=self.max_backoff)(retry_state)
+        error = retry_state.outcome.exception()
+        if isinstance(error, RetryableResponseError) and error.retry_after is not None:
+            return min(max(error.retry_after, backoff), self.max_backoff)
+        return backoff
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        transport: Optional[HttpTransport] = None,
+        counter: Optional[RequestCounter] = None
+    ) -> requests.Response:
+        """Sends a GET request once the rate limits allow, retrying retryable failures
+
+        Args:
+            url (str): The endpoint URL
+            headers (Optional[Dict[str, str]]): Headers of the request
+            priority (Priority): The lane the request waits in
+            transport (Optional[HttpTransport]): Defaults to the process-wide transport
+            counter (Optional[RequestCounter]): Counts every attempt sent for this request
+
+        Raises:
+            RetryableResponseError: If the request still failed after max_attempts
+            requests.exceptions.RequestException: If the connection failed after max_attempts
+
+        Returns:
+            requests.Response: The response, which may still hold a non-retryable error status
+        """
+        transport = transport or get_shared_transport()
+        host = urlparse(url).netloc
+        api_key = self._api_key_of(url, headers)
+        for attempt in Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=self._wait_before_retry,
+            retry=retry_if_exception_type((
+                RetryableResponseError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout
+            )),
+            reraise=True
+        ):
+            with attempt:
+                self.acquire(host, api_key, priority)
+                if counter is not None:
+                    counter.add()
+                response = transport.get(url, headers=headers)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status_code == 429:
+                        self.report_rate_limited(host, api_key, retry_after)
+                    raise RetryableResponseError(response, retry_after)
+        return response
+
+_shared_scheduler: Optional[RequestScheduler] = None
+_shared_scheduler_lock = threading.Lock()
+
+def get_request_scheduler() -> RequestScheduler:
+    """Returns the process-wide scheduler, creating it on first use"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        with _shared_scheduler_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = RequestScheduler()
+    return _shared_scheduler
+
+def configure_request_scheduler(**scheduler_kwargs) -> RequestScheduler:
+    """Replaces the process-wide scheduler, e.g. to change the limits for a batch job"""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        _shared_scheduler = RequestScheduler(**scheduler_kwargs)
+    return _shared_scheduler
@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Allow access to utilities folder
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.cachebackends import CacheBackend, backend_from_url, decode_value, encode_value
+from utilities.config import get_settings
+from utilities.instrumentation import metrics
+
+# (pattern searched in the endpoint, seconds a response stays fresh), first match wins
+DEFAULT_TTL_RULES: List[Tuple[str, float]] = [
+    # Match pages pinned to the newest match they were fetched behind never change
+    (r"/games/[^/]+/stats\?.*#head=", 7 * 24 * 3600),
+    (r"/games/[^/]+/stats\?", 60),
+    # Profile, elo and skill level
+    (r"/data/v4/players\?nickname=", 60),
+    (r"/data/v4/players/[^/]+/bans", 600),
+    (r"/GetPlayerSummaries/", 300),
+    (r"/GetOwnedGames/", 6 * 3600),
+    (r"/GetFriendList/", 6 * 3600)
+]
+DEFAULT_TTL = 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How a lookup reads and writes the response cache"""
+    # Overrides the endpoint's TTL for stored responses, e.g. to keep prewarmed data until the next refresh
+    ttl: Optional[float] = None
+    # Fetch even when a fresh response is cached, and store the new one
+    refresh: bool = False
+
+DEFAULT_CACHE_POLICY = CachePolicy()
+
+class ResponseCache:
+    """A process-wide cache of decoded API responses
+
+    Entries expire after a per-endpoint TTL and the least recently used ones
+    are evicted once the cached response bodies exceed max_bytes. Concurrent
+    requests for the same key are coalesced into a single upstream call.
+
+    With a backend, misses are looked up there before fetching and fetched
+    values are written there too, so replicas sharing the backend fetch each
+    response once between them. A backend that fails counts as a miss.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_rules: Optional[List[Tuple[str, float]]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        backend: Optional[CacheBackend] = None
+    ) -> None:
+        """Initialises an empty cache
+
+        Args:
+            max_bytes (int): Upper bound on the summed size of cached response bodies
+            ttl_rules (Optional[List[Tuple[str, float]]]): Endpoint patterns and their TTLs
+            default_ttl (float): TTL of endpoints that match no rule
+            backend (Optional[CacheBackend]): A cache shared with other processes, none by default
+        """
+        self.max_bytes = max_bytes
+        self.ttl_rules = [
+            (re.compile(pattern), ttl) for pattern, ttl in (ttl_rules or DEFAULT_TTL_RULES)
+        ]
+        self.default_ttl = default_ttl
+        self.backend = backend
+        self._lock = threading.Lock()
+        # key -> (value, size, expires_at), oldest use first
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._size = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "backend_hits": 0,
+            "backend_errors": 0
+        }
+
+    def ttl_for(self, key: str) -> float:
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(key):
+                return ttl
+        return self.default_ttl
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Tuple[Any, Optional[int]]],
+        policy: CachePolicy = DEFAULT_CACHE_POLICY
+    ) -> Any:
+        """Returns the cached value for key, calling fetch on a miss
+
+        Args:
+            key (str): Usually the endpoint URL
+            fetch (Callable[[], Tuple[Any, Optional[int]]]): Returns the value and the size
+                of its response body, or a size of None when the value must not be cached,
+                e.g. an error response
+            policy (CachePolicy): Overrides the TTL or forces a refresh
+
+        Returns:
+            Any: The cached or freshly fetched value
+        """
+        with self._lock:
+            entry = None if policy.refresh else self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    metrics.count("response_cache", outcome="hit")
+                    return value
+                self._remove(key)
+                self._counters["expirations"] += 1
+
+            in_flight = self._in_flight.get(key)
+            is_leader = in_flight is None
+            if is_leader:
+                self._counters["misses"] += 1
+                metrics.count("response_cache", outcome="miss")
+                in_flight = Future()
+                self._in_flight[key] = in_flight
+            else:
+                self._counters["coalesced"] += 1
+                metrics.count("response_cache", outcome="coalesced")
+        if not is_leader:
+            # Another thread is already fetching this key, share its result
+            return in_flight.result()
+
+        try:
+            shared = None if policy.refresh else self._backend_get(key)
+            if shared is not None:
+                value, size, ttl = shared
+                # Kept locally no longer than the backend keeps it
+                policy = CachePolicy(ttl=ttl if policy.ttl is None else min(ttl, policy.ttl))
+            else:
+                value, size = fetch()
+                if size is not None:
+                    self._backend_set(key, value, policy.ttl)
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.set_exception(error)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            if size is not None:
+                self._store(key, value, size, policy.ttl)
+        in_flight.set_result(value)
+        return value
+
+    def put(self, key: str, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        """Stores a value fetched outside get_or_fetch"""
+        with self._lock:
+            self._store(key, value, size, ttl)
+        self._backend_set(key, value, ttl)
+
+    def _backend_get(self, key: str) -> Optional[Tuple[Any, int, float]]:
+        """Returns (value, size, remaining ttl) from the backend, None on a miss or error"""
+        if self.backend is None:
+            return None
+        try:
+            entry = self.backend.get(key)
+            if entry is None:
+                return None
+            data, ttl = entry
+            value, size = decode_value(data)
+        except Exception as error:
+            self._count_backend_error("get", error)
+            return None
+        with self._lock:
+            self._counters["backend_hits"] += 1
+        metrics.count("response_cache", outcome="backend_hit")
+        return value, size, ttl
+
+    def _backend_set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, encode_value(value), self.ttl_for(key) if ttl is None else ttl)
+        except Exception as error:
+            self._count_backend_error("set", error)
+
+    def _count_backend_error(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self._counters["backend_errors"] += 1
+        metrics.count("cache_backend_errors", operation=operation, error=type(error).__name__)
+
+    def _store(self, key: str, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        ttl = self.ttl_for(key) if ttl is None else ttl
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self._size += size
+        while self._size > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def clear(self, include_backend: bool = False) -> None:
+        """Empties the cache, and the shared backend too when include_backend"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if include_backend and self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, miss, coalesced, eviction and expiration counters and current size"""
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "bytes": self._size}
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide response cache, creating it on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                # e.g. CACHE_URL=redis://cache:6379/0 shares the cache between replicas
+                _shared_cache = ResponseCache(backend=backend_from_url(get_settings().cache_url))
+    return _shared_cache
+
+def configure_response_cache(**cache_kwargs) -> ResponseCache:
+    """Replaces the process-wide response cache, e.g. to give it a backend shared with other processes"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is not None and _shared_cache.backend is not None:
+            _shared_cache.backend.close()
+        _shared_cache = ResponseCache(**cache_kwargs)
+    return _shared_cache
@@ -1,21 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import datetime
 import os
+import re
 import requests
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from dotenv import load_dotenv
-from glom import glom
-import streamlit as st
 
 # Allow access to utilities folder
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utilities.steamstatisticscalculations import unixtime_to_date, get_steam_games_stats
+from services.apierrors import ApiRequestError
+from services.cachebackends import cacheable_dataclass
+from services.requestscheduler import Priority, RequestCounter, get_request_scheduler
+from services.responsecache import DEFAULT_CACHE_POLICY, CachePolicy, get_response_cache
+from utilities.config import get_settings
+from utilities.instrumentation import instrumented, metrics, stage_timer
+from utilities.lazyloading import lazy_callable, lazy_property
+from utilities.steamstatisticscalculations import account_age_mins, get_steam_games_stats, unixtime_to_date
+
+# Imported on first use, so importing this module stays cheap
+glom = lazy_callable("glom", "glom")
+
+# The key query parameter of a Steam endpoint, with the & joining it to the next one
+_KEY_PARAMETER = re.compile(r"(?<=[?&])key=[^&]*&?")
 
 @dataclass
 class SteamEndpoints:
     """API Endpoints that retreive relevant player steam information"""
+    # steam_id may be up to 100 comma separated steamids
     player_summary = """
         http://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/?key={steam_key}&steamids={steam_id}
     """
@@ -26,19 +39,22 @@ class SteamEndpoints:
     http://api.steampowered.com/ISteamUser/GetFriendList/v1/?key={steam_key}&steamid={steam_id}&relationship=friend
     """
 
+@cacheable_dataclass
 @dataclass
 class PlayerSteamSummaryData:
     "A store for summary information about a player's steam profile"
     steam_id: int
     is_private: bool
     is_private_gamedata: bool
-    created_at: Optional[datetime.datetime] = None
+    created_at: Optional[datetime.date] = None
 
+@cacheable_dataclass
 @dataclass
 class PlayerSteamFriendsData:
     steam_id: int
     num_steam_friends: Optional[int] = None
 
+@cacheable_dataclass
 @dataclass
 class PlayerSteamGameData:
     steam_id: int
@@ -51,40 +67,99 @@ class PlayerSteamGameData:
 
 class PlayerSteamDataRetrieval:
     """Handles the retrieval of a player's steam data."""
+    # GetPlayerSummaries accepts at most this many steamids per call
+    max_summaries_per_request = 100
+
     def __init__(
         self,
-        steam_id: int
+        steam_id: int,
+        player_summary_data: Optional[Dict] = None,
+        prefetch: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        cache_policy: CachePolicy = DEFAULT_CACHE_POLICY,
+        request_counter: Optional[RequestCounter] = None
     ) -> None:
+        """Initialises the class and its attributes
+
+        Each endpoint is requested on first access and kept for later calls.
+
+        Args:
+            steam_id (int): The player's 64 bit steam id
+            player_summary_data (Optional[Dict]): A GetPlayerSummaries response already
+                fetched for this player, e.g. by player_summaries_batch
+            prefetch (bool): Whether to request every endpoint now rather than on first access
+            priority (Priority): The request scheduler lane, background refreshes yield
+                to interactive lookups
+            cache_policy (CachePolicy): How responses are read from and written to the
+                response cache, e.g. refreshed by the prewarm worker
+            request_counter (Optional[RequestCounter]): Counts the requests this lookup sends,
+                e.g. to bill a prewarm refresh to its budget
+        """
         self.steam_id = steam_id
+        self.priority = priority
+        self.cache_policy = cache_policy
+        self.request_counter = request_counter
         self.steam_key = self._initialise_api_key()
-        self.player_summary_data = (
-            self
-            ._request_data(SteamEndpoints.player_summary
-                .format(
-                    steam_key=self.steam_key,
-                    steam_id=self.steam_id
-                )
-            )
+        if player_summary_data:
+            self.player_summary_data = player_summary_data
+        if prefetch:
+            self.prefetch()
+
+    def prefetch(self) -> None:
+        """Requests every endpoint at the same time, e.g. for the dashboard which renders all of them"""
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            for future in [
+                executor.submit(lambda: self.player_summary_data),
+                executor.submit(lambda: self.player_games_data),
+                executor.submit(lambda: self.player_friends_data)
+            ]:
+                future.result()
+
+    @lazy_property
+    def player_summary_data(self) -> Dict:
+        return self._request_data(SteamEndpoints.player_summary
+            .format(
+                steam_key=self.steam_key,
+                steam_id=self.steam_id
+            ),
+            priority=self.priority,
+            cache_policy=self.cache_policy,
+            request_counter=self.request_counter
         )
-        self.player_games_data = (
-            self
-            ._request_data(SteamEndpoints.player_games
-                .format(
-                    steam_key=self.steam_key,
-                    steam_id=self.steam_id
-                )
-            )
+
+    @lazy_property
+    def player_games_data(self) -> Dict:
+        return self._request_data(SteamEndpoints.player_games
+            .format(
+                steam_key=self.steam_key,
+                steam_id=self.steam_id
+            ),
+            priority=self.priority,
+            cache_policy=self.cache_policy,
+            request_counter=self.request_counter
         )
-        self.player_friends_data = (
-            self
-            ._request_data(SteamEndpoints.player_friends
+
+    @lazy_property
+    def player_friends_data(self) -> Dict:
+        try:
+            return self._request_data(SteamEndpoints.player_friends
                 .format(
                     steam_key=self.steam_key,
                     steam_id=self.steam_id
-                )
+                ),
+                priority=self.priority,
+                cache_policy=self.cache_policy,
+                request_counter=self.request_counter
             )
-        )
-        self.player_summary_instance = self.player_steam_summary_data_store()
+        except ApiRequestError as error:
+            # Steam answers 401 for a private friends list, which is read as no friends
+            if error.status_code != 401:
+                raise
+            return {}
+
+    @lazy_property
+    def player_summary_instance(self) -> PlayerSteamSummaryData:
+        return self.player_steam_summary_data_store()
 
     @staticmethod
     def _initialise_api_key() -> str:
@@ -96,34 +171,86 @@ class PlayerSteamDataRetrieval:
         Returns:
             str: The steam_key used in the API endpoint
         """
-        load_dotenv()
-        key = os.getenv("STEAM_KEY")
+        key = get_settings().steam_key
         if not key:
             raise KeyError("Environment Variable 'STEAM_KEY' does not exist")
         return key
 
+    @classmethod
+    def player_summaries_batch(
+        cls,
+        steam_ids: Iterable[int],
+        priority: Priority = Priority.INTERACTIVE
+    ) -> Dict[str, Dict]:
+        """Fetches many players' summaries with one GetPlayerSummaries call per 100 steamids
+
+        Args:
+            steam_ids (Iterable[int]): The players' 64 bit steam ids
+            priority (Priority): The request scheduler lane
+
+        Returns:
+            Dict[str, Dict]: steam id -> a GetPlayerSummaries response holding only that player,
+                the shape PlayerSteamDataRetrieval expects as player_summary_data
+        """
+        steam_key = cls._initialise_api_key()
+        unique_steam_ids = list(dict.fromkeys(str(steam_id) for steam_id in steam_ids))
+        summaries = {}
+        for start in range(0, len(unique_steam_ids), cls.max_summaries_per_request):
+            chunk = unique_steam_ids[start:start + cls.max_summaries_per_request]
+            response = cls._request_data(
+                SteamEndpoints.player_summary.format(steam_key=steam_key, steam_id=",".join(chunk)),
+                priority=priority
+            )
+            for player in glom(response, "response.players", default=[]):
+                summaries[str(player.get("steamid"))] = {"response": {"players": [player]}}
+        return summaries
+
+    @staticmethod
+    @instrumented
     def _request_data(
-        self,
-        endpoint: str
-    ) -> requests.Response:
+        endpoint: str,
+        priority: Priority = Priority.INTERACTIVE,
+        cache_policy: CachePolicy = DEFAULT_CACHE_POLICY,
+        request_counter: Optional[RequestCounter] = None
+    ) -> Dict:
+        """Returns the response of the provided API endpoint through the process-wide response cache"""
+        # strip method is needed due to formatting of multi-line strings
+        endpoint = endpoint.strip()
+        # Keyed without the API key, which would otherwise be written in plain text to a shared backend
+        cache_key = _KEY_PARAMETER.sub("", endpoint).rstrip("?&")
+        return get_response_cache().get_or_fetch(
+            cache_key,
+            lambda: PlayerSteamDataRetrieval._send_request(endpoint, priority, request_counter),
+            cache_policy
+        )
+
+    @staticmethod
+    @instrumented
+    def _send_request(
+        endpoint: str,
+        priority: Priority = Priority.INTERACTIVE,
+        request_counter: Optional[RequestCounter] = None
+    ) -> Tuple[Dict, Optional[int]]:
+        """Sends a request to the provided API endpoint
+
+        Raises:
+            ApiRequestError: If the request failed after any retries
+
+        Returns:
+            Tuple[Dict, Optional[int]]: The decoded response and the size of its body
+        """
         try:
-            response_api = requests.get(
-                # strip method is needed due to formatting of multi-line strings
-                endpoint.strip(),
-                timeout=20
-            )
+            # The scheduler paces requests to the rate limits and retries 429s and 5xxs
+            response_api = get_request_scheduler().get(endpoint, priority=priority, counter=request_counter)
             response_api.raise_for_status()
-        # Handle errors and present to user on front-end
-        except requests.exceptions.HTTPError as http_error:
-            st.error(f"Http Error: {http_error}")
-        except requests.exceptions.ConnectionError as conn_error:
-            st.error(f"Error Connecting: {conn_error}")
-        except requests.exceptions.Timeout as timeout_error:
-            st.error(f"Timeout Error: {timeout_error}")
-        except requests.exceptions.RequestException as req_error:
-            st.error(f"An Error Occurred: {req_error}")
-        return response_api.json()
+            metrics.count("bytes_received", len(response_api.content), api="steam")
+            with stage_timer("steam.json_decode"):
+                return response_api.json(), len(response_api.content)
+        # Left to the caller to present, failed responses are never cached
+        except requests.exceptions.RequestException as request_error:
+            raise ApiRequestError.from_request_exception("steam", request_error) from request_error
 
+    @instrumented
     def player_steam_summary_data_store(self) -> PlayerSteamSummaryData:
         """Inserts the player's steam summary information into the PlayerSteamData dataclass"""
         is_private_steam = any([
@@ -160,11 +287,9 @@ class PlayerSteamDataRetrieval:
             created_at=steam_created_at
         )
 
+    @instrumented
     def player_steam_friends_data_store(self) -> PlayerSteamFriendsData:
-        if any([
-            self.player_summary_instance.is_private,
-            self.player_summary_instance.is_private_gamedata
-        ]):
+        if self._has_private_games:
             return PlayerSteamFriendsData(steam_id=self.steam_id)
 
         num_steam_friends = len(glom(
@@ -177,11 +302,9 @@ class PlayerSteamDataRetrieval:
             num_steam_friends=num_steam_friends
         )
 
+    @instrumented
     def player_steam_game_data_store(self) -> PlayerSteamGameData:
-        if any([
-            self.player_summary_instance.is_private,
-            self.player_summary_instance.is_private_gamedata
-        ]):
+        if self._has_private_games:
             return PlayerSteamGameData(steam_id=self.steam_id)
 
         return PlayerSteamGameData(
@@ -192,6 +315,36 @@ class PlayerSteamDataRetrieval:
             )
         )
 
+    @property
+    def _has_private_games(self) -> bool:
+        return self.player_summary_instance.is_private or self.player_summary_instance.is_private_gamedata
+
+    @staticmethod
+    @instrumented
+    def player_steam_game_data_stores(steam_data: List["PlayerSteamDataRetrieval"]) -> List[PlayerSteamGameData]:
+        """player_steam_game_data_store for many players, with every public library's stats in one batched pass
+
+        Args:
+            steam_data (List[PlayerSteamDataRetrieval]): The players, e.g. the Steam lookups of a batch
+
+        Returns:
+            List[PlayerSteamGameData]: One store per player, in the order given
+        """
+        # numpy is only imported once a batch is wrangled
+        from utilities.steamgamesanalytics import OwnedGamesColumns, owned_games_stats
+        public = [index for index, player in enumerate(steam_data) if not player._has_private_games]
+        games_stats = owned_games_stats(
+            OwnedGamesColumns.from_responses(steam_data[index].player_games_data for index in public),
+            [account_age_mins(steam_data[index].player_summary_instance.created_at) for index in public]
+        )
+        stores = [PlayerSteamGameData(steam_id=player.steam_id) for player in steam_data]
+        for row, index in enumerate(public):
+            stores[index] = PlayerSteamGameData(
+                steam_id=steam_data[index].steam_id,
+                **{key: values[row].item() for key, values in games_stats.items()}
+            )
+        return stores
+
 # steam_data_instance = PlayerSteamDataRetrieval(76561198067301616)
 # print(steam_data_instance.player_steam_summary_data_store())
 # print(steam_data_instance.player_steam_friends_data_store())
@@ -0,0 +1,20 @@
+import os
+import sys
+
+# Allow the tests to import services, utilities and benchmarks
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from benchmarks.standinserver import StandInConfig, StandInServer, point_services_at
+
+@pytest.fixture(scope="session")
+def standin_server():
+    """A stand-in Faceit and Steam API every service endpoint points at for the session"""
+    os.environ.setdefault("SERVER_KEY", "test")
+    os.environ.setdefault("STEAM_KEY", "test")
+    from utilities.config import get_settings
+    get_settings.cache_clear()
+    with StandInServer(StandInConfig(latency_seconds=0, default_matches={"cs2": 1250, "csgo": 130})) as server:
+        point_services_at(server.base_url)
+        yield server
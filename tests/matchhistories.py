@@ -0,0 +1,24 @@
+from typing import Dict, List
+
+import numpy as np
+
+def random_history(rng: np.random.Generator, max_matches: int = 400) -> List[Dict]:
+    """A history of stats dicts newest first, with the API's string values and ratios given to two decimals"""
+    num_matches = int(rng.integers(1, max_matches))
+    loser_scores = rng.integers(0, 12, num_matches)
+    return [
+        {
+            "Match Id": f"1-{num_matches - index:07d}",
+            "Kills": str(rng.integers(0, 40)),
+            "K/R Ratio": f"{rng.random() * 2:.2f}",
+            "K/D Ratio": f"{rng.random() * 4:.2f}",
+            "Headshots %": str(rng.integers(0, 101)),
+            "Double Kills": str(rng.integers(0, 6)),
+            "Triple Kills": str(rng.integers(0, 4)),
+            "Quadro Kills": str(rng.integers(0, 2)),
+            "Penta Kills": str(int(rng.random() < 0.02)),
+            "Result": str(rng.integers(0, 2)),
+            "Score": f"13 / {loser_score}" if rng.random() < 0.5 else f"{loser_score} / 13"
+        }
+        for index, loser_score in enumerate(loser_scores)
+    ]
@@ -0,0 +1,62 @@
+import os
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+from services.matchhistorystore import MatchHistoryStore
+from services.responsecache import get_response_cache
+from utilities.aggregatestate import MatchAggregateState
+from utilities.matchstatscolumns import MatchStatsColumns
+from utilities.windowstatistics import MatchStatsWindows
+
+from tests.matchhistories import random_history
+from tests.test_faceitplayerstatistics import summary_stores
+
+@pytest.fixture(scope="module")
+def histories() -> List[List[Dict]]:
+    rng = np.random.default_rng(23)
+    return [random_history(rng) for _ in range(500)]
+
+def test_folded_batches_match_the_full_history(histories: List[List[Dict]]) -> None:
+    rng = np.random.default_rng(24)
+    for history in histories:
+        last_n, first_n = int(rng.integers(1, 40)), int(rng.integers(1, 20))
+        columns = MatchStatsColumns.from_stats(history)
+        # Oldest batch first, each newest first within itself as the API returns them
+        cuts = np.sort(rng.integers(0, len(history) + 1, int(rng.integers(0, 8))))
+        bounds = [len(history), *cuts[::-1], 0]
+        state = MatchAggregateState(last_n, first_n)
+        for newest, oldest in zip(bounds[1:], bounds[:-1]):
+            state.add_columns(columns[newest:oldest], game_id="cs2")
+            state = MatchAggregateState.from_bytes(state.to_bytes())
+        windows = MatchStatsWindows(columns)
+        assert len(state) == len(windows) == state.game_counts["cs2"]
+        assert state.all_time() == windows.all_time()
+        for n in range(1, last_n + 1):
+            assert state.last_n(n) == windows.last_n(n)
+        for n in range(1, first_n + 1):
+            assert state.first_n(n) == windows.first_n(n)
+
+def test_an_empty_state_matches_an_empty_history() -> None:
+    state = MatchAggregateState.from_bytes(MatchAggregateState().to_bytes())
+    windows = MatchStatsWindows(MatchStatsColumns.from_stats([]))
+    assert len(state) == 0
+    assert (state.all_time(), state.last_n(20), state.first_n(10)) == (
+        windows.all_time(), windows.last_n(20), windows.first_n(10)
+    )
+
+def test_store_lookups_match_full_lookups(standin_server, tmp_path, monkeypatch) -> None:
+    matches = {"cs2": 300, "csgo": 60}
+    monkeypatch.setitem(standin_server.config.players, "folded", matches)
+    store = MatchHistoryStore(os.path.join(tmp_path, "match_history.sqlite3"))
+    # Cold, warm, then matches played between lookups in each game
+    for game_id, num_new in (("cs2", 0), ("cs2", 0), ("cs2", 2), ("csgo", 2)):
+        matches[game_id] += num_new
+        # New matches must come from the API rather than cached pages
+        get_response_cache().clear()
+        faceit_data = PlayerFaceitDataRetrieval("folded", match_store=store, prefetch=True)
+        assert len(faceit_data.aggregate_state) == matches["cs2"] + matches["csgo"]
+        assert summary_stores(faceit_data) == summary_stores(PlayerFaceitDataRetrieval("folded"))
+    store.close()
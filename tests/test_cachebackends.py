@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+import datetime
+import json
+import time
+from typing import Iterator
+
+import pytest
+
+from benchmarks.fixtures import synthetic_match_items
+from benchmarks.standinresp import StandInRespServer
+from services.cachebackends import (
+    CacheBackend,
+    RespBackend,
+    RespError,
+    backend_from_url,
+    decode_value,
+    encode_value
+)
+from services.faceitplayerstatistics import PlayerStatisticsAllTimeData
+from services.steamplayerstatistics import PlayerSteamSummaryData
+
+@dataclass
+class UnregisteredData:
+    value: int
+
+@pytest.fixture(scope="module")
+def resp_server() -> Iterator[StandInRespServer]:
+    with StandInRespServer() as server:
+        yield server
+
+@pytest.fixture(scope="module")
+def password_resp_server() -> Iterator[StandInRespServer]:
+    with StandInRespServer(password="s3cret") as server:
+        yield server
+
+@pytest.fixture(params=["memory", "sqlite", "resp", "resp with a password"])
+def backend(request, tmp_path) -> Iterator[CacheBackend]:
+    if request.param == "memory":
+        url = "memory://"
+    elif request.param == "sqlite":
+        url = f"sqlite://{tmp_path / 'cache.sqlite3'}"
+    elif request.param == "resp":
+        url = request.getfixturevalue("resp_server").url
+    else:
+        url = request.getfixturevalue("password_resp_server").url
+    backend = backend_from_url(url)
+    backend.clear()
+    yield backend
+    backend.clear()
+    backend.close()
+
+def test_missing_keys_are_none(backend: CacheBackend) -> None:
+    assert backend.get("missing") is None
+
+def test_values_are_stored_with_their_ttl(backend: CacheBackend) -> None:
+    backend.set("key", b"\x00\x01value", 60)
+    data, ttl = backend.get("key")
+    assert data == b"\x00\x01value"
+    assert 59 < ttl <= 60
+    backend.set("key", b"replaced", 60)
+    assert backend.get("key")[0] == b"replaced"
+
+def test_expired_values_are_gone(backend: CacheBackend) -> None:
+    backend.set("short", b"gone soon", 0.05)
+    time.sleep(0.1)
+    assert backend.get("short") is None
+
+def test_delete_and_clear(backend: CacheBackend) -> None:
+    backend.set("key", b"value", 60)
+    backend.delete("key")
+    assert backend.get("key") is None
+    backend.set("a", b"1", 60)
+    backend.set("b", b"2", 60)
+    backend.clear()
+    assert backend.get("a") is None and backend.get("b") is None
+
+def test_clear_keeps_other_apps_keys(resp_server: StandInRespServer) -> None:
+    backend, other_app = RespBackend(port=resp_server.server_address[1]), RespBackend(
+        port=resp_server.server_address[1], key_prefix="other-app:"
+    )
+    other_app.set("key", b"theirs", 60)
+    backend.set("key", b"ours", 60)
+    backend.clear()
+    assert backend.get("key") is None
+    assert other_app.get("key")[0] == b"theirs"
+    other_app.clear()
+    backend.close()
+    other_app.close()
+
+@pytest.mark.parametrize("password", [None, "wrong"])
+def test_resp_requires_the_right_password(password_resp_server: StandInRespServer, password) -> None:
+    backend = RespBackend(port=password_resp_server.server_address[1], password=password)
+    with pytest.raises(RespError):
+        backend.get("key")
+    backend.close()
+
+def test_resp_reconnects_after_an_error(resp_server: StandInRespServer) -> None:
+    backend = RespBackend(port=resp_server.server_address[1])
+    backend.set("key", b"value", 60)
+    with pytest.raises(RespError):
+        backend._execute(("UNKNOWN",), ("GET", backend.key_prefix + "key"))
+    # The GET's reply was never read, a reused connection would return it for the next command
+    assert backend.get("missing") is None
+    assert backend.get("key")[0] == b"value"
+    backend.clear()
+    backend.close()
+
+@pytest.mark.parametrize("value", [
+    {"items": synthetic_match_items("0" * 36, "cs2", 100, 0, 100)},
+    PlayerStatisticsAllTimeData("player", 1.2, 0.8, 1.1, 48.5, 1.0, 0.2, 0.05, 0.01, 52.0, 1.5),
+    PlayerSteamSummaryData(76561198000000001, False, True, datetime.date(2015, 6, 1)),
+    {"when": datetime.datetime(2024, 5, 1, 12, 30), "nothing": None, "text": "ünïcode"}
+], ids=["match page", "faceit stats", "steam summary", "mixed"])
+def test_values_round_trip(value) -> None:
+    decoded, size = decode_value(encode_value(value))
+    assert decoded == value
+    assert type(decoded) is type(value)
+    assert size > 0
+
+def test_large_values_are_compressed() -> None:
+    value = {"items": synthetic_match_items("0" * 36, "cs2", 100, 0, 100)}
+    encoded = encode_value(value)
+    _, size = decode_value(encoded)
+    assert len(encoded) < size
+
+def test_unregistered_dataclasses_are_not_encoded() -> None:
+    with pytest.raises(TypeError):
+        encode_value(UnregisteredData(1))
+
+def _tampered(**changes) -> bytes:
+    encoded = json.loads(encode_value(PlayerSteamSummaryData(1, False, True, datetime.date(2015, 6, 1)))[1:])
+    encoded.update(changes)
+    return b"\x00" + json.dumps(encoded).encode()
+
+@pytest.mark.parametrize("changes", [
+    {"__dataclass__": f"{UnregisteredData.__module__}:{UnregisteredData.__qualname__}"},
+    {"__dataclass__": "subprocess:Popen"},
+    {"fields": {"steam_id": 1}},
+    {"fields": {"steam_id": 1, "args": ["rm"]}},
+    {"fields": ["steam_id"]}
+], ids=["unregistered dataclass", "not a dataclass", "missing fields", "unknown fields", "fields not a dict"])
+def test_tampered_values_are_refused(changes) -> None:
+    with pytest.raises(ValueError):
+        decode_value(_tampered(**changes))
@@ -0,0 +1,29 @@
+import os
+
+from services.faceitplayerstatistics import PlayerFaceitDataRetrieval
+from services.matchhistorystore import MatchHistoryStore
+
+def summary_stores(faceit_data: PlayerFaceitDataRetrieval) -> tuple:
+    return (
+        faceit_data.player_data_store(),
+        faceit_data.player_data_stats_all_time_store(),
+        faceit_data.player_data_stats_last_20_store(),
+        faceit_data.player_data_stats_first_10_store()
+    )
+
+def test_streaming_matches_a_full_lookup(standin_server) -> None:
+    expected = summary_stores(PlayerFaceitDataRetrieval("streamed", prefetch=True))
+    assert summary_stores(PlayerFaceitDataRetrieval("streamed", prefetch=True, streaming=True)) == expected
+
+def test_streaming_reads_a_store_a_page_at_a_time(standin_server, tmp_path, monkeypatch) -> None:
+    expected = summary_stores(PlayerFaceitDataRetrieval("stored", prefetch=True))
+    store = MatchHistoryStore(os.path.join(tmp_path, "match_history.sqlite3"))
+    def load_everything(*args):
+        raise AssertionError("a streamed lookup loaded the whole stored history")
+    monkeypatch.setattr(store, "load", load_everything)
+    # Cold, every match is fetched into the store, then warm, only the first page is
+    for _ in range(2):
+        faceit_data = PlayerFaceitDataRetrieval("stored", match_store=store, prefetch=True, streaming=True)
+        assert summary_stores(faceit_data) == expected
+    assert store.count(faceit_data.player_id, "cs2") == 1250
+    store.close()
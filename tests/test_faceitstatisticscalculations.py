@@ -0,0 +1,51 @@
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from utilities.faceitstatisticscalculations import calculate_stats
+from utilities.matchrecord import MatchRecord
+from utilities.matchstatscolumns import MatchStatsColumns
+
+from tests.matchhistories import random_history
+
+def baseline_calculate_stats(match_dictionary: List[Dict]) -> Dict[str, float]:
+    """calculate_stats as it was before the history was parsed into columns"""
+    key_mapping = {
+        "Kills": "avg_kills", "K/R Ratio": "avg_kr_ratio", "K/D Ratio": "avg_kd_ratio",
+        "Headshots %": "avg_hsp", "Double Kills": "avg_2_kills", "Triple Kills": "avg_3_kills",
+        "Quadro Kills": "avg_4_kills", "Penta Kills": "avg_5_kills"
+    }
+    averages = {
+        new_key: round(float(np.mean(np.array([float(match.get(key, 0)) for match in match_dictionary]))), 2)
+        for key, new_key in key_mapping.items()
+    }
+    results = np.array([int(match.get("Result", 0)) for match in match_dictionary])
+    averages["perc_winrate"] = round(float(np.sum(results == 1) / len(results) * 100), 2)
+    scores = np.array([match["Score"].split(" / ") for match in match_dictionary], dtype=int)
+    differences = np.abs(scores[:, 0] - scores[:, 1])
+    averages["avg_score_diff"] = round(float(np.mean(np.where(results == 1, differences, -differences))), 2)
+    return averages
+
+@pytest.fixture(scope="module")
+def histories() -> List[List[Dict]]:
+    rng = np.random.default_rng(4)
+    return [random_history(rng) for _ in range(3000)]
+
+def test_columns_match_the_baseline(histories: List[List[Dict]]) -> None:
+    for history in histories:
+        assert calculate_stats(MatchStatsColumns.from_stats(history)) == baseline_calculate_stats(history)
+
+def test_stats_windows_match_the_baseline(histories: List[List[Dict]]) -> None:
+    # The last 20 and first 10 stores average slices of the parsed history
+    for history in histories:
+        columns = MatchStatsColumns.from_stats(history)
+        assert calculate_stats(columns[:20]) == baseline_calculate_stats(history[:20])
+        assert calculate_stats(columns[-10:]) == baseline_calculate_stats(history[-10:])
+
+def test_records_match_the_baseline(histories: List[List[Dict]]) -> None:
+    for history in histories[:200]:
+        assert calculate_stats(MatchRecord.from_page(history)) == baseline_calculate_stats(history)
+
+def test_empty_history() -> None:
+    assert set(calculate_stats([]).values()) == {0.0}
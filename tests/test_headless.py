@@ -0,0 +1,43 @@
+from contextlib import closing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from services import headless
+
+def test_a_single_process_run_closes_its_match_store(standin_server, tmp_path, monkeypatch) -> None:
+    monkeypatch.setitem(standin_server.config.players, "chunked", {"cs2": 30, "csgo": 0})
+    chunks = headless.iter_lookup_chunks(
+        ["chunked"] * 3,
+        chunk_size=1,
+        include_steam=False,
+        match_store_path=os.path.join(tmp_path, "match_history.sqlite3"),
+        percentiles=False
+    )
+    next(chunks)
+    assert headless._worker_match_store is not None
+    # Stopping early closes it too
+    chunks.close()
+    assert headless._worker_match_store is None
+
+def test_chunks_in_flight_are_bounded(standin_server, monkeypatch) -> None:
+    nicknames = [f"chunked{number}" for number in range(12)]
+    for nickname in nicknames:
+        monkeypatch.setitem(standin_server.config.players, nickname, {"cs2": 30, "csgo": 0})
+    submitted = []
+
+    class CountingExecutor(ProcessPoolExecutor):
+        def submit(self, *args, **kwargs):
+            submitted.append(args[1])
+            return super().submit(*args, **kwargs)
+
+    monkeypatch.setattr(headless, "ProcessPoolExecutor", CountingExecutor)
+    processes = 2
+    frames = headless.iter_lookup_chunks(
+        nicknames, chunk_size=1, processes=processes, threads=1, include_steam=False, percentiles=False
+    )
+    # Closed on a failed assert too, which shuts the process pool down
+    with closing(frames):
+        for yielded, frame in enumerate(frames, start=1):
+            assert len(submitted) - yielded <= 2 * processes
+            assert frame["error"].isna().all()
+    assert submitted == [[nickname] for nickname in nicknames]
@@ -0,0 +1,48 @@
+import datetime
+import os
+from typing import List
+
+import pytest
+
+from services.matchhistorydataset import MatchHistoryDataset
+
+# Each side of New Year, in UTC
+FINISHED_AT = [
+    datetime.datetime(2023, 12, 31, 20, 0, tzinfo=datetime.timezone.utc),
+    datetime.datetime(2024, 1, 1, 3, 0, tzinfo=datetime.timezone.utc)
+]
+NEW_YORK = datetime.timezone(datetime.timedelta(hours=-5))
+SYDNEY = datetime.timezone(datetime.timedelta(hours=11))
+
+@pytest.fixture
+def dataset(tmp_path) -> MatchHistoryDataset:
+    dataset = MatchHistoryDataset(os.path.join(tmp_path, "match_history"))
+    dataset.write_history("player", "cs2", [
+        {"Match Id": f"1-{index}", "Match Finished At": str(int(finished_at.timestamp() * 1000)), "Map": "de_dust2"}
+        for index, finished_at in enumerate(FINISHED_AT)
+    ])
+    return dataset
+
+def read_match_ids(dataset: MatchHistoryDataset, start: datetime.datetime, end: datetime.datetime) -> List[str]:
+    return dataset.read(["match_id"], start=start, end=end).column("match_id").to_pylist()
+
+def test_matches_are_partitioned_by_their_utc_year(dataset: MatchHistoryDataset) -> None:
+    years = dataset.read(["match_id", "year"]).sort_by("match_id").column("year").to_pylist()
+    assert years == [2023, 2024]
+
+@pytest.mark.parametrize("start, end, expected", [
+    # 2024-01-01 03:00 UTC is still New Year's Eve in New York
+    (datetime.datetime(2023, 12, 31, 21, tzinfo=NEW_YORK), datetime.datetime(2023, 12, 31, 23, tzinfo=NEW_YORK), ["1-1"]),
+    # and 2023-12-31 20:00 UTC already New Year's Day in Sydney
+    (datetime.datetime(2024, 1, 1, 6, tzinfo=SYDNEY), datetime.datetime(2024, 1, 1, 8, tzinfo=SYDNEY), ["1-0"])
+], ids=["new york", "sydney"])
+def test_local_times_read_the_utc_years_partition(
+    dataset: MatchHistoryDataset, start: datetime.datetime, end: datetime.datetime, expected: List[str]
+) -> None:
+    assert read_match_ids(dataset, start, end) == expected
+
+def test_a_time_range_spanning_new_year_reads_both_years(dataset: MatchHistoryDataset) -> None:
+    start = datetime.datetime(2023, 12, 31, 12, 0, tzinfo=NEW_YORK)
+    end = datetime.datetime(2024, 1, 1, 12, 0, tzinfo=SYDNEY)
+    assert sorted(read_match_ids(dataset, start, end)) == ["1-0"]
+    assert sorted(read_match_ids(dataset, start, end + datetime.timedelta(days=1))) == ["1-0", "1-1"]
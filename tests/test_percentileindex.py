@@ -0,0 +1,88 @@
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pytest
+
+from utilities.percentileindex import PopulationPercentileIndex, configure_population_index, save_population_index
+
+def scan_percentiles(players: Dict[str, Tuple[int, np.ndarray]], level: int, values: np.ndarray) -> np.ndarray:
+    """The baseline, compares each value with every player at the level"""
+    rows = np.array([row for player_level, row in players.values() if player_level == level])
+    ranks = np.full(len(values), np.nan)
+    for index, value in enumerate(values):
+        population = rows[:, index][~np.isnan(rows[:, index])] if len(rows) else np.zeros(0)
+        if len(population) and not np.isnan(value):
+            ranks[index] = 100 * ((population < value).sum() + (population == value).sum() / 2) / len(population)
+    return ranks
+
+def random_rows(rng: np.random.Generator, num_players: int, num_metrics: int) -> np.ndarray:
+    # Two decimals, as the lookup columns are, so ties are common
+    values = np.round(rng.normal(1.0, 0.3, (num_players, num_metrics)), 2)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return values
+
+def test_updates_keep_ranks_equal_to_a_scan() -> None:
+    rng = np.random.default_rng(21)
+    index = PopulationPercentileIndex()
+    players: Dict[str, Tuple[int, np.ndarray]] = {}
+    for _ in range(200):
+        # New players, replaced players, players changing level and a player listed twice
+        num_players = int(rng.integers(1, 30))
+        player_ids = [f"player{number}" for number in rng.integers(0, 300, num_players)]
+        levels = rng.integers(1, 4, num_players)
+        values = random_rows(rng, num_players, len(index.metrics))
+        index.update(player_ids, levels, values)
+        for player_id, level, row in zip(player_ids, levels, values):
+            players[player_id] = (int(level), row)
+
+        query_values = random_rows(rng, 5, len(index.metrics))
+        query_values[0] = next(iter(players.values()))[1]
+        for level in (1, 2, 3, 4):
+            expected = np.array([scan_percentiles(players, level, row) for row in query_values])
+            ranks = index.percentiles([level] * len(query_values), query_values)
+            assert np.allclose(ranks, expected, equal_nan=True)
+    assert len(index) == len(players)
+    for level in (1, 2, 3):
+        assert index.population(level) == sum(player_level == level for player_level, _ in players.values())
+
+def test_percentile_matches_percentiles() -> None:
+    rng = np.random.default_rng(22)
+    index = PopulationPercentileIndex()
+    index.update([f"player{number}" for number in range(500)], [4] * 500, random_rows(rng, 500, len(index.metrics)))
+    query_values = random_rows(rng, 20, len(index.metrics))
+    ranks = index.percentiles([4] * 20, query_values)
+    for player, row in enumerate(query_values):
+        for column, metric in enumerate(index.metrics):
+            assert index.percentile(4, metric, row[column]) == pytest.approx(ranks[player, column], nan_ok=True)
+    assert np.isnan(index.percentile(5, index.metrics[0], 1.0))
+
+def test_saved_indexes_merge(tmp_path) -> None:
+    rng = np.random.default_rng(23)
+    path = os.path.join(tmp_path, "population_index.npz")
+    first, second = PopulationPercentileIndex(), PopulationPercentileIndex()
+    first.update(["a", "b"], [1, 2], random_rows(rng, 2, len(first.metrics)))
+    second.update(["b", "c"], [2, 2], random_rows(rng, 2, len(second.metrics)))
+    first.save(path)
+    second.save(path)
+    loaded = PopulationPercentileIndex.load(path)
+    assert (len(loaded), loaded.population(1), loaded.population(2)) == (3, 1, 2)
+    query_values = random_rows(rng, 10, len(loaded.metrics))
+    assert np.allclose(
+        loaded.percentiles([2] * 10, query_values), second.percentiles([2] * 10, query_values), equal_nan=True
+    )
+
+def test_the_shared_index_is_only_saved_after_changes(tmp_path) -> None:
+    path = os.path.join(tmp_path, "population_index.npz")
+    try:
+        index = configure_population_index(path)
+        save_population_index()
+        assert not os.path.exists(path)
+        index.update(["a"], [1], random_rows(np.random.default_rng(24), 1, len(index.metrics)))
+        save_population_index()
+        assert len(PopulationPercentileIndex.load(path)) == 1
+        os.remove(path)
+        save_population_index()
+        assert not os.path.exists(path)
+    finally:
+        configure_population_index()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.benchmark_riskscoring import ranking_auc
+from benchmarks.fixtures import synthetic_risk_corpus
+from services.batchlookup import add_risk_scores
+from utilities.riskscoring import DEFAULT_CLIP, RiskScoringEngine
+
+@pytest.fixture(scope="module")
+def engine() -> RiskScoringEngine:
+    return RiskScoringEngine()
+
+def test_the_same_seed_gives_the_same_scores(engine: RiskScoringEngine) -> None:
+    columns, _ = synthetic_risk_corpus(1000, seed=3)
+    rebuilt_columns, _ = synthetic_risk_corpus(1000, seed=3)
+    assert np.array_equal(engine.score_columns(columns).scores, engine.score_columns(rebuilt_columns).scores)
+
+def test_contributions_add_up_to_the_log_odds(engine: RiskScoringEngine) -> None:
+    columns, _ = synthetic_risk_corpus(1000, seed=4)
+    risk_scores = engine.score_columns(columns)
+    assert np.allclose(
+        risk_scores.contributions.sum(axis=1) + engine.bias,
+        np.log(risk_scores.scores / (100 - risk_scores.scores))
+    )
+    # Clipping bounds how far any one feature moves a score
+    assert np.all(np.abs(risk_scores.contributions) <= DEFAULT_CLIP * np.abs(engine.weights) + 1e-12)
+
+def test_missing_features_add_nothing(engine: RiskScoringEngine) -> None:
+    risk_scores = engine.score_columns({"num_games": [np.nan, None], "steam_num_games": [None, None]})
+    assert not risk_scores.contributions.any()
+    assert np.allclose(risk_scores.scores, 100 / (1 + np.exp(-engine.bias)))
+
+def test_scores_separate_smurfs(engine: RiskScoringEngine) -> None:
+    columns, is_smurf = synthetic_risk_corpus(10_000, seed=0)
+    scores = engine.score_columns(columns).scores
+    assert ranking_auc(scores, is_smurf) > 0.95
+    assert scores[is_smurf].mean() > 80 > 20 > scores[~is_smurf].mean()
+
+def test_failed_lookups_are_left_unscored(engine: RiskScoringEngine) -> None:
+    columns, _ = synthetic_risk_corpus(3, seed=5)
+    players = pd.DataFrame({"player_id": ["a", None, "c"], **columns})
+    scored = add_risk_scores(players, engine)
+    assert scored["risk_score"].isna().tolist() == [False, True, False]
@@ -0,0 +1,54 @@
+import math
+from datetime import date
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import synthetic_owned_games
+from services.batchlookup import lookup_players
+from services.steamplayerstatistics import PlayerSteamDataRetrieval
+from utilities.steamgamesanalytics import OwnedGamesColumns, owned_games_stats
+from utilities.steamstatisticscalculations import CS2_APP_ID, account_age_mins, get_steam_games_stats
+
+CREATED_AT = date(2015, 6, 1)
+
+def assert_same_stats(batched: Dict, direct: Dict) -> None:
+    batched, direct = dict(batched), dict(direct)
+    # Summed in a different order, so the standard deviation may differ in its last bits
+    assert math.isclose(batched.pop("playtime_all_games_stdev"), direct.pop("playtime_all_games_stdev"), rel_tol=1e-12)
+    assert batched == direct
+
+@pytest.fixture(scope="module")
+def libraries() -> List[Dict]:
+    libraries = [synthetic_owned_games(str(76561198000000000 + index)) for index in range(2000)]
+    # An empty library, one without CS2 and one without any playtime
+    libraries[0] = {"response": {}}
+    libraries[1]["response"]["games"] = [game for game in libraries[1]["response"]["games"] if game["appid"] != CS2_APP_ID]
+    libraries[2] = {"response": {"games": [{"appid": CS2_APP_ID, "playtime_forever": 0}]}}
+    return libraries
+
+def test_batched_stats_match_the_direct_path(libraries: List[Dict]) -> None:
+    batched = owned_games_stats(
+        OwnedGamesColumns.from_responses(libraries),
+        np.full(len(libraries), account_age_mins(CREATED_AT))
+    )
+    for index, library in enumerate(libraries):
+        batched_stats = {key: values[index].item() for key, values in batched.items()}
+        direct_stats = get_steam_games_stats(library, CREATED_AT)
+        assert all(type(batched_stats[key]) is type(direct_stats[key]) for key in direct_stats)
+        assert_same_stats(batched_stats, direct_stats)
+
+def test_lookup_players_batches_the_games_columns(standin_server) -> None:
+    players = lookup_players([f"lobby{index}" for index in range(30)], max_workers=4)
+    assert players["error"].isna().all()
+    for row in players.to_dict("records"):
+        direct = PlayerSteamDataRetrieval(row["steam_id"]).player_steam_game_data_store()
+        direct_stats = {key: value for key, value in vars(direct).items() if key != "steam_id"}
+        batched_stats = {key: row[f"steam_{key}"] for key in direct_stats}
+        if direct.num_games is None:
+            # Private libraries have no stats either way, and turn the columns into floats
+            assert all(pd.isna(value) for value in batched_stats.values())
+        else:
+            assert_same_stats(batched_stats, direct_stats)
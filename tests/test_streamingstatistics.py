@@ -0,0 +1,49 @@
+import os
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from services.matchhistorystore import MatchHistoryStore
+from utilities.matchstatscolumns import MatchStatsColumns
+from utilities.streamingstatistics import StreamingMatchStats
+from utilities.windowstatistics import MatchStatsWindows
+
+from tests.matchhistories import random_history
+
+@pytest.fixture(scope="module")
+def histories() -> List[List[Dict]]:
+    rng = np.random.default_rng(12)
+    return [random_history(rng, max_matches=600) for _ in range(1500)]
+
+def stream(history: List[Dict], page_size: int = 100) -> StreamingMatchStats:
+    """Folds a history in newest first, a page at a time as the API returns it"""
+    streamed_stats = StreamingMatchStats(last_n=20, first_n=10)
+    for start in range(0, len(history), page_size):
+        streamed_stats.add_page(history[start:start + page_size])
+    return streamed_stats
+
+def test_streamed_stats_match_the_full_history(histories: List[List[Dict]]) -> None:
+    for history in histories:
+        windows = MatchStatsWindows(MatchStatsColumns.from_stats(history))
+        streamed_stats = stream(history)
+        assert len(streamed_stats) == len(windows)
+        assert streamed_stats.all_time() == windows.all_time()
+        assert streamed_stats.last_n(20) == windows.last_n(20)
+        assert streamed_stats.first_n(10) == windows.first_n(10)
+
+def test_page_size_does_not_change_the_stats(histories: List[List[Dict]]) -> None:
+    for history in histories[:300]:
+        assert stream(history, page_size=7).all_time() == stream(history, page_size=100).all_time()
+
+def test_store_pages_hold_the_stored_history(tmp_path, histories: List[List[Dict]]) -> None:
+    store = MatchHistoryStore(os.path.join(tmp_path, "match_history.sqlite3"))
+    history = max(histories, key=len)
+    # Stored in two appends, as a lookup and a later refresh would
+    store.append_newest("player", "cs2", history[100:])
+    store.append_newest("player", "cs2", history[:100])
+    pages = list(store.iter_pages("player", "cs2", page_size=64))
+    assert all(len(page) == 64 for page in pages[:-1])
+    assert [stats for page in pages for stats in page] == store.load("player", "cs2") == history
+    assert list(store.iter_pages("player", "csgo")) == []
+    store.close()
@@ -0,0 +1,135 @@
+import json
+from typing import Dict, Optional
+
+import numpy as np
+
+from utilities.matchstatscolumns import MatchStatsColumns
+from utilities.windowstatistics import SUM_SCALE, STAT_KEYS, averages_from_sums, per_match_statistics, to_sum_units
+
+class MatchAggregateState:
+    """A player's all time, last n and first n stats, folded forward as new matches arrive
+
+    Rather than the matches it keeps the running sum of every statistic
+    (wins, score differences and so on) and a ring buffer of the sums as
+    they stood before each of the last n matches, plus the sums after each
+    of the first n. New matches are folded in O(k) for k matches, into the
+    same exact integer sums MatchStatsWindows builds its prefix sums from,
+    so every answer is identical to a recompute over the full history.
+    """
+    def __init__(self, last_n: int = 20, first_n: int = 10) -> None:
+        """Initialises the state of an empty history
+
+        Args:
+            last_n (int): The most recent matches to keep stats over
+            first_n (int): The earliest matches to keep stats over
+        """
+        self.last_n_capacity = last_n
+        self.first_n_capacity = first_n
+        self.count = 0
+        # Matches folded in per game, e.g. to check the state against a match store
+        self.game_counts: Dict[str, int] = {}
+        # The sums over the first i matches sit at row i % (last_n + 1) while i is one of the last n + 1
+        self._recent_sums = np.zeros((last_n + 1, len(STAT_KEYS)), dtype=np.int64)
+        # Row i holds the sums over the first i matches
+        self._first_sums = np.zeros((first_n + 1, len(STAT_KEYS)), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def totals(self) -> np.ndarray:
+        """The sum of every statistic over the whole history, in SUM_SCALE units"""
+        return self._recent_sums[self.count % len(self._recent_sums)]
+
+    @classmethod
+    def from_columns(
+        cls,
+        columns: MatchStatsColumns,
+        game_counts: Optional[Dict[str, int]] = None,
+        last_n: int = 20,
+        first_n: int = 10
+    ) -> "MatchAggregateState":
+        """Builds the state of a full history, newest match first as the API returns it"""
+        state = cls(last_n, first_n)
+        state.add_columns(columns)
+        state.game_counts = dict(game_counts or {})
+        return state
+
+    def add_columns(self, columns: MatchStatsColumns, game_id: Optional[str] = None) -> None:
+        """Folds in matches newer than every match already folded in, newest first as the API returns them"""
+        self.add_rows(to_sum_units(per_match_statistics(columns[::-1])))
+        if game_id is not None:
+            self.game_counts[game_id] = self.game_counts.get(game_id, 0) + len(columns)
+
+    def add_rows(self, per_match: np.ndarray) -> None:
+        """Folds in rows converted by to_sum_units, in chronological order"""
+        num_new = len(per_match)
+        if num_new == 0:
+            return
+        # Integer sums are exact, so continuing them matches np.cumsum over the full history
+        sums = np.cumsum(np.vstack([self.totals, per_match]), axis=0)[1:]
+        positions = np.arange(self.count + 1, self.count + num_new + 1)
+        kept = slice(-len(self._recent_sums), None)
+        self._recent_sums[positions[kept] % len(self._recent_sums)] = sums[kept]
+        is_first = positions <= self.first_n_capacity
+        self._first_sums[positions[is_first]] = sums[is_first]
+        self.count += num_new
+
+    def _sums_before(self, index: int) -> np.ndarray:
+        """The sums over matches [0, index), which must be one of the last n + 1 positions or the first n + 1"""
+        if index <= self.first_n_capacity:
+            return self._first_sums[index]
+        return self._recent_sums[index % len(self._recent_sums)]
+
+    def _averages(self, start: int, stop: int) -> Dict[str, float]:
+        """The same statistics MatchStatsWindows.window returns for [start, stop)"""
+        return averages_from_sums(self._sums_before(stop) - self._sums_before(start), max(stop - start, 0))
+
+    def all_time(self) -> Dict[str, float]:
+        return self._averages(0, self.count)
+
+    def last_n(self, n: int) -> Dict[str, float]:
+        """Averages over the player's most recent n matches, up to the last_n given on creation"""
+        if n > self.last_n_capacity:
+            raise ValueError(f"Only the last {self.last_n_capacity} matches were kept, not {n}")
+        return self._averages(max(self.count - n, 0), self.count)
+
+    def first_n(self, n: int) -> Dict[str, float]:
+        """Averages over the player's first n matches, up to the first_n given on creation"""
+        if n > self.first_n_capacity:
+            raise ValueError(f"Only the first {self.first_n_capacity} matches were kept, not {n}")
+        return self._averages(0, min(n, self.count))
+
+    def to_bytes(self) -> bytes:
+        """Serialises the state, e.g. to keep it in the match history store between lookups"""
+        # A JSON header then the raw arrays, which reads back far faster than an npz archive
+        header = json.dumps({
+            "count": self.count,
+            "game_counts": self.game_counts,
+            "stat_keys": STAT_KEYS,
+            "sum_scale": SUM_SCALE,
+            "last_n": self.last_n_capacity,
+            "first_n": self.first_n_capacity
+        }).encode()
+        return b"".join([
+            len(header).to_bytes(4, "little"),
+            header,
+            self._recent_sums.astype("<i8").tobytes(),
+            self._first_sums.astype("<i8").tobytes()
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Optional["MatchAggregateState"]:
+        """Rebuilds a state written by to_bytes, None if it was written for different statistics or units"""
+        header_length = int.from_bytes(data[:4], "little")
+        header = json.loads(data[4:4 + header_length])
+        # States saved before sums were kept in SUM_SCALE units hold float sums and have no sum_scale
+        if header["stat_keys"] != STAT_KEYS or header.get("sum_scale") != SUM_SCALE:
+            return None
+        state = cls(header["last_n"], header["first_n"])
+        sums = np.frombuffer(data, dtype="<i8", offset=4 + header_length).reshape(-1, len(STAT_KEYS))
+        state._recent_sums = sums[:len(state._recent_sums)].astype(np.int64)
+        state._first_sums = sums[len(state._recent_sums):].astype(np.int64)
+        state.count = header["count"]
+        state.game_counts = header["game_counts"]
+        return state
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+import functools
+import os
+from typing import Optional
+
+@dataclass(frozen=True)
+class Settings:
+    """Configuration read from the environment and the .env file"""
+    # Generated at https://developers.faceit.com/apps > select app > api keys > create server side api key
+    faceit_server_key: Optional[str]
+    steam_key: Optional[str]
+    # Where the response cache is shared between processes, see services.cachebackends.backend_from_url
+    cache_url: Optional[str] = None
+
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Loads the .env file and reads the settings once per process
+
+    Call get_settings.cache_clear() to pick up changes to the environment.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    return Settings(
+        faceit_server_key=os.getenv("SERVER_KEY"),
+        steam_key=os.getenv("STEAM_KEY"),
+        cache_url=os.getenv("CACHE_URL")
+    )
@@ -1,90 +1,110 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 
 import numpy as np
 
-def _calculate_winrate(match_dictionary: List[Dict]) -> float:
+from utilities.instrumentation import instrumented
+from utilities.matchrecord import MatchRecord
+from utilities.matchstatscolumns import METRIC_COLUMNS, MatchStatsColumns
+
+# Raw stats dicts, MatchRecords or an already parsed history
+MatchHistory = Union[List[Dict], List[MatchRecord], MatchStatsColumns]
+
+def _as_columns(match_dictionary: MatchHistory) -> MatchStatsColumns:
+    """Accepts raw stats dicts, MatchRecords or an already parsed history"""
+    if isinstance(match_dictionary, MatchStatsColumns):
+        return match_dictionary
+    if match_dictionary and isinstance(match_dictionary[0], MatchRecord):
+        return MatchStatsColumns.from_records(match_dictionary)
+    return MatchStatsColumns.from_stats(match_dictionary)
+
+def score_differences(columns: MatchStatsColumns) -> np.ndarray:
+    """Returns each match's round difference, positive for a win and negative for a loss
+
+    Args:
+        columns (MatchStatsColumns): The match data to calculate from
+
+    Returns:
+        np.ndarray: One signed round difference per match
+    """
+    # Calculates absolute score difference
+    scores_diff_absolute = np.abs(
+        columns.score_first.astype(np.int32) - columns.score_second.astype(np.int32)
+    )
+    # Returns a negative score difference for a loss and positive for a win
+    return np.where(columns.result == 1, scores_diff_absolute, -scores_diff_absolute)
+
+def _calculate_winrate(match_dictionary: MatchHistory) -> float:
     """Caluclates a player's winrate from a list of boolean match results
 
     Args:
-        match_dictionary (List[Dict]): The match data to calculate from
+        match_dictionary (MatchHistory): The match data to calculate from
 
     Returns:
         float: The player's winrate
     """
-    if not match_dictionary:
+    columns = _as_columns(match_dictionary)
+    if len(columns) == 0:
         return 0.00
-    results = [int(match.get("Result", 0)) for match in match_dictionary]
-    results_array = np.array(results)
     # Calculates percentage of 1 values in the array of player results
     win_percentage = (
-        (np.sum(results_array == 1) / len(results_array)) * 100
+        (np.count_nonzero(columns.result == 1) / len(columns)) * 100
     )
     return round(float(win_percentage), 2)
 
-def _calculate_point_difference(match_dictionary: List[Dict]) -> int:
+def _calculate_point_difference(match_dictionary: MatchHistory) -> int:
     """Calculates the average point difference from a list of boolean match
     results and scores
 
     Args:
-        match_dictionary (List[Dict]): The match data to calculate from
+        match_dictionary (MatchHistory): The match data to calculate from
 
     Returns:
         int: The player's average point difference
     """
-    if not match_dictionary:
+    columns = _as_columns(match_dictionary)
+    if len(columns) == 0:
         return 0.00
-    results = [int(match.get("Result", 0)) for match in match_dictionary]
-    game_scores = [match.get("Score", 0) for match in match_dictionary]
-
-    # Splits strings in formats "n1 / n2"
-    split_score_array = np.array([x.split(' / ') for x in game_scores], dtype=int)
-    results_array = np.array(results, dtype=int)
-
-    # Calculates absolute score difference
-    scores_diff_absolute = np.abs(split_score_array[:, 0] - split_score_array[:, 1])
-    # Returns a negative score difference for a loss and positive for a win
-    scores_diff_adjusted = np.where(results_array == 1, scores_diff_absolute, -scores_diff_absolute)
-    scores_diff_adjusted_average = np.mean(scores_diff_adjusted)
-    print(round(float(scores_diff_adjusted_average), 2))
+    scores_diff_adjusted_average = np.mean(score_differences(columns))
     return round(float(scores_diff_adjusted_average), 2)
 
-def calculate_stats(match_dictionary: List[Dict]) -> Dict[str, float]:
+@instrumented
+def calculate_stats(match_dictionary: MatchHistory) -> Dict[str, float]:
     """Calculates a number of metrics that already exist in the endpoint.
     Then adds the hidden methods above to the same data structure
 
     Args:
-        match_dictionary (List[Dict]): The match data to calculate from
+        match_dictionary (MatchHistory): The match data to calculate from
 
     Returns:
         Dict[str, float]: A dictionary of the player's various calculated statistics
     """
     key_mapping = {
-        "Kills": "avg_kills",
-        "K/R Ratio": "avg_kr_ratio",
-        "K/D Ratio": "avg_kd_ratio",
-        "Headshots %": "avg_hsp",
-        "Double Kills": "avg_2_kills",
-        "Triple Kills": "avg_3_kills",
-        "Quadro Kills": "avg_4_kills",
-        "Penta Kills": "avg_5_kills",
-        # Custom metrics which do not need a key
-        "perc_winrate": "perc_winrate",
-        "avg_score_diff": "avg_score_diff"
+        "kills": "avg_kills",
+        "kr_ratio": "avg_kr_ratio",
+        "kd_ratio": "avg_kd_ratio",
+        "hsp": "avg_hsp",
+        "double_kills": "avg_2_kills",
+        "triple_kills": "avg_3_kills",
+        "quadro_kills": "avg_4_kills",
+        "penta_kills": "avg_5_kills"
     }
 
-    if not match_dictionary:
-        return {value: 0.00 for value in key_mapping.values()}
+    columns = _as_columns(match_dictionary)
+    if len(columns) == 0:
+        averages = {value: 0.00 for value in key_mapping.values()}
+        averages["perc_winrate"] = 0.00
+        averages["avg_score_diff"] = 0.00
+        return averages
 
-    # Looks at the endpoint response for most items in the key_mapping dict
+    # Each metric is already a parsed float64 array, so an average is a single
+    # pass and rounds exactly as averaging the raw values did
     averages = {}
-    for key, new_key in key_mapping.items():
-        results = [float(match.get(key, 0)) for match in match_dictionary]
-        results_array = np.array(results)
-        results_array_average = np.mean(results_array)
-        averages[new_key] = round(float(results_array_average), 2)
+    for column_name in METRIC_COLUMNS.values():
+        column_average = np.mean(getattr(columns, column_name))
+        averages[key_mapping[column_name]] = round(float(column_average), 2)
 
     # Adds the custom calculations from the above.
-    averages["perc_winrate"] = _calculate_winrate(match_dictionary)
-    averages["avg_score_diff"] = _calculate_point_difference(match_dictionary)
+    averages["perc_winrate"] = _calculate_winrate(columns)
+    averages["avg_score_diff"] = _calculate_point_difference(columns)
 
     return averages
@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from utilities.instrumentation import instrumented
+from utilities.lazyloading import lazy_property
+
+@dataclass
+class FriendGraph:
+    """An undirected friend graph in compressed sparse row form
+
+    Node i's friends are indices[indptr[i]:indptr[i + 1]], sorted, so the
+    whole graph is two integer arrays however many nodes it holds and every
+    query is a handful of vectorised passes over them.
+    """
+    # Steam ids or Faceit player ids, position is the node's index
+    node_ids: List[str]
+    # Shape (nodes + 1,)
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @classmethod
+    @instrumented
+    def from_edges(cls, node_ids: List[str], sources: Sequence[int], targets: Sequence[int]) -> "FriendGraph":
+        """Builds the graph from index pairs, each friendship may appear once or in both directions
+
+        Args:
+            node_ids (List[str]): The id of every node
+            sources (Sequence[int]): The node index at one end of each edge
+            targets (Sequence[int]): The node index at the other end of each edge
+        """
+        num_nodes = len(node_ids)
+        index_dtype = np.int32 if num_nodes < np.iinfo(np.int32).max else np.int64
+        if num_nodes == 0:
+            return cls(node_ids, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=index_dtype))
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        # Both directions encoded as source * nodes + target, so one sort orders the
+        # edges by source then target and puts duplicates next to each other
+        edge_keys = np.sort(np.concatenate([sources * num_nodes + targets, targets * num_nodes + sources]))
+        # Sorting and comparing neighbours is several times quicker than np.unique here
+        is_first = np.ones(len(edge_keys), dtype=bool)
+        is_first[1:] = edge_keys[1:] != edge_keys[:-1]
+        edge_sources, edge_targets = np.divmod(edge_keys[is_first], num_nodes)
+        is_kept = edge_sources != edge_targets
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_sources[is_kept], minlength=num_nodes), out=indptr[1:])
+        return cls(node_ids, indptr, edge_targets[is_kept].astype(index_dtype))
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices) // 2
+
+    @lazy_property
+    def _index_of(self) -> Dict[str, int]:
+        return {node_id: index for index, node_id in enumerate(self.node_ids)}
+
+    def index_of(self, node_id: str) -> int:
+        return self._index_of[node_id]
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def _neighbour_indices(self, index: int) -> np.ndarray:
+        return self.indices[self.indptr[index]:self.indptr[index + 1]]
+
+    def _gather_neighbours(self, rows: np.ndarray) -> np.ndarray:
+        """The neighbours of every node in rows, concatenated, without a Python loop"""
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        # Position within the output -> position within indices
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.indices[offsets + np.arange(lengths.sum())]
+
+    def friends(self, node_id: str) -> List[str]:
+        return [self.node_ids[index] for index in self._neighbour_indices(self.index_of(node_id))]
+
+    def common_friends(self, first_id: str, second_id: str) -> List[str]:
+        """The friends two players share"""
+        shared = np.intersect1d(
+            self._neighbour_indices(self.index_of(first_id)),
+            self._neighbour_indices(self.index_of(second_id)),
+            assume_unique=True
+        )
+        return [self.node_ids[index] for index in shared]
+
+    def jaccard(self, first_id: str, second_id: str) -> float:
+        """The share of two players' combined friends that they have in common"""
+        first = self._neighbour_indices(self.index_of(first_id))
+        second = self._neighbour_indices(self.index_of(second_id))
+        num_shared = len(np.intersect1d(first, second, assume_unique=True))
+        num_either = len(first) + len(second) - num_shared
+        return num_shared / num_either if num_either else 0.0
+
+    def common_friend_counts(self, node_id: str) -> np.ndarray:
+        """The number of friends every node shares with node_id, 0 for node_id itself"""
+        index = self.index_of(node_id)
+        counts = np.bincount(
+            self._gather_neighbours(self._neighbour_indices(index).astype(np.int64)),
+            minlength=len(self)
+        )
+        counts[index] = 0
+        return counts
+
+    def most_connected_to(self, node_id: str, count: int = 10) -> List[Tuple[str, int]]:
+        """The players sharing the most friends with node_id, as (node id, shared friends)"""
+        counts = self.common_friend_counts(node_id)
+        top = np.argsort(-counts, kind="stable")[:count]
+        return [(self.node_ids[index], int(counts[index])) for index in top if counts[index] > 0]
+
+    @instrumented
+    def components(self) -> np.ndarray:
+        """Labels each node with the smallest node index of its connected component
+
+        Every round each node takes the smallest label among itself and its
+        friends, then labels are followed to their root. Friend graphs have a
+        small diameter, so a few vectorised rounds label tens of thousands of nodes.
+        """
+        labels = np.arange(len(self))
+        has_friends = self.degrees() > 0
+        row_starts = self.indptr[:-1][has_friends]
+        while True:
+            previous = labels
+            # Rows are contiguous in indices, so each row's minimum is one reduceat
+            smallest_friend = np.minimum.reduceat(labels[self.indices], row_starts) if len(row_starts) else row_starts
+            labels = labels.copy()
+            labels[has_friends] = np.minimum(labels[has_friends], smallest_friend)
+            # Pointer jumping: a node's label's label is also reachable
+            labels = labels[labels]
+            if np.array_equal(labels, previous):
+                return labels
+
+    def clusters(self, min_size: int = 2) -> List[List[str]]:
+        """The connected components of at least min_size players, largest first"""
+        labels = self.components()
+        sizes = np.bincount(labels, minlength=len(self))
+        order = np.argsort(-sizes[labels], kind="stable")
+        clusters: Dict[int, List[str]] = {}
+        for index in order:
+            if sizes[labels[index]] >= min_size:
+                clusters.setdefault(int(labels[index]), []).append(self.node_ids[index])
+        return list(clusters.values())
+
+    def density(self, node_ids: Iterable[str]) -> float:
+        """The share of possible friendships among node_ids that exist, high for tight rings"""
+        rows = np.array([self.index_of(node_id) for node_id in node_ids], dtype=np.int64)
+        if len(rows) < 2:
+            return 0.0
+        is_member = np.zeros(len(self), dtype=bool)
+        is_member[rows] = True
+        internal_edges = is_member[self._gather_neighbours(rows)].sum() / 2
+        return float(internal_edges / (len(rows) * (len(rows) - 1) / 2))
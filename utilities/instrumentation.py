@@ -0,0 +1,185 @@
+from contextlib import contextmanager
+import cProfile
+from dataclasses import dataclass, field
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds of each latency histogram bucket
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+@dataclass
+class LatencyHistogram:
+    """Counts of a stage's durations per bucket, plus their total"""
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    count: int = 0
+    total_seconds: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for index, upper_bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= upper_bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS)
+        self.bucket_counts[index] += 1
+        self.count += 1
+        self.total_seconds += seconds
+
+class Metrics:
+    """A process-wide registry of per-stage latencies and labelled counters"""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        # (counter name, sorted label pairs) -> value
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> Dict:
+        """Returns every histogram and counter as plain data"""
+        with self._lock:
+            return {
+                "stages": {
+                    stage: {
+                        "count": histogram.count,
+                        "total_seconds": round(histogram.total_seconds, 6),
+                        "mean_seconds": round(histogram.total_seconds / histogram.count, 6),
+                        "buckets": {
+                            str(upper_bound): bucket_count
+                            for upper_bound, bucket_count in zip(
+                                list(LATENCY_BUCKETS) + ["+Inf"], histogram.bucket_counts
+                            )
+                        }
+                    }
+                    for stage, histogram in sorted(self._histograms.items())
+                },
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ]
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP faceit_tracker_stage_seconds Latency of each lookup stage",
+            "# TYPE faceit_tracker_stage_seconds histogram"
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for upper_bound, bucket_count in zip(
+                    list(LATENCY_BUCKETS) + ["+Inf"], histogram.bucket_counts
+                ):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'faceit_tracker_stage_seconds_bucket{{stage="{stage}",le="{upper_bound}"}} {cumulative}'
+                    )
+                lines.append(f'faceit_tracker_stage_seconds_sum{{stage="{stage}"}} {histogram.total_seconds}')
+                lines.append(f'faceit_tracker_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# TYPE faceit_tracker_{name}_total counter")
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name != name:
+                        continue
+                    label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                    label_text = f"{{{label_text}}}" if label_text else ""
+                    lines.append(f"faceit_tracker_{name}_total{label_text} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Records how long the body of a with block takes under a stage name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(stage, time.perf_counter() - start)
+
+def instrumented(function: Callable) -> Callable:
+    """Records every call's latency under the function's qualified name"""
+    stage = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.observe(stage, time.perf_counter() - start)
+    return wrapper
+
+@dataclass
+class ProfileReport:
+    """The output of a profile_capture block"""
+    cprofile_text: str = ""
+    top_allocations: List[str] = field(default_factory=list)
+    peak_memory_bytes: Optional[int] = None
+
+@contextmanager
+def profile_capture(
+    enabled: bool = True,
+    trace_memory: bool = True,
+    top: int = 25
+) -> Iterator[ProfileReport]:
+    """Profiles the body of a with block, e.g. a single lookup
+
+    cProfile only sees the calling thread, so pool workers show up as time
+    spent waiting on their futures. tracemalloc covers every thread.
+
+    Args:
+        enabled (bool): Whether to profile at all, so callers can switch it per request
+        trace_memory (bool): Whether to also trace allocations with tracemalloc
+        top (int): Number of functions and allocation sites to report
+
+    Yields:
+        ProfileReport: Filled in once the block exits
+    """
+    report = ProfileReport()
+    if not enabled:
+        yield report
+        return
+
+    profiler = cProfile.Profile()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        report.cprofile_text = stream.getvalue()
+        if trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            report.top_allocations = [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+            report.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
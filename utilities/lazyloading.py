@@ -0,0 +1,45 @@
+import importlib
+from typing import Any, Callable
+
+class lazy_property:
+    """Computes an attribute on first access and stores it on the instance
+
+    Behaves like functools.cached_property without the per-descriptor lock
+    Python 3.11 and earlier hold, which would serialise the same property
+    across every instance, e.g. all players of a batch lookup.
+    """
+    def __init__(self, function: Callable[[Any], Any]) -> None:
+        self.function = function
+        self.__doc__ = function.__doc__
+        self.name = function.__name__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type = None) -> Any:
+        if instance is None:
+            return self
+        # Stored in the instance dict, so later reads never reach this descriptor
+        value = self.function(instance)
+        instance.__dict__[self.name] = value
+        return value
+
+class lazy_import:
+    """A module that is only imported when one of its attributes is first read
+
+    Keeps heavy dependencies that only some calls need, e.g. numpy for
+    calculating stats, out of the import time of every module that uses them.
+    """
+    def __init__(self, module_name: str) -> None:
+        self.module_name = module_name
+
+    def __getattr__(self, attribute: str) -> Any:
+        # import_module is a dict lookup once the module is in sys.modules
+        return getattr(importlib.import_module(self.module_name), attribute)
+
+def lazy_callable(module_name: str, attribute: str) -> Callable[..., Any]:
+    """Returns a function that imports module_name on its first call and forwards to attribute"""
+    def call(*args: Any, **kwargs: Any) -> Any:
+        return getattr(importlib.import_module(module_name), attribute)(*args, **kwargs)
+    call.__name__ = attribute
+    return call
@@ -0,0 +1,94 @@
+import json
+from typing import Any, Dict, List
+import zlib
+
+from utilities.matchstatscolumns import METRIC_COLUMNS
+
+class MatchRecord:
+    """One match of a player's history, holding only the fields the stats read
+
+    The fields are parsed from the API's strings once, on creation. The full
+    `stats` dicts of a page are kept as one zlib compressed blob shared by the
+    page's records and rebuilt on request, so a record converts back to
+    exactly the dict it was made from.
+    """
+    __slots__ = (
+        "match_id",
+        *METRIC_COLUMNS.values(),
+        "result",
+        "score_first",
+        "score_second",
+        "finished_at",
+        "_compressed_page",
+        "_page_index"
+    )
+
+    def __init__(self, stats: Dict, compressed_page: bytes = None, page_index: int = 0) -> None:
+        """Parses a Faceit `stats` dict
+
+        Args:
+            stats (Dict): One match from the Faceit stats endpoint
+            compressed_page (bytes): The compressed page of stats dicts holding this match,
+                see from_page. Defaults to a page of this match alone
+            page_index (int): The match's position in compressed_page
+        """
+        self.match_id = stats.get("Match Id")
+        for key, field_name in METRIC_COLUMNS.items():
+            setattr(self, field_name, float(stats.get(key, 0)))
+        # 1 for a win, 0 for a loss
+        self.result = int(stats.get("Result", 0))
+        # Splits strings in formats "n1 / n2"
+        score_first, score_second = stats.get("Score", "0 / 0").split(" / ")
+        self.score_first = int(score_first)
+        self.score_second = int(score_second)
+        # Unix time in milliseconds, 0 when the API did not report it
+        self.finished_at = int(stats.get("Match Finished At", 0))
+        self._compressed_page = compressed_page or self._compress([stats])
+        self._page_index = page_index
+
+    @classmethod
+    def from_page(cls, match_stats: List[Dict]) -> List["MatchRecord"]:
+        """Parses a page of stats dicts, compressing their raw fields together"""
+        # Every match repeats the same keys, so a page compresses far better than each match
+        compressed_page = cls._compress(match_stats)
+        return [
+            cls(stats, compressed_page, page_index)
+            for page_index, stats in enumerate(match_stats)
+        ]
+
+    @staticmethod
+    def _compress(match_stats: List[Dict]) -> bytes:
+        # The fastest level, higher ones cost several times the time for a third less memory
+        return zlib.compress(json.dumps(match_stats, separators=(",", ":")).encode(), 1)
+
+    def to_stats(self) -> Dict:
+        """Rebuilds the `stats` dict the record was made from"""
+        return json.loads(zlib.decompress(self._compressed_page))[self._page_index]
+
+    @staticmethod
+    def to_stats_list(records: List["MatchRecord"]) -> List[Dict]:
+        """Rebuilds the `stats` dicts of many records, decompressing each page once"""
+        pages: Dict[int, List[Dict]] = {}
+        match_stats = []
+        for record in records:
+            page = pages.get(id(record._compressed_page))
+            if page is None:
+                page = pages[id(record._compressed_page)] = json.loads(
+                    zlib.decompress(record._compressed_page)
+                )
+            match_stats.append(page[record._page_index])
+        return match_stats
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Reads a raw field like a stats dict would, e.g. for code written against the API"""
+        if key == "Match Id":
+            return self.match_id
+        return self.to_stats().get(key, default)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MatchRecord):
+            return NotImplemented
+        return self.to_stats() == other.to_stats()
+
+    def __repr__(self) -> str:
+        return f"MatchRecord(match_id={self.match_id!r}, kills={self.kills}, result={self.result})"
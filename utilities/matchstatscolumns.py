@@ -0,0 +1,176 @@
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+import numpy as np
+
+from utilities.instrumentation import instrumented
+
+if TYPE_CHECKING:
+    from utilities.matchrecord import MatchRecord
+
+# Faceit stats key -> column holding its parsed values
+METRIC_COLUMNS = {
+    "Kills": "kills",
+    "K/R Ratio": "kr_ratio",
+    "K/D Ratio": "kd_ratio",
+    "Headshots %": "hsp",
+    "Double Kills": "double_kills",
+    "Triple Kills": "triple_kills",
+    "Quadro Kills": "quadro_kills",
+    "Penta Kills": "penta_kills"
+}
+
+@dataclass
+class MatchStatsColumns:
+    """A player's match history parsed once into one array per metric
+
+    Rows keep the order of the API, newest match first.
+    """
+    kills: np.ndarray
+    kr_ratio: np.ndarray
+    kd_ratio: np.ndarray
+    hsp: np.ndarray
+    double_kills: np.ndarray
+    triple_kills: np.ndarray
+    quadro_kills: np.ndarray
+    penta_kills: np.ndarray
+    # 1 for a win, 0 for a loss
+    result: np.ndarray
+    # "n1 / n2" scores split into the first and second team's rounds
+    score_first: np.ndarray
+    score_second: np.ndarray
+    # Unix time in milliseconds, 0 when the API did not report it
+    finished_at: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.result)
+
+    def __getitem__(self, rows: slice) -> "MatchStatsColumns":
+        """Slices every column at once, the arrays are views rather than copies"""
+        return MatchStatsColumns(**{
+            column.name: getattr(self, column.name)[rows] for column in fields(self)
+        })
+
+    @classmethod
+    def empty(cls) -> "MatchStatsColumns":
+        return MatchStatsColumnsBuilder().build()
+
+    @classmethod
+    @instrumented
+    def from_stats(cls, match_stats: Iterable[Dict]) -> "MatchStatsColumns":
+        """Parses a list of Faceit `stats` dicts"""
+        builder = MatchStatsColumnsBuilder()
+        builder.add_stats(match_stats)
+        return builder.build()
+
+    @classmethod
+    @instrumented
+    def from_items(cls, items: Iterable[Dict]) -> "MatchStatsColumns":
+        """Parses the items of Faceit stats endpoint pages"""
+        builder = MatchStatsColumnsBuilder()
+        builder.add_items(items)
+        return builder.build()
+
+    @classmethod
+    @instrumented
+    def from_records(cls, records: Iterable["MatchRecord"]) -> "MatchStatsColumns":
+        """Gathers already parsed MatchRecords into columns"""
+        builder = MatchStatsColumnsBuilder()
+        builder.add_records(records)
+        return builder.build()
+
+    @classmethod
+    def concatenate(cls, columns: List["MatchStatsColumns"]) -> "MatchStatsColumns":
+        """Joins several histories, e.g. cs2 followed by csgo"""
+        if not columns:
+            return cls.empty()
+        return MatchStatsColumns(**{
+            column.name: np.concatenate([getattr(part, column.name) for part in columns])
+            for column in fields(cls)
+        })
+
+class MatchStatsColumnsBuilder:
+    """Accumulates match pages straight into column arrays
+
+    Each page is parsed into small arrays as soon as it is added, so a whole
+    history can be built page by page without holding on to the pages.
+    """
+    def __init__(self) -> None:
+        self._pages: List[MatchStatsColumns] = []
+
+    def add_stats(self, match_stats: Iterable[Dict]) -> None:
+        """Parses a page of Faceit `stats` dicts"""
+        match_stats = list(match_stats)
+        count = len(match_stats)
+        if count == 0:
+            return
+        metrics = {
+            column_name: np.fromiter(
+                (float(stats.get(key, 0)) for stats in match_stats),
+                dtype=np.float64,
+                count=count
+            )
+            for key, column_name in METRIC_COLUMNS.items()
+        }
+        result = np.fromiter(
+            (int(stats.get("Result", 0)) for stats in match_stats),
+            dtype=np.int8,
+            count=count
+        )
+        # Splits strings in formats "n1 / n2" with one join rather than one split per match
+        scores = np.fromiter(
+            map(int, " / ".join(stats.get("Score", "0 / 0") for stats in match_stats).split(" / ")),
+            dtype=np.int16,
+            count=2 * count
+        ).reshape(count, 2)
+        finished_at = np.fromiter(
+            (int(stats.get("Match Finished At", 0)) for stats in match_stats),
+            dtype=np.int64,
+            count=count
+        )
+        self._pages.append(MatchStatsColumns(
+            **metrics,
+            result=result,
+            score_first=scores[:, 0],
+            score_second=scores[:, 1],
+            finished_at=finished_at
+        ))
+
+    def add_records(self, records: Iterable["MatchRecord"]) -> None:
+        """Adds MatchRecords, whose fields need no parsing"""
+        records = list(records)
+        count = len(records)
+        if count == 0:
+            return
+        columns = {
+            column_name: np.fromiter(
+                (getattr(record, column_name) for record in records),
+                dtype=dtype,
+                count=count
+            )
+            for column_name, dtype in [
+                *((column_name, np.float64) for column_name in METRIC_COLUMNS.values()),
+                ("result", np.int8),
+                ("score_first", np.int16),
+                ("score_second", np.int16),
+                ("finished_at", np.int64)
+            ]
+        }
+        self._pages.append(MatchStatsColumns(**columns))
+
+    def add_items(self, items: Iterable[Dict]) -> None:
+        """Parses one page of items from the Faceit stats endpoint"""
+        self.add_stats(item.get("stats", {}) for item in items)
+
+    def build(self) -> "MatchStatsColumns":
+        if not self._pages:
+            return MatchStatsColumns(
+                **{column_name: np.zeros(0, dtype=np.float64) for column_name in METRIC_COLUMNS.values()},
+                result=np.zeros(0, dtype=np.int8),
+                score_first=np.zeros(0, dtype=np.int16),
+                score_second=np.zeros(0, dtype=np.int16),
+                finished_at=np.zeros(0, dtype=np.int64)
+            )
+        if len(self._pages) == 1:
+            return self._pages[0]
+        return MatchStatsColumns.concatenate(self._pages)
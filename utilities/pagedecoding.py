@@ -0,0 +1,42 @@
+import json
+from typing import Dict, Optional
+
+_WHITESPACE = b" \t\r\n"
+
+def decode_items_before(body: bytes, match_id: str) -> Optional[Dict]:
+    """Decodes only the items of a Faceit stats page that come before a known match
+
+    A warm lookup through the match store only keeps the matches newer than
+    the newest stored one, usually a handful of the page's 100. The known
+    match is found in the raw body and only the items ahead of it are
+    decoded, rather than building dicts for the whole page.
+
+    Args:
+        body (bytes): The raw response body of the stats endpoint
+        match_id (str): The newest match already held
+
+    Returns:
+        Optional[Dict]: The page holding just the newer items, None when the
+            match is not in the page or the body is not shaped as expected,
+            leaving the caller to decode it in full
+    """
+    # Any quote inside a JSON string is escaped, so the quoted id can only be a whole string
+    position = body.find(json.dumps(match_id).encode())
+    if position < 0:
+        return None
+    # And only the value of "Match Id", rather than of some other field
+    lead = body[max(position - 64, 0):position].rstrip(_WHITESPACE)
+    if not lead.endswith(b":") or not lead[:-1].rstrip(_WHITESPACE).endswith(b'"Match Id"'):
+        return None
+    # The match's item opens with the brace before its "stats" key
+    stats_key = body.rfind(b'"stats"', 0, position)
+    item_start = body.rfind(b"{", 0, stats_key)
+    items_key = body.find(b'"items"')
+    items_start = body.find(b"[", items_key)
+    if items_key < 0 or stats_key < 0 or not items_start < item_start:
+        return None
+    try:
+        items = json.loads(b"[" + body[items_start + 1:item_start].rstrip(_WHITESPACE + b",") + b"]")
+    except ValueError:
+        return None
+    return {"items": items}
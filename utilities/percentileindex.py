@@ -0,0 +1,322 @@
+import os
+import threading
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "population_index.npz"
+)
+
+# Metric names are the columns of a batch lookup, see services.batchlookup.lookup_players,
+# each with how it reads in a sentence
+PERCENTILE_METRICS = {
+    "all_time_avg_kd_ratio": "K/D",
+    "all_time_avg_kr_ratio": "K/R",
+    "all_time_avg_hsp": "HS%",
+    "all_time_avg_kills": "kills",
+    "all_time_perc_winrate": "win rate",
+    "last_20_avg_kd_ratio": "last 20 K/D",
+    "last_20_avg_hsp": "last 20 HS%",
+    "first_10_avg_kd_ratio": "first 10 K/D"
+}
+
+class _LevelPopulation:
+    """The players of one skill level, a row of metrics each, and every metric sorted"""
+    def __init__(self, num_metrics: int) -> None:
+        self.rows = np.zeros((0, num_metrics))
+        # Player id of each row
+        self.player_ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        # Per metric, the players' values that aren't NaN in ascending order
+        self.sorted_metrics: List[np.ndarray] = [np.zeros(0) for _ in range(num_metrics)]
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    def replace_sorted(self, removed: np.ndarray, added: np.ndarray) -> None:
+        """Takes rows' values out of the sorted metrics and merges others in
+
+        Each metric costs a binary search per value and one copy of the sorted
+        array, O(n + k log k) for k values, rather than sorting all n again.
+
+        Args:
+            removed (np.ndarray): Shape (players, metrics), rows previously added
+            added (np.ndarray): Shape (players, metrics)
+        """
+        for index, sorted_values in enumerate(self.sorted_metrics):
+            old_values = np.sort(removed[:, index])
+            old_values = old_values[~np.isnan(old_values)]
+            if len(old_values):
+                # Equal values removed together take the consecutive positions after the first
+                first_of_equal = np.searchsorted(old_values, old_values, side="left")
+                positions = (
+                    np.searchsorted(sorted_values, old_values, side="left")
+                    + np.arange(len(old_values)) - first_of_equal
+                )
+                sorted_values = np.delete(sorted_values, positions)
+            new_values = np.sort(added[:, index])
+            new_values = new_values[~np.isnan(new_values)]
+            if len(new_values):
+                sorted_values = np.insert(sorted_values, np.searchsorted(sorted_values, new_values), new_values)
+            # Swapped in whole, so a query reads either the old or the new values
+            self.sorted_metrics[index] = sorted_values
+
+class PopulationPercentileIndex:
+    """Ranks players' stats against every player seen at the same skill level
+
+    Each level keeps its players' stats as rows and a sorted copy of every
+    metric. Adding or replacing a player writes their row and moves their
+    values within the sorted metrics by binary search, so no query ever sorts
+    the level again. A percentile is then two binary searches, O(log n) per
+    metric however many players the level holds.
+    """
+    def __init__(self, metrics: Sequence[str] = tuple(PERCENTILE_METRICS)) -> None:
+        """Initialises an empty index
+
+        Args:
+            metrics (Sequence[str]): The columns ranked, batch lookup columns by default
+        """
+        self.metrics = list(metrics)
+        self._metric_index = {metric: index for index, metric in enumerate(self.metrics)}
+        self._levels: Dict[Hashable, _LevelPopulation] = {}
+        # Player id -> the level holding their row
+        self._level_of: Dict[str, Hashable] = {}
+        self._lock = threading.Lock()
+        # Incremented by every update, so a save can tell whether anything changed
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._level_of)
+
+    def levels(self) -> List[Hashable]:
+        return sorted(self._levels)
+
+    def population(self, level: Hashable) -> int:
+        """The number of players at a level"""
+        return len(self._levels[level]) if level in self._levels else 0
+
+    def _remove(self, player_id: str) -> None:
+        """Takes the player's values out of the sorted metrics and moves the level's last row into their row"""
+        population = self._levels[self._level_of.pop(player_id)]
+        row = population.row_of.pop(player_id)
+        population.replace_sorted(population.rows[row:row + 1], np.zeros((0, len(self.metrics))))
+        last_id = population.player_ids.pop()
+        if last_id != player_id:
+            population.rows[row] = population.rows[len(population)]
+            population.player_ids[row] = last_id
+            population.row_of[last_id] = row
+
+    def update(self, player_ids: Sequence[str], levels: Sequence[Hashable], values: np.ndarray) -> None:
+        """Adds players, or replaces the stats of players already added
+
+        Args:
+            player_ids (Sequence[str]): Each player's id
+            levels (Sequence[Hashable]): Each player's skill level
+            values (np.ndarray): Shape (players, metrics), NaN where a player has no value
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(len(player_ids), len(self.metrics))
+        with self._lock:
+            players_of_level: Dict[Hashable, List[int]] = {}
+            # A player listed twice keeps their last row
+            last_of_player = {player_id: player for player, player_id in enumerate(player_ids)}
+            for player_id, player in last_of_player.items():
+                level = levels[player]
+                if self._level_of.get(player_id, level) != level:
+                    self._remove(player_id)
+                self._level_of[player_id] = level
+                players_of_level.setdefault(level, []).append(player)
+            for level, players in players_of_level.items():
+                population = self._levels.setdefault(level, _LevelPopulation(len(self.metrics)))
+                rows, replaced_rows = [], []
+                for player in players:
+                    row = population.row_of.setdefault(player_ids[player], len(population))
+                    if row == len(population):
+                        population.player_ids.append(player_ids[player])
+                    else:
+                        replaced_rows.append(row)
+                    rows.append(row)
+                if len(population) > len(population.rows):
+                    # Doubling keeps adding a player amortised O(1)
+                    population.rows = np.resize(
+                        population.rows, (max(2 * len(population.rows), len(population), 64), len(self.metrics))
+                    )
+                # Fancy indexing copies the replaced players' old values before they're overwritten
+                population.replace_sorted(population.rows[replaced_rows], values[players])
+                # One fancy index per level rather than a row at a time
+                population.rows[rows] = values[players]
+            self.version += 1
+
+    def update_columns(self, columns: Mapping[str, Sequence], level_column: str = "skill_level") -> None:
+        """Adds players given as named columns, e.g. the successful rows of a batch lookup DataFrame"""
+        self.update(list(columns["player_id"]), list(columns[level_column]), self.metric_matrix(columns))
+
+    def metric_matrix(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """Stacks the index's metrics out of named columns, missing columns and None values become NaN
+
+        Returns:
+            np.ndarray: Shape (players, metrics)
+        """
+        num_players = len(columns.index) if hasattr(columns, "index") else len(next(iter(columns.values()), []))
+        matrix = np.full((num_players, len(self.metrics)), np.nan)
+        for index, metric in enumerate(self.metrics):
+            if metric in columns:
+                matrix[:, index] = np.asarray(columns[metric], dtype=np.float64)
+        return matrix
+
+    def percentiles(self, levels: Sequence[Hashable], values: np.ndarray) -> np.ndarray:
+        """The percentage of each player's level with a lower value, half of any ties counted
+
+        Players are grouped by level, so each level costs one vectorised
+        np.searchsorted per metric whatever the number of players ranked.
+
+        Args:
+            levels (Sequence[Hashable]): Each player's skill level
+            values (np.ndarray): Shape (players, metrics)
+
+        Returns:
+            np.ndarray: Shape (players, metrics), from 0 to 100. NaN for NaN values and
+                metrics no player at the level has
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(len(levels), len(self.metrics))
+        levels = np.asarray(levels, dtype=object)
+        ranks = np.full(values.shape, np.nan)
+        for level in set(levels.tolist()):
+            population = self._levels.get(level)
+            if population is None:
+                continue
+            players = np.flatnonzero(levels == level)
+            for index, sorted_values in enumerate(population.sorted_metrics):
+                count = len(sorted_values)
+                if count == 0:
+                    continue
+                level_values = values[players, index]
+                below = np.searchsorted(sorted_values, level_values, side="left")
+                at_or_below = np.searchsorted(sorted_values, level_values, side="right")
+                ranks[players, index] = np.where(
+                    np.isnan(level_values), np.nan, 100 * (below + (at_or_below - below) / 2) / count
+                )
+        return ranks
+
+    def percentile(self, level: Hashable, metric: str, value: float) -> float:
+        """One player's percentile in one metric, as for percentiles"""
+        population = self._levels.get(level)
+        index = self._metric_index[metric]
+        if population is None or len(population.sorted_metrics[index]) == 0 or np.isnan(value):
+            return float("nan")
+        sorted_values = population.sorted_metrics[index]
+        count = len(sorted_values)
+        below = np.searchsorted(sorted_values, value, side="left")
+        at_or_below = np.searchsorted(sorted_values, value, side="right")
+        return float(100 * (below + (at_or_below - below) / 2) / count)
+
+    def percentile_frame_columns(self, columns: Mapping[str, Sequence], level_column: str = "skill_level") -> Dict[str, np.ndarray]:
+        """Returns a {metric}_percentile column per metric, to add to a DataFrame"""
+        ranks = self.percentiles(list(columns[level_column]), self.metric_matrix(columns))
+        return {f"{metric}_percentile": np.round(ranks[:, index], 2) for index, metric in enumerate(self.metrics)}
+
+    def describe(self, level: Hashable, metric: str, value: float) -> str:
+        """Reads a value's rank as a sentence, e.g. "top 0.5% HS% at level 4" """
+        percentile = self.percentile(level, metric, value)
+        label = PERCENTILE_METRICS.get(metric, metric)
+        if np.isnan(percentile):
+            return f"no {label} population at level {level}"
+        if percentile >= 50:
+            return f"top {_format_share(100 - percentile)}% {label} at level {level}"
+        return f"bottom {_format_share(percentile)}% {label} at level {level}"
+
+    def save(self, path: str = DEFAULT_INDEX_PATH) -> None:
+        """Writes every level's players, so another process can rank against the same population
+
+        Players another process saved to the same file and this index doesn't
+        hold are kept, so the app, the prewarm worker and headless runs all add
+        to one population rather than overwrite each other's.
+        """
+        if os.path.exists(path):
+            saved = PopulationPercentileIndex.load(path)
+            if saved.metrics == self.metrics:
+                self._add_missing(saved)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {"metrics": np.array(self.metrics)}
+        with self._lock:
+            for index, (level, population) in enumerate(self._levels.items()):
+                arrays[f"level_{index}"] = np.array([level])
+                arrays[f"player_ids_{index}"] = np.array(population.player_ids, dtype=str)
+                arrays[f"rows_{index}"] = population.rows[:len(population)]
+        # Written to a temporary file first, so a reader never loads half an index
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temporary_path, path)
+
+    def _add_missing(self, other: "PopulationPercentileIndex") -> None:
+        """Adds the players of another index with the same metrics that this one doesn't hold"""
+        for level, population in other._levels.items():
+            missing = [row for row, player_id in enumerate(population.player_ids) if player_id not in self._level_of]
+            if missing:
+                self.update(
+                    [population.player_ids[row] for row in missing],
+                    [level] * len(missing),
+                    population.rows[missing]
+                )
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> "PopulationPercentileIndex":
+        """Reads an index written by save"""
+        with np.load(path) as arrays:
+            index = cls(arrays["metrics"].tolist())
+            for level_number in range(sum(name.startswith("level_") for name in arrays.files)):
+                player_ids = arrays[f"player_ids_{level_number}"].tolist()
+                level = arrays[f"level_{level_number}"][0].item()
+                index.update(player_ids, [level] * len(player_ids), arrays[f"rows_{level_number}"])
+        return index
+
+def _format_share(share: float) -> str:
+    """Two significant figures below 10%, e.g. 0.5 or 0.047, whole percentages above"""
+    return f"{share:.0f}" if share >= 10 else f"{share:.2g}"
+
+_shared_index: Optional[PopulationPercentileIndex] = None
+_shared_index_path = DEFAULT_INDEX_PATH
+_shared_index_lock = threading.Lock()
+# The shared index's version when last loaded or saved
+_saved_version = 0
+
+def get_population_index() -> PopulationPercentileIndex:
+    """Returns the process-wide population index, loaded from DEFAULT_INDEX_PATH if saved before"""
+    global _shared_index, _saved_version
+    if _shared_index is None:
+        with _shared_index_lock:
+            if _shared_index is None:
+                _shared_index = (
+                    PopulationPercentileIndex.load(_shared_index_path) if os.path.exists(_shared_index_path)
+                    else PopulationPercentileIndex()
+                )
+                _saved_version = _shared_index.version
+    return _shared_index
+
+def configure_population_index(path: str = DEFAULT_INDEX_PATH) -> PopulationPercentileIndex:
+    """Replaces the process-wide population index with the one saved at path, e.g. a file per environment"""
+    global _shared_index, _shared_index_path, _saved_version
+    with _shared_index_lock:
+        _shared_index_path = path
+        _shared_index = PopulationPercentileIndex.load(path) if os.path.exists(path) else PopulationPercentileIndex()
+        _saved_version = _shared_index.version
+    return _shared_index
+
+def save_population_index() -> None:
+    """Writes the process-wide population index where it was loaded from, for other processes and later runs
+
+    Skipped when no player was added or replaced since the last save, as
+    each save rewrites the whole file.
+    """
+    global _saved_version
+    index = get_population_index()
+    with _shared_index_lock:
+        # Read before saving, so players added during the save are written by the next one
+        version = index.version
+        if version == _saved_version:
+            return
+        index.save(_shared_index_path)
+        _saved_version = version
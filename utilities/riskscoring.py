@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+@dataclass(frozen=True)
+class RiskFeature:
+    """One signal of the risk score
+
+    The feature's value is standardised as (value - midpoint) / scale, clipped
+    to +-clip, and multiplied by the weight to give its contribution to the
+    score's log-odds. A positive weight means higher values are riskier.
+    """
+    name: str
+    weight: float
+    midpoint: float
+    scale: float
+    description: str = ""
+
+# Feature names are the columns of a batch lookup, see services.batchlookup.lookup_players
+DEFAULT_RISK_FEATURES: List[RiskFeature] = [
+    RiskFeature("is_smurf", 3.0, 0.0, 1.0, "Banned for smurfing before"),
+    RiskFeature("num_games", -0.8, 300, 150, "Faceit matches played, new accounts are riskier"),
+    RiskFeature("all_time_avg_kd_ratio", 0.9, 1.0, 0.25, "Kills per death over every match"),
+    RiskFeature("first_10_avg_kd_ratio", 1.0, 1.0, 0.3, "Kills per death over the first 10 matches"),
+    RiskFeature("all_time_avg_hsp", 0.6, 45, 10, "Headshot percentage over every match"),
+    RiskFeature("all_time_perc_winrate", 0.7, 50, 8, "Win percentage over every match"),
+    RiskFeature("steam_is_private", 0.8, 0.0, 1.0, "Steam profile is private"),
+    RiskFeature("steam_num_games", -0.5, 10, 10, "Games owned on Steam"),
+    RiskFeature("steam_num_steam_friends", -0.5, 30, 20, "Steam friends"),
+    RiskFeature("steam_playtime_all_games_stdev", -0.3, 20_000, 20_000, "Spread of playtime across Steam games"),
+    RiskFeature("steam_perc_cs2_playtime_account_age", 0.5, 5, 5, "Share of the Steam account's age spent in CS2")
+]
+DEFAULT_RISK_BIAS = -1.5
+DEFAULT_CLIP = 3.0
+
+@dataclass
+class RiskScores:
+    """Risk scores of a batch of players and what made up each one"""
+    feature_names: List[str]
+    # Shape (players,), from 0 to 100
+    scores: np.ndarray
+    # Shape (players, features), each feature's share of the score's log-odds
+    contributions: np.ndarray
+
+    def top_contributors(self, player_index: int, count: int = 3) -> List[Tuple[str, float]]:
+        """The features that raised a player's score the most, largest first"""
+        contributions = self.contributions[player_index]
+        order = np.argsort(-contributions)[:count]
+        return [
+            (self.feature_names[index], round(float(contributions[index]), 3))
+            for index in order if contributions[index] > 0
+        ]
+
+class RiskScoringEngine:
+    """Scores players' smurf risk from their Faceit aggregates and Steam features
+
+    Every player is scored in one vectorised pass over a (players, features)
+    matrix. Missing values, e.g. the Steam features of a private profile, add
+    nothing to the score.
+    """
+    def __init__(
+        self,
+        features: Sequence[RiskFeature] = DEFAULT_RISK_FEATURES,
+        bias: float = DEFAULT_RISK_BIAS,
+        clip: float = DEFAULT_CLIP
+    ) -> None:
+        """Initialises the engine
+
+        Args:
+            features (Sequence[RiskFeature]): The signals scored, in matrix column order
+            bias (float): Log-odds of a player whose every feature sits at its midpoint
+            clip (float): Bound on each standardised feature, so one outlier can't dominate
+        """
+        self.features = list(features)
+        self.feature_names = [feature.name for feature in self.features]
+        self.weights = np.array([feature.weight for feature in self.features], dtype=np.float64)
+        self.midpoints = np.array([feature.midpoint for feature in self.features], dtype=np.float64)
+        self.scales = np.array([feature.scale for feature in self.features], dtype=np.float64)
+        self.bias = bias
+        self.clip = clip
+
+    def feature_matrix(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """Stacks the engine's features out of named columns, e.g. a batch lookup DataFrame
+
+        Args:
+            columns (Mapping[str, Sequence]): feature name -> one value per player. Missing
+                columns and None values become NaN
+
+        Returns:
+            np.ndarray: Shape (players, features)
+        """
+        if hasattr(columns, "index"):
+            # A DataFrame, which knows its row count even without any feature columns
+            num_players = len(columns.index)
+        else:
+            present = [name for name in self.feature_names if name in columns]
+            num_players = len(columns[present[0]]) if present else 0
+        matrix = np.full((num_players, len(self.features)), np.nan)
+        for index, name in enumerate(self.feature_names):
+            if name in columns:
+                matrix[:, index] = np.asarray(columns[name], dtype=np.float64)
+        return matrix
+
+    def score(self, matrix: np.ndarray) -> RiskScores:
+        """Scores every row of a feature matrix
+
+        Args:
+            matrix (np.ndarray): Shape (players, features), columns in the engine's feature order
+
+        Returns:
+            RiskScores: Scores from 0 to 100 and each feature's contribution
+        """
+        standardised = np.clip((matrix - self.midpoints) / self.scales, -self.clip, self.clip)
+        contributions = standardised * self.weights
+        contributions[np.isnan(contributions)] = 0.0
+        log_odds = self.bias + contributions.sum(axis=1)
+        scores = 100 / (1 + np.exp(-log_odds))
+        return RiskScores(self.feature_names, scores, contributions)
+
+    def score_columns(self, columns: Mapping[str, Sequence]) -> RiskScores:
+        """Scores players given as named columns, e.g. a batch lookup DataFrame"""
+        return self.score(self.feature_matrix(columns))
+
+    def score_frame_columns(self, columns: Mapping[str, Sequence]) -> Dict[str, np.ndarray]:
+        """Returns risk_score and a contribution_{feature} column per feature, to add to a DataFrame"""
+        risk_scores = self.score_columns(columns)
+        return {
+            "risk_score": np.round(risk_scores.scores, 2),
+            **{
+                f"contribution_{name}": np.round(risk_scores.contributions[:, index], 3)
+                for index, name in enumerate(self.feature_names)
+            }
+        }
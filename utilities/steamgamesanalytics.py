@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from utilities.instrumentation import instrumented
+from utilities.lazyloading import lazy_property
+from utilities.steamstatisticscalculations import CS2_APP_ID
+
+@dataclass
+class OwnedGamesColumns:
+    """The owned games of one or more players' Steam libraries, parsed once into arrays
+
+    Every library's games sit back to back in the same arrays, player i's
+    games being rows offsets[i]:offsets[i + 1], so each statistic is one
+    vectorised pass over every library of a batch. Playtimes are in minutes.
+    """
+    app_ids: np.ndarray
+    playtime_forever: np.ndarray
+    playtime_2weeks: np.ndarray
+    # Shape (players + 1,)
+    offsets: np.ndarray
+
+    @classmethod
+    @instrumented
+    def from_responses(cls, game_dictionaries: Iterable[Dict]) -> "OwnedGamesColumns":
+        """Parses GetOwnedGames responses, one per player"""
+        libraries = [
+            game_dictionary.get("response", {}).get("games", []) for game_dictionary in game_dictionaries
+        ]
+        offsets = np.zeros(len(libraries) + 1, dtype=np.int64)
+        np.cumsum([len(games) for games in libraries], out=offsets[1:])
+        games = [game for games in libraries for game in games]
+        # A flat array per field is quicker to fill than one structured array of rows
+        return cls(
+            app_ids=np.fromiter((game["appid"] for game in games), np.int64, len(games)),
+            playtime_forever=np.fromiter(
+                (game.get("playtime_forever", 0) for game in games), np.float64, len(games)
+            ),
+            playtime_2weeks=np.fromiter(
+                (game.get("playtime_2weeks", 0) for game in games), np.float64, len(games)
+            ),
+            offsets=offsets
+        )
+
+    @property
+    def num_players(self) -> int:
+        return len(self.offsets) - 1
+
+    @lazy_property
+    def player_of_row(self) -> np.ndarray:
+        """The index of the player owning each row"""
+        return np.repeat(np.arange(self.num_players), self.num_games())
+
+    def _sum_per_player(self, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self.player_of_row, weights=values, minlength=self.num_players)
+
+    def num_games(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def total_playtime(self, recent: bool = False) -> np.ndarray:
+        """Each player's playtime over every game, the last two weeks' if recent"""
+        return self._sum_per_player(self.playtime_2weeks if recent else self.playtime_forever)
+
+    def playtime_of(self, app_ids: Sequence[int], recent: bool = False) -> np.ndarray:
+        """Each player's playtime in any of app_ids"""
+        playtime = self.playtime_2weeks if recent else self.playtime_forever
+        # np.isin costs more than the rest of a small library's stats, so one game is compared directly
+        is_counted = self.app_ids == app_ids[0] if len(app_ids) == 1 else np.isin(self.app_ids, app_ids)
+        return self._sum_per_player(np.where(is_counted, playtime, 0.0))
+
+    def share_of(self, app_ids: Sequence[int], recent: bool = False) -> np.ndarray:
+        """The percentage of each player's playtime held by app_ids, 0 for players without any"""
+        return 100 * _divide(self.playtime_of(app_ids, recent), self.total_playtime(recent))
+
+    def recent_ratio(self) -> np.ndarray:
+        """Each player's last two weeks of playtime per minute played ever, 0 for players without any"""
+        return _divide(self.total_playtime(recent=True), self.total_playtime())
+
+    def playtime_standard_deviations(self) -> np.ndarray:
+        """The population standard deviation of each player's playtime per game, 0 for empty libraries"""
+        num_games = self.num_games()
+        means = _divide(self.total_playtime(), num_games)
+        # Deviations from each player's mean rather than E[x^2] - E[x]^2, which loses precision
+        deviations = self.playtime_forever - means[self.player_of_row]
+        return np.sqrt(_divide(self._sum_per_player(deviations ** 2), num_games))
+
+    def _sorted_rows(self, descending: bool = False) -> np.ndarray:
+        """Row order sorting each player's games by playtime, keeping players in order"""
+        playtime = -self.playtime_forever if descending else self.playtime_forever
+        return np.lexsort((playtime, self.player_of_row))
+
+    def playtime_percentiles(self, percentiles: Sequence[float]) -> np.ndarray:
+        """Percentiles of each player's playtime per game, interpolated like np.percentile
+
+        Returns:
+            np.ndarray: Shape (players, percentiles), NaN for empty libraries
+        """
+        num_games = self.num_games()
+        values = np.full((self.num_players, len(percentiles)), np.nan)
+        if not len(self.playtime_forever):
+            return values
+        sorted_playtime = self.playtime_forever[self._sorted_rows()]
+        # Fractional position of each percentile within each player's sorted games
+        positions = np.maximum(num_games - 1, 0)[:, None] * (np.asarray(percentiles, dtype=np.float64) / 100)
+        lower = np.floor(positions).astype(np.int64)
+        # Empty libraries would point past their own rows, so are clamped and left NaN below
+        last_row = len(sorted_playtime) - 1
+        starts = self.offsets[:-1, None]
+        lower_values = sorted_playtime[np.minimum(starts + lower, last_row)]
+        upper_values = sorted_playtime[np.minimum(starts + np.ceil(positions).astype(np.int64), last_row)]
+        has_games = num_games > 0
+        values[has_games] = (lower_values + (upper_values - lower_values) * (positions - lower))[has_games]
+        return values
+
+    def top_games(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Each player's most played games, most played first
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: App ids and playtimes, each of shape (players, count).
+                Players owning fewer games are padded with app id -1 and NaN playtime
+        """
+        order = self._sorted_rows(descending=True)
+        player_of_row = self.player_of_row[order]
+        ranks = np.arange(len(order)) - self.offsets[player_of_row]
+        kept = ranks < count
+        app_ids = np.full((self.num_players, count), -1, dtype=np.int64)
+        playtimes = np.full((self.num_players, count), np.nan)
+        app_ids[player_of_row[kept], ranks[kept]] = self.app_ids[order[kept]]
+        playtimes[player_of_row[kept], ranks[kept]] = self.playtime_forever[order[kept]]
+        return app_ids, playtimes
+
+def _divide(numerators: np.ndarray, denominators: Sequence[float]) -> np.ndarray:
+    """numerators / denominators, 0 where a denominator is 0"""
+    denominators = np.asarray(denominators, dtype=np.float64)
+    return np.divide(numerators, denominators, out=np.zeros(len(numerators)), where=denominators != 0)
+
+@instrumented
+def owned_games_stats(
+    columns: OwnedGamesColumns,
+    account_ages_mins: Sequence[float],
+    app_ids: Sequence[int] = (CS2_APP_ID,)
+) -> Dict[str, np.ndarray]:
+    """The owned games stats of every player in columns at once
+
+    Args:
+        columns (OwnedGamesColumns): The players' libraries
+        account_ages_mins (Sequence[float]): Each player's Steam account age in minutes
+        app_ids (Sequence[int]): The games whose playtime is reported, CS2 by default
+
+    Returns:
+        Dict[str, np.ndarray]: The fields of PlayerSteamGameData, one value per player
+    """
+    playtime = columns.playtime_of(app_ids)
+    return {
+        "num_games": columns.num_games(),
+        "playtime_cs2_mins": playtime.astype(np.int64),
+        "playtime_all_games_stdev": columns.playtime_standard_deviations(),
+        "perc_cs2_playtime_all_games": np.round(100 * _divide(playtime, columns.total_playtime()), 2),
+        "perc_cs2_playtime_account_age": np.round(_divide(100 * playtime, account_ages_mins), 2)
+    }
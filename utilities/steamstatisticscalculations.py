@@ -1,8 +1,13 @@
 from datetime import date, datetime
 from typing import Dict, Union
 
-from glom import glom
-import numpy as np
+from utilities.instrumentation import instrumented
+from utilities.lazyloading import lazy_import
+
+# Imported on first use, so the Steam service stays cheap to import
+np = lazy_import("numpy")
+
+CS2_APP_ID = 730
 
 def unixtime_to_date(unixtime: str) -> datetime:
     """Converts unix date returned by steam to datetime
@@ -17,39 +22,40 @@ def unixtime_to_date(unixtime: str) -> datetime:
     date_created_at = unixtime_created_at.date()
     return date_created_at
 
+def account_age_mins(steam_created_at: datetime.date) -> float:
+    """The age of a Steam account created on steam_created_at, in minutes"""
+    return (date.today() - steam_created_at).total_seconds() / 60
+
+@instrumented
 def get_steam_games_stats(
         game_dictionary: Dict,
         steam_created_at: datetime.date
     ) -> Dict[str, Union[int, float]]:
     """Wrangles endpoint response on steam player's game data
 
+    A single library is read directly, for many players at once
+    owned_games_stats is quicker than calling this per player.
+
     Args:
-        game_dictionary (_type_): _description_
-        steam_created_at (_type_): _description_
+        game_dictionary (Dict): The player's GetOwnedGames response
+        steam_created_at (datetime.date): The date the player's steam account was created
 
     Returns:
-        Dict[str, Union[int, float]]: _description_
+        Dict[str, Union[int, float]]: The fields of PlayerSteamGameData
     """
-    game_data = glom(game_dictionary, "response.games", default=[])
+    game_data = game_dictionary.get("response", {}).get("games", [])
+    playtimes = [game.get("playtime_forever", 0) for game in game_data]
+    # A library lists each game once, so one scan finds CS2
     playtime_cs2_mins = next(
-        (game.get('playtime_forever', None) for game in game_data if game['appid'] == 730),
+        (playtime for game, playtime in zip(game_data, playtimes) if game["appid"] == CS2_APP_ID),
         0
     )
-    playtime_all_games_array = np.array([game["playtime_forever"] for game in game_data])
-
-    try:
-        perc_cs2_playtime_all_games = round(100 * (playtime_cs2_mins / int(np.sum(playtime_all_games_array))), 2)
-    except ZeroDivisionError:
-        perc_cs2_playtime_all_games = 0.0
-    time_diff = date.today() - steam_created_at
-    account_age_mins = time_diff.total_seconds() / 60
-
-    steam_games_stats = {
+    total_playtime = sum(playtimes)
+    account_age = account_age_mins(steam_created_at)
+    return {
         "num_games": len(game_data),
-        "playtime_cs2_mins": next((game.get('playtime_forever', 0) for game in game_data if game['appid'] == 730), 0),
-        "playtime_all_games_stdev": float(np.std(playtime_all_games_array) if playtime_all_games_array.size > 0 else 0.0),
-        "perc_cs2_playtime_all_games": perc_cs2_playtime_all_games,
-        "perc_cs2_playtime_account_age": round(100 * playtime_cs2_mins / account_age_mins, 2)
+        "playtime_cs2_mins": playtime_cs2_mins,
+        "playtime_all_games_stdev": float(np.std(playtimes)) if playtimes else 0.0,
+        "perc_cs2_playtime_all_games": round(100 * (playtime_cs2_mins / total_playtime), 2) if total_playtime else 0.0,
+        "perc_cs2_playtime_account_age": round(100 * playtime_cs2_mins / account_age, 2) if account_age else 0.0
     }
-
-    return steam_games_stats
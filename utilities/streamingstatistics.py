@@ -0,0 +1,111 @@
+from typing import Dict, Iterable
+
+import numpy as np
+
+from utilities.matchstatscolumns import MatchStatsColumns
+from utilities.windowstatistics import STAT_KEYS, averages_from_sums, per_match_statistics, to_sum_units
+
+class RunningStatistics:
+    """Count, mean and variance of every statistic, updated a batch of matches at a time
+
+    Averages come from exact integer sums, as MatchStatsWindows', so pages
+    streamed newest first round the same as a recompute over the full
+    history. Each batch's own mean and sum of squared deviations are merged
+    into the running ones with Chan's parallel form of Welford's algorithm,
+    so the variance stays accurate without keeping the matches or their squares.
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        # In to_sum_units
+        self.sums = np.zeros(len(STAT_KEYS), dtype=np.int64)
+        self.mean = np.zeros(len(STAT_KEYS))
+        # Sum of squared deviations from the mean
+        self.m2 = np.zeros(len(STAT_KEYS))
+
+    def add(self, per_match: np.ndarray) -> None:
+        """Merges a batch of rows shaped like per_match_statistics returns"""
+        batch_count = len(per_match)
+        if batch_count == 0:
+            return
+        self.sums += to_sum_units(per_match).sum(axis=0)
+        batch_mean = per_match.mean(axis=0)
+        batch_m2 = ((per_match - batch_mean) ** 2).sum(axis=0)
+        total = self.count + batch_count
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * (batch_count / total)
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * (self.count * batch_count / total)
+        self.count = total
+
+    def averages(self) -> Dict[str, float]:
+        """The same statistics MatchStatsWindows returns for the same matches"""
+        return averages_from_sums(self.sums, self.count)
+
+    def standard_deviations(self) -> Dict[str, float]:
+        """Population standard deviation of each statistic"""
+        if self.count == 0:
+            return {key: 0.00 for key in STAT_KEYS}
+        deviations = np.sqrt(self.m2 / self.count)
+        return {key: round(float(deviation), 2) for key, deviation in zip(STAT_KEYS, deviations)}
+
+class StreamingMatchStats:
+    """All-time, last n and first n stats of a history streamed one page at a time
+
+    Pages must arrive newest first, as the API returns them. The newest
+    last_n matches are the first ones streamed and the first_n oldest the
+    last ones, so only last_n + first_n rows are ever held, whatever the
+    history's length.
+    Answers the same all_time, last_n and first_n calls as MatchStatsWindows.
+    """
+    def __init__(self, last_n: int = 20, first_n: int = 10) -> None:
+        """Initialises empty accumulators
+
+        Args:
+            last_n (int): The most recent matches to keep stats over
+            first_n (int): The earliest matches to keep stats over
+        """
+        self.last_n_capacity = last_n
+        self.first_n_capacity = first_n
+        self.all_time_statistics = RunningStatistics()
+        # Both hold rows newest first, like the pages
+        self._newest_rows = np.zeros((0, len(STAT_KEYS)))
+        self._oldest_rows = np.zeros((0, len(STAT_KEYS)))
+
+    def __len__(self) -> int:
+        return self.all_time_statistics.count
+
+    def add_page(self, match_stats: Iterable[Dict]) -> None:
+        """Folds in one page of Faceit `stats` dicts, which can be dropped afterwards"""
+        self.add_columns(MatchStatsColumns.from_stats(match_stats))
+
+    def add_columns(self, columns: MatchStatsColumns) -> None:
+        """Folds in a page that has already been parsed"""
+        per_match = per_match_statistics(columns)
+        self.all_time_statistics.add(per_match)
+        remaining = self.last_n_capacity - len(self._newest_rows)
+        if remaining > 0:
+            self._newest_rows = np.vstack([self._newest_rows, per_match[:remaining]])
+        if self.first_n_capacity > 0:
+            self._oldest_rows = np.vstack([self._oldest_rows, per_match])[-self.first_n_capacity:]
+
+    def all_time(self) -> Dict[str, float]:
+        return self.all_time_statistics.averages()
+
+    def all_time_standard_deviations(self) -> Dict[str, float]:
+        return self.all_time_statistics.standard_deviations()
+
+    def last_n(self, n: int) -> Dict[str, float]:
+        """Averages over the player's most recent n matches, up to the last_n given on creation"""
+        if n > self.last_n_capacity:
+            raise ValueError(f"Only the last {self.last_n_capacity} matches were kept, not {n}")
+        return self._averages(self._newest_rows[:n])
+
+    def first_n(self, n: int) -> Dict[str, float]:
+        """Averages over the player's first n matches, up to the first_n given on creation"""
+        if n > self.first_n_capacity:
+            raise ValueError(f"Only the first {self.first_n_capacity} matches were kept, not {n}")
+        # Rows are newest first, the player's first n matches are the final n rows
+        return self._averages(self._oldest_rows[max(len(self._oldest_rows) - n, 0):])
+
+    @staticmethod
+    def _averages(rows: np.ndarray) -> Dict[str, float]:
+        return averages_from_sums(to_sum_units(rows).sum(axis=0), len(rows))
@@ -0,0 +1,131 @@
+from datetime import datetime
+from typing import Dict, Tuple
+
+import numpy as np
+
+from utilities.faceitstatisticscalculations import score_differences
+from utilities.instrumentation import instrumented
+from utilities.matchstatscolumns import METRIC_COLUMNS, MatchStatsColumns
+
+# Output keys in the same order and naming as calculate_stats
+STAT_KEYS = [
+    "avg_kills",
+    "avg_kr_ratio",
+    "avg_kd_ratio",
+    "avg_hsp",
+    "avg_2_kills",
+    "avg_3_kills",
+    "avg_4_kills",
+    "avg_5_kills",
+    "perc_winrate",
+    "avg_score_diff"
+]
+
+# Sums are kept in ten-thousandths as integers. The API gives every statistic
+# as a whole number or to two decimals, so the sums are exact, and adding up the
+# same matches in any order, as prefix sums, streamed pages or a saved state,
+# rounds to the same averages
+SUM_SCALE = 10_000
+
+def per_match_statistics(columns: MatchStatsColumns) -> np.ndarray:
+    """Returns one row per match and one float64 column per STAT_KEYS entry
+
+    Averaging any set of rows gives the statistics calculate_stats returns for
+    those matches, wins are stored as 100 so their average is a percentage.
+    """
+    if len(columns) == 0:
+        return np.zeros((0, len(STAT_KEYS)))
+    return np.column_stack(
+        [getattr(columns, column_name).astype(np.float64) for column_name in METRIC_COLUMNS.values()]
+        + [
+            (columns.result == 1).astype(np.float64) * 100,
+            score_differences(columns).astype(np.float64)
+        ]
+    )
+
+def to_sum_units(per_match: np.ndarray) -> np.ndarray:
+    """Converts rows shaped like per_match_statistics returns into the int64 units sums are kept in"""
+    return np.rint(per_match * SUM_SCALE).astype(np.int64)
+
+def averages_from_sums(sums: np.ndarray, count: int) -> Dict[str, float]:
+    """The statistics calculate_stats returns, from the sums over count matches in to_sum_units"""
+    if count == 0:
+        return {key: 0.00 for key in STAT_KEYS}
+    # Dividing Python ints rounds correctly, so equal sums always give equal averages
+    return {key: round(int(total) / (SUM_SCALE * count), 2) for key, total in zip(STAT_KEYS, sums)}
+
+class MatchStatsWindows:
+    """Answers stats over any window of a player's history from prefix sums
+
+    The cumulative sums are built once in O(n), exactly in SUM_SCALE units. Any
+    window's averages are then the difference of two rows, O(1), and a full
+    rolling series is O(n).
+    Windows are indexed chronologically, 0 being the player's first match.
+    """
+    @instrumented
+    def __init__(self, columns: MatchStatsColumns) -> None:
+        """Builds the prefix sums
+
+        Args:
+            columns (MatchStatsColumns): The match history, newest first as the API returns it
+        """
+        # Reverse into chronological order, the reversed arrays are views
+        chronological = columns[::-1]
+        per_match = to_sum_units(per_match_statistics(chronological))
+        # Row i holds the sums of the first i matches
+        self.prefix_sums = np.vstack([np.zeros((1, len(STAT_KEYS)), dtype=np.int64), np.cumsum(per_match, axis=0)])
+        self.finished_at = chronological.finished_at
+
+    def __len__(self) -> int:
+        return len(self.prefix_sums) - 1
+
+    def window(self, start: int, stop: int) -> Dict[str, float]:
+        """Averages over matches [start, stop) in chronological order
+
+        Args:
+            start (int): Index of the first match in the window
+            stop (int): Index after the last match in the window
+
+        Returns:
+            Dict[str, float]: The same statistics calculate_stats returns
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return averages_from_sums(self.prefix_sums[stop] - self.prefix_sums[start], max(stop - start, 0))
+
+    def all_time(self) -> Dict[str, float]:
+        return self.window(0, len(self))
+
+    def last_n(self, n: int) -> Dict[str, float]:
+        """Averages over the player's most recent n matches"""
+        return self.window(max(len(self) - n, 0), len(self))
+
+    def first_n(self, n: int) -> Dict[str, float]:
+        """Averages over the player's first n matches"""
+        return self.window(0, n)
+
+    def date_range_indices(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        """Returns the [start, stop) window of matches finished between two datetimes, inclusive"""
+        # finished_at is ascending in chronological order, so both ends are binary searches
+        start_index = np.searchsorted(self.finished_at, int(start.timestamp() * 1000), side="left")
+        stop_index = np.searchsorted(self.finished_at, int(end.timestamp() * 1000), side="right")
+        return int(start_index), int(stop_index)
+
+    def date_range(self, start: datetime, end: datetime) -> Dict[str, float]:
+        """Averages over matches finished between two datetimes, inclusive"""
+        return self.window(*self.date_range_indices(start, end))
+
+    @instrumented
+    def rolling(self, window_size: int) -> Dict[str, np.ndarray]:
+        """Averages over every run of window_size consecutive matches
+
+        Args:
+            window_size (int): The number of matches in each window
+
+        Returns:
+            Dict[str, np.ndarray]: One series per statistic, entry i covering
+                matches [i, i + window_size) in chronological order
+        """
+        if window_size < 1 or window_size > len(self):
+            return {key: np.zeros(0) for key in STAT_KEYS}
+        series = (self.prefix_sums[window_size:] - self.prefix_sums[:-window_size]) / (SUM_SCALE * window_size)
+        return {key: series[:, index] for index, key in enumerate(STAT_KEYS)}